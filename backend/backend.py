@@ -2,12 +2,15 @@ from flask import Flask, request, jsonify, send_file
 from flask_cors import cross_origin
 import os
 from functions.perform import perform
+from functions.data_processing.reporter.Failed_Rows_Spill import Failed_Rows_Spill
+from functions.data_processing.reporter.Index_Ranges import Index_Ranges
 from local_connections.db_connect import execute_query
 
 app = Flask(__name__)
 
 instance = None
 resources = './resources'
+results = Failed_Rows_Spill.RESULT_DIR
 os.makedirs(resources, exist_ok=True)
 app.config['UPLOAD_FOLDER'] = resources
 app.config['ALLOWED_FILE_TYPES'] = {'csv', 'txt', 'xlsx', 'json', 'zip'}
@@ -68,6 +71,51 @@ def perform_validation():
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/failed_rows/<result_id>/<kind>", methods=["GET"])
+@cross_origin()
+def failed_rows_page(result_id, kind):
+    try:
+        page = int(request.args.get("page", 1))
+        page_size = min(int(request.args.get("page_size", 100)), 10_000)
+        return jsonify(Failed_Rows_Spill.read_page(results, result_id, kind, page, page_size)), 200
+    except (AssertionError, ValueError) as e:
+        return jsonify({"error": str(e)}), 404
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/failed_rows/<result_id>/<kind>/download", methods=["GET"])
+@cross_origin()
+def failed_rows_download(result_id, kind):
+    try:
+        path = Failed_Rows_Spill.artifact_path(results, result_id, kind)
+        return send_file(os.path.abspath(path), as_attachment=True,
+                         download_name=f"{result_id}_{os.path.basename(path)}")
+    except AssertionError as e:
+        return jsonify({"error": str(e)}), 404
+
+
+@app.route("/index_ranges/expand", methods=["POST"])
+@cross_origin()
+def expand_index_ranges():
+    try:
+        data = request.get_json() or {}
+        ranges = Index_Ranges.from_ranges(data.get("ranges", []))
+        page = int(data.get("page", 1))
+        page_size = min(int(data.get("page_size", 1000)), 100_000)
+        assert page >= 1 and page_size >= 1, "page and page_size must be positive"
+        return jsonify({
+            "page": page,
+            "page_size": page_size,
+            "total": ranges.count(),
+            "indexes": ranges.expand((page - 1) * page_size, page_size)
+        }), 200
+    except (AssertionError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 @app.route("/connect", methods=["POST"])
 @cross_origin()
 def connect():
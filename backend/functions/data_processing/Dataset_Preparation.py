@@ -0,0 +1,83 @@
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+
+
+class Dataset_Preparation:
+    """
+    Preparation shared by every operation working on the same DataFrame.
+
+    A row is blank when every cell is missing or whitespace only (Python's
+    str.strip(), so '\\xa0' counts as whitespace too). The blank-row mask and the
+    frame without blank rows are computed once per DataFrame object and cached
+    until that object is garbage collected; use Dataset_Preparation.of(df).
+    """
+
+    _cache = {}
+    _lock = threading.Lock()
+
+    def __init__(self, df: pd.DataFrame):
+        # Only a weak reference, so the cache entry never keeps the frame alive
+        self._df = weakref.ref(df)
+        self._blank_rows_mask = None
+        self._cleaned = None
+
+    @property
+    def df(self) -> pd.DataFrame:
+        return self._df()
+
+    @classmethod
+    def of(cls, df: pd.DataFrame) -> "Dataset_Preparation":
+        key = id(df)
+        with cls._lock:
+            preparation = cls._cache.get(key)
+            if preparation is None or preparation.df is not df:
+                preparation = cls(df)
+                cls._cache[key] = preparation
+                weakref.finalize(df, cls._cache.pop, key, None)
+        return preparation
+
+    @staticmethod
+    def blank_cells(series: pd.Series) -> np.ndarray:
+        blank = series.isna().to_numpy()
+        if series.dtype == object or pd.api.types.is_string_dtype(series.dtype):
+            blank = blank | (series.astype(str).str.strip() == '').to_numpy()
+        return blank
+
+    @staticmethod
+    def blank_rows_mask(df: pd.DataFrame) -> np.ndarray:
+        """
+        Column by column, only looking at the rows that are still blank so far;
+        typically the first column already settles almost every row.
+        """
+        mask = np.ones(len(df), dtype=bool)
+        if df.shape[1] == 0:
+            return mask
+        for position in range(df.shape[1]):
+            candidates = np.flatnonzero(mask)
+            if len(candidates) == 0:
+                break
+            column = df.iloc[candidates, position]
+            mask[candidates] = Dataset_Preparation.blank_cells(column)
+        return mask
+
+    @property
+    def blank_rows(self) -> np.ndarray:
+        if self._blank_rows_mask is None:
+            self._blank_rows_mask = self.blank_rows_mask(self.df)
+        return self._blank_rows_mask
+
+    @property
+    def blank_rows_count(self) -> int:
+        return int(self.blank_rows.sum())
+
+    @property
+    def cleaned(self) -> pd.DataFrame:
+        """The frame without blank rows, original index kept."""
+        if not self.blank_rows.any():
+            return self.df
+        if self._cleaned is None:
+            self._cleaned = self.df.loc[~self.blank_rows]
+        return self._cleaned
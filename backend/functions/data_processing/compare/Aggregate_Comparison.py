@@ -0,0 +1,341 @@
+import datetime
+import decimal
+import math
+import traceback
+
+import numpy as np
+import pandas as pd
+
+from functions.data_processing.Dataset_Preparation import Dataset_Preparation
+from functions.data_processing.compare.Data_Comparison import Data_Comparison
+from functions.integrations.SQL_Dialect import SQL_Dialect
+
+
+class Aggregate_Comparison(Data_Comparison):
+    """
+    Reconcile two datasets on aggregates instead of rows.
+
+    Per compare column: count of non-null values, null count, sum (numeric columns),
+    min, max and distinct count, optionally per group of `group_by` columns. A side
+    is either a DataFrame (vectorized groupby) or a pushdown source dict (see
+    GetDataFrameFromConnection.get_pushdown_source), aggregated by one GROUP BY
+    query so no raw rows leave the database. Group values are normalized like
+    compare keys (Data_Comparison.preprocess_column / SQL_Dialect.normalize) so both
+    sides group alike; blank rows are left out on both sides.
+
+    Only the normalization helpers are inherited from Data_Comparison.
+    """
+
+    METRICS = ("count", "null_count", "sum", "min", "max", "distinct")
+    _SAMPLE_ROWS = 1000
+
+    def __init__(self, source, target, test_params=None, user_id: int = 0):
+        self.source = source
+        self.target = target
+        self.test_params = test_params or {}
+        self.user_id = user_id
+
+        self.ignore_case = self.test_params.get("ignore_case", False)
+        self.ignore_spaces = self.test_params.get("ignore_spaces", False)
+        self.to_lower_case = self.test_params.get("to_lower_case", False)
+        self.group_by = self.test_params.get("group_by", []) or []
+        if isinstance(self.group_by, str):
+            self.group_by = [self.group_by]
+        self.compare_columns_source = self.test_params.get("compare_columns_source") or []
+        self.compare_columns_target = self.test_params.get("compare_columns_target") or []
+
+        self.tolerance = float(self.test_params.get("tolerance", 1e-6))
+        self.relative_tolerance = float(self.test_params.get("relative_tolerance", 1e-9))
+        self.max_groups = int(self.test_params.get("max_groups", 1000))
+        self.source_headers = []
+        self.target_headers = []
+
+    # --- inputs ---
+
+    @staticmethod
+    def _is_pushdown(side) -> bool:
+        return isinstance(side, dict)
+
+    def _prepare_side(self, side):
+        if not self._is_pushdown(side):
+            assert isinstance(side, pd.DataFrame), "compare_aggregates needs a DataFrame or a pushdown source"
+            return side
+        side = dict(side, dialect=SQL_Dialect.for_name(side["dialect"]))
+        side["dialect"].prepare(side["connection"])
+        return side
+
+    def _execute(self, side: dict, sql: str):
+        cursor = side["connection"].cursor()
+        try:
+            cursor.execute(sql)
+            columns = [d[0] for d in cursor.description] if cursor.description else []
+            return columns, cursor.fetchall()
+        finally:
+            cursor.close()
+
+    def _headers(self, side) -> list:
+        if not self._is_pushdown(side):
+            return list(side.columns)
+        columns, _ = self._execute(side, f"SELECT * FROM ({side['query']}) src WHERE 1 = 0")
+        return columns
+
+    def _resolve_columns(self):
+        self.source_headers = self._headers(self.source)
+        self.target_headers = self._headers(self.target)
+        assert self.source_headers, "source_df is empty"
+        assert self.target_headers, "target_df is empty"
+
+        if not self.compare_columns_source or not self.compare_columns_target:
+            common_cols = [c for c in self.source_headers if c in self.target_headers]
+            self.compare_columns_source = common_cols
+            self.compare_columns_target = common_cols
+        assert len(self.compare_columns_source) == len(self.compare_columns_target), \
+            "compare_columns_source and compare_columns_target must have the same length"
+        for side, columns, headers in (("source", self.compare_columns_source, self.source_headers),
+                                       ("target", self.compare_columns_target, self.target_headers)):
+            missing = [c for c in columns if c not in headers]
+            assert not missing, f"Missing columns in {side} dataframe: {missing}"
+        unknown_columns = [c for c in self.group_by if c not in self.compare_columns_source]
+        assert not unknown_columns, f"group_by must be part of compare_columns_source: {unknown_columns}"
+
+    def _group_columns(self, side: str) -> list:
+        if side == "source":
+            return list(self.group_by)
+        target_column_for = dict(zip(self.compare_columns_source, self.compare_columns_target))
+        return [target_column_for[c] for c in self.group_by]
+
+    def _measure_columns(self, side: str) -> list:
+        columns = self.compare_columns_source if side == "source" else self.compare_columns_target
+        group_columns = self._group_columns(side)
+        return [c for c in columns if c not in group_columns]
+
+    # --- aggregation ---
+
+    def _aggregate_frame(self, df: pd.DataFrame, side: str) -> dict:
+        """
+        group key -> {"rows": n, "metrics": [per measure column {metric: value}]} by vectorized groupby.
+        """
+        df = Dataset_Preparation.of(df).cleaned
+        group_columns = self._group_columns(side)
+        measures = self._measure_columns(side)
+
+        work = pd.DataFrame(index=df.index)
+        keys = [f"g{i}" for i in range(len(group_columns))] or ["g"]
+        if group_columns:
+            for key, column in zip(keys, group_columns):
+                work[key] = self.preprocess_column(df[column], for_output=False)
+        else:
+            work["g"] = 0
+        for position, column in enumerate(measures):
+            series = df[column]
+            if not (pd.api.types.is_numeric_dtype(series.dtype) or pd.api.types.is_datetime64_any_dtype(series.dtype)):
+                # Text min/max on the trimmed text, so mixed object columns still order
+                series = series.astype(str).str.strip().where(series.notna())
+            work[f"c{position}"] = series
+
+        grouped = work.groupby(keys, sort=False, dropna=False)
+        sizes = grouped.size()
+        metrics = {"rows": sizes}
+        for position, column in enumerate(measures):
+            values = grouped[f"c{position}"]
+            count = values.count()
+            metrics[(position, "count")] = count
+            metrics[(position, "null_count")] = sizes - count
+            if pd.api.types.is_numeric_dtype(df[column].dtype) and not pd.api.types.is_bool_dtype(df[column].dtype):
+                metrics[(position, "sum")] = values.sum(min_count=1)
+            metrics[(position, "min")] = values.min()
+            metrics[(position, "max")] = values.max()
+            metrics[(position, "distinct")] = values.nunique()
+
+        # Every aggregate comes out of the same groupby, so they share the group order of `sizes`
+        columns = {name: values.tolist() for name, values in metrics.items()}
+        aggregates = {}
+        for row, group in enumerate(sizes.index):
+            key = (group if isinstance(group, tuple) else (group,)) if group_columns else ()
+            aggregates[key] = {
+                "rows": int(columns["rows"][row]),
+                "metrics": [
+                    {metric: self._plain(columns[(position, metric)][row])
+                     for metric in self.METRICS if (position, metric) in columns}
+                    for position in range(len(measures))
+                ]
+            }
+        return aggregates
+
+    def _numeric_columns(self, side: dict, columns) -> set:
+        """Columns whose sampled non-null values are all numbers: only those are summed."""
+        dialect = side["dialect"]
+        select = ", ".join(dialect.quote(c) for c in columns)
+        _, rows = self._execute(side, dialect.limit(f"SELECT {select} FROM ({side['query']}) src", self._SAMPLE_ROWS))
+        numeric = set()
+        for position, column in enumerate(columns):
+            values = [row[position] for row in rows if row[position] is not None]
+            if values and all(isinstance(v, (int, float, decimal.Decimal)) and not isinstance(v, bool) for v in values):
+                numeric.add(column)
+        return numeric
+
+    def _aggregate_sql(self, side: dict, name: str) -> dict:
+        """
+        The same aggregates as _aggregate_frame from a single GROUP BY query.
+        """
+        dialect = side["dialect"]
+        group_columns = self._group_columns(name)
+        measures = self._measure_columns(name)
+        numeric = self._numeric_columns(side, measures) if measures else set()
+        headers = self.source_headers if name == "source" else self.target_headers
+
+        group_exprs = [dialect.normalize(c, self.ignore_case or self.to_lower_case, self.ignore_spaces)
+                       for c in group_columns]
+        selects = [f"{expr} AS g{i}" for i, expr in enumerate(group_exprs)] + ["COUNT(*) AS row_count"]
+        for position, column in enumerate(measures):
+            quoted = dialect.quote(column)
+            selects.append(f"COUNT({quoted}) AS c{position}_count")
+            if column in numeric:
+                selects.append(f"SUM({quoted}) AS c{position}_sum")
+            selects += [f"MIN({quoted}) AS c{position}_min", f"MAX({quoted}) AS c{position}_max",
+                        f"{dialect.approx_count_distinct(quoted)} AS c{position}_distinct"]
+
+        sql = f"SELECT {', '.join(selects)} FROM ({side['query']}) src WHERE NOT {dialect.blank_row_predicate(headers)}"
+        if group_exprs:
+            sql += f" GROUP BY {', '.join(group_exprs)}"
+        columns, rows = self._execute(side, sql)
+
+        aggregates = {}
+        for row in rows:
+            record = dict(zip(columns, row))
+            if not group_exprs and not record["row_count"]:
+                continue
+            key = tuple(record[f"g{i}"] for i in range(len(group_exprs)))
+            group_metrics = []
+            for position, column in enumerate(measures):
+                metrics = {"count": self._plain(record[f"c{position}_count"])}
+                metrics["null_count"] = self._plain(record["row_count"]) - metrics["count"]
+                if column in numeric:
+                    metrics["sum"] = self._plain(record[f"c{position}_sum"])
+                for metric in ("min", "max", "distinct"):
+                    metrics[metric] = self._plain(record[f"c{position}_{metric}"])
+                group_metrics.append(metrics)
+            aggregates[key] = {"rows": self._plain(record["row_count"]), "metrics": group_metrics}
+        return aggregates
+
+    def _aggregate(self, side, name: str) -> dict:
+        if self._is_pushdown(side):
+            return self._aggregate_sql(side, name)
+        return self._aggregate_frame(side, name)
+
+    # --- diff ---
+
+    @staticmethod
+    def _plain(value):
+        """JSON friendly Python value; NaN and NaT become None."""
+        if value is None:
+            return None
+        if isinstance(value, decimal.Decimal):
+            return int(value) if value == value.to_integral_value() else float(value)
+        if isinstance(value, np.generic):
+            value = value.item()
+        if isinstance(value, float) and math.isnan(value):
+            return None
+        if value is pd.NaT:
+            return None
+        if isinstance(value, (pd.Timestamp, datetime.datetime, datetime.date)):
+            return str(value)
+        return value
+
+    def _distinct_error(self, side) -> float:
+        return side["dialect"].approx_distinct_error if self._is_pushdown(side) else 0.0
+
+    def _metric_matches(self, metric: str, source_value, target_value) -> bool:
+        if source_value is None or target_value is None:
+            return source_value is None and target_value is None
+        numbers = all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in (source_value, target_value))
+        if metric == "distinct":
+            error = max(self._distinct_error(self.source), self._distinct_error(self.target))
+            return abs(source_value - target_value) <= error * max(source_value, target_value)
+        if numbers:
+            return math.isclose(source_value, target_value, rel_tol=self.relative_tolerance, abs_tol=self.tolerance)
+        return self.preprocess_column(pd.Series([source_value, target_value])).nunique() == 1
+
+    def _diff(self, source_aggregates: dict, target_aggregates: dict) -> dict:
+        measures_source = self._measure_columns("source")
+        measures_target = self._measure_columns("target")
+        mismatched_groups = []
+        column_mismatch_counts = {}
+        only_in_source = only_in_target = matched = 0
+
+        for key in list(source_aggregates) + [k for k in target_aggregates if k not in source_aggregates]:
+            source_group, target_group = source_aggregates.get(key), target_aggregates.get(key)
+            entry = {
+                "group": dict(zip(self.group_by, key)),
+                "rows": {"source": source_group and source_group["rows"], "target": target_group and target_group["rows"]}
+            }
+            if target_group is None or source_group is None:
+                only_in_source += target_group is None
+                only_in_target += source_group is None
+                entry["status"] = "only_in_source" if target_group is None else "only_in_target"
+                mismatched_groups.append(entry)
+                continue
+
+            mismatches = []
+            if source_group["rows"] != target_group["rows"]:
+                mismatches.append({"column": None, "metric": "rows",
+                                   "source": source_group["rows"], "target": target_group["rows"]})
+            for position, column in enumerate(measures_source):
+                source_metrics, target_metrics = source_group["metrics"][position], target_group["metrics"][position]
+                for metric in self.METRICS:
+                    if metric not in source_metrics or metric not in target_metrics:
+                        continue
+                    if not self._metric_matches(metric, source_metrics[metric], target_metrics[metric]):
+                        mismatches.append({"column": column, "target_column": measures_target[position],
+                                           "metric": metric, "source": source_metrics[metric],
+                                           "target": target_metrics[metric]})
+            if not mismatches:
+                matched += 1
+                continue
+            for column in {m["column"] for m in mismatches if m["column"] is not None}:
+                column_mismatch_counts[column] = column_mismatch_counts.get(column, 0) + 1
+            entry["status"] = "mismatch"
+            entry["mismatches"] = mismatches
+            mismatched_groups.append(entry)
+
+        return {
+            "status": not mismatched_groups,
+            "matched_groups": matched,
+            "failed_groups": len(mismatched_groups),
+            "groups_only_in_source": only_in_source,
+            "groups_only_in_target": only_in_target,
+            "column_mismatch_counts": column_mismatch_counts,
+            "mismatched_groups": mismatched_groups[:self.max_groups],
+            "mismatched_groups_truncated": len(mismatched_groups) > self.max_groups
+        }
+
+    def perform_test(self) -> dict:
+        try:
+            self.source = self._prepare_side(self.source)
+            self.target = self._prepare_side(self.target)
+            self._resolve_columns()
+
+            source_aggregates = self._aggregate(self.source, "source")
+            target_aggregates = self._aggregate(self.target, "target")
+            result_metadata = self._diff(source_aggregates, target_aggregates)
+            result_metadata.update({
+                "group_by": self.group_by,
+                "aggregate_columns_source": self._measure_columns("source"),
+                "aggregate_columns_target": self._measure_columns("target"),
+                "source": {
+                    "rows": sum(g["rows"] for g in source_aggregates.values()),
+                    "groups": len(source_aggregates),
+                    "pushdown": self._is_pushdown(self.source)
+                },
+                "target": {
+                    "rows": sum(g["rows"] for g in target_aggregates.values()),
+                    "groups": len(target_aggregates),
+                    "pushdown": self._is_pushdown(self.target)
+                }
+            })
+            return {"result_metadata": result_metadata}
+
+        except AssertionError as ae:
+            return {"error": f"AssertionError: {ae}"}
+        except Exception as e:
+            return {"error": str(e), "traceback": traceback.format_exc()}
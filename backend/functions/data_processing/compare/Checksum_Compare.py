@@ -0,0 +1,176 @@
+import traceback
+
+import numpy as np
+import pandas as pd
+
+from functions.data_processing.compare.Data_Comparison import Data_Comparison
+from functions.data_processing.compare.Hash_Compare_Engine import Hash_Compare_Engine
+from functions.data_processing.compare.Pushdown_Compare import Pushdown_Compare
+from functions.integrations.SQL_Dialect import SQL_Dialect
+
+
+class Checksum_Compare(Pushdown_Compare):
+    """
+    Bucketed checksum compare pushed down to the databases.
+
+    Both sides hash every row (and its key, in key + value mode) inside the
+    database and aggregate the hashes per key-hash bucket into (row count, hash
+    sum) checksums. Only buckets whose checksums differ are refined into finer
+    buckets, Merkle style, and only the rows of differing leaf buckets are ever
+    fetched; those are compared with Data_Comparison and the rows of identical
+    buckets are counted as matched. Fetched rows identical on both sides (same row
+    hash) are paired and matched first, and the rest come in key hash, row hash
+    order, so repeated keys pair the same way however the buckets were cut.
+    """
+
+    compare_mode = "checksum"
+    _IN_LIST_SIZE = 1000
+
+    def __init__(self, source: dict, target: dict, test_params=None, user_id: int = 0):
+        super().__init__(source, target, test_params, user_id)
+        self.fanout = int(self.test_params.get("bucket_fanout", 64))
+        self.max_depth = int(self.test_params.get("max_bucket_depth", 3))
+        self.max_fetch_rows = int(self.test_params.get("max_fetch_rows", 50_000))
+        self.checksum_stats = {"bucket_queries": 0, "differing_buckets": 0, "fetched_rows_source": 0,
+                               "fetched_rows_target": 0}
+
+    def _key_hash(self, side: dict) -> str:
+        """
+        Bucketing hash: the key columns in key + value mode (so changed rows land in
+        the same bucket on both sides), the whole row otherwise.
+        """
+        return self._row_hash(side, self._key_columns(side) if self.key_columns else self._columns(side))
+
+    def _hashed(self, side: dict) -> str:
+        return (
+            f"SELECT {self._key_hash(side)} AS key_hash, {self._row_hash(side, self._columns(side))} AS row_hash "
+            f"FROM ({side['query']}) src WHERE {self._not_blank(side)}"
+        )
+
+    def _in_lists(self, expr: str, buckets) -> list:
+        buckets = sorted(buckets)
+        return [
+            f"{expr} IN ({', '.join(str(b) for b in buckets[i:i + self._IN_LIST_SIZE])})"
+            for i in range(0, len(buckets), self._IN_LIST_SIZE)
+        ]
+
+    def _checksums(self, side: dict, modulus: int, parents=None) -> dict:
+        """
+        bucket -> (rows, high hash sum, low hash sum) for buckets key_hash % modulus,
+        restricted to the given parent buckets of the previous level.
+        """
+        dialect = side["dialect"]
+        bucket = dialect.mod("key_hash", str(modulus))
+        query = (
+            f"SELECT {bucket} AS bucket, COUNT(*) AS row_count, "
+            f"SUM({dialect.int_div('row_hash', str(SQL_Dialect.HASH_SPLIT))}) AS hash_high, "
+            f"SUM({dialect.mod('row_hash', str(SQL_Dialect.HASH_SPLIT))}) AS hash_low "
+            f"FROM ({self._hashed(side)}) h"
+        )
+        conditions = self._in_lists(dialect.mod("key_hash", str(modulus // self.fanout)), parents) \
+            if parents is not None else [None]
+
+        checksums = {}
+        for condition in conditions:
+            sql = query + (f" WHERE {condition}" if condition else "") + f" GROUP BY {bucket}"
+            self.checksum_stats["bucket_queries"] += 1
+            for row in self._execute(side, sql)[1]:
+                checksums[int(row[0])] = (int(row[1]), int(row[2]), int(row[3]))
+        return checksums
+
+    def _differing_buckets(self) -> tuple:
+        """
+        Walk down the bucket levels. Returns the row count of source rows in
+        identical buckets, the total (non-blank) row counts of both sides and the
+        differing leaf buckets as (modulus, buckets) pairs.
+        """
+        matched_rows, leaves = 0, []
+        totals = None
+        modulus, parents = self.fanout, None
+        for depth in range(1, self.max_depth + 1):
+            source = self._checksums(self.source, modulus, parents)
+            target = self._checksums(self.target, modulus, parents)
+            if totals is None:
+                totals = (sum(c[0] for c in source.values()), sum(c[0] for c in target.values()))
+
+            differing = [b for b in set(source) | set(target) if source.get(b) != target.get(b)]
+            matched_rows += sum(c[0] for b, c in source.items() if b not in differing)
+            rows = {b: source.get(b, (0,))[0] + target.get(b, (0,))[0] for b in differing}
+
+            if depth == self.max_depth or sum(rows.values()) <= self.max_fetch_rows:
+                leaves.append((modulus, differing))
+                break
+            # Buckets already small enough are fetched as they are, larger ones are split further
+            small = [b for b in differing if rows[b] * self.fanout <= self.max_fetch_rows]
+            parents = [b for b in differing if b not in small]
+            if small:
+                leaves.append((modulus, small))
+            if not parents:
+                break
+            modulus *= self.fanout
+
+        self.checksum_stats["differing_buckets"] = sum(len(buckets) for _, buckets in leaves)
+        return matched_rows, totals, leaves
+
+    def _fetch(self, side: dict, leaves) -> tuple:
+        """Rows of the differing leaf buckets in key hash, row hash order, and their row hashes."""
+        dialect = side["dialect"]
+        columns = self._columns(side)
+        select = ", ".join(dialect.quote(c) for c in columns)
+        frames, hashes = [], []
+        for modulus, buckets in leaves:
+            for condition in self._in_lists(dialect.mod("key_hash", str(modulus)), buckets):
+                _, rows = self._execute(
+                    side,
+                    f"SELECT {select}, row_hash FROM ("
+                    f"SELECT src.*, {self._key_hash(side)} AS key_hash, {self._row_hash(side, columns)} AS row_hash "
+                    f"FROM ({side['query']}) src WHERE {self._not_blank(side)}) h "
+                    f"WHERE {condition} ORDER BY key_hash, row_hash"
+                )
+                frames.append(self._frame([row[:-1] for row in rows], columns))
+                hashes.append(np.array([row[-1] for row in rows], dtype=np.int64))
+        if not frames:
+            return pd.DataFrame(columns=columns), np.array([], dtype=np.int64)
+        return pd.concat(frames, ignore_index=True), np.concatenate(hashes)
+
+    def _mode_params(self) -> dict:
+        return {
+            "bucket_fanout": self.fanout,
+            "max_bucket_depth": self.max_depth,
+            "max_fetch_rows": self.max_fetch_rows
+        }
+
+    def perform_test(self):
+        try:
+            self._prepare()
+
+            matched_rows, (source_rows, target_rows), leaves = self._differing_buckets()
+            source_df, source_hashes = self._fetch(self.source, leaves)
+            target_df, target_hashes = self._fetch(self.target, leaves)
+            self.checksum_stats["fetched_rows_source"] = len(source_df)
+            self.checksum_stats["fetched_rows_target"] = len(target_df)
+
+            # Identical rows pair off first, only the rest go to Data_Comparison
+            paired = Hash_Compare_Engine(source_hashes, target_hashes).compare()
+            matched_rows += paired["matched_rows"]
+            source_df = source_df.loc[paired["not_in_target"]].reset_index(drop=True)
+            target_df = target_df.loc[paired["not_in_source"]].reset_index(drop=True)
+
+            reports = []
+            if len(source_df) or len(target_df):
+                reports.append(Data_Comparison(source_df, target_df, self._partition_params(), self.user_id).perform_test())
+
+            report = self.merge_reports(reports, self._build_template(
+                {"rows": source_rows, "blank_rows": self._blank_rows(self.source)},
+                {"rows": target_rows, "blank_rows": self._blank_rows(self.target)}
+            ), self.failed_rows_spill)
+            if "error" in report:
+                return report
+            report["result_metadata"]["matched_rows"] += matched_rows
+            report["result_metadata"]["checksum_summary"] = self.checksum_stats
+            return report
+
+        except AssertionError as ae:
+            return {"error": f"AssertionError: {ae}"}
+        except Exception as e:
+            return {"error": str(e), "traceback": traceback.format_exc()}
@@ -1,10 +1,20 @@
 import pandas as pd
 
+from functions.data_processing.Dataset_Preparation import Dataset_Preparation
+
 class Count_Comparison:
-    def __init__(self, source_df: pd.DataFrame, target_df: pd.DataFrame, verbose=False):
-        if not isinstance(source_df, pd.DataFrame):
+    """
+    Compare row and column counts of two datasets.
+
+    Each side is either a DataFrame or a count profile {"rows", "blank_rows", "columns"}
+    as returned by GetDataFrameFromConnection.get_row_count(), which counts on the
+    server or in the file without loading the dataset.
+    """
+
+    def __init__(self, source_df, target_df, verbose=False):
+        if not isinstance(source_df, (pd.DataFrame, dict)):
             raise TypeError("source_df must be a pandas DataFrame")
-        if not isinstance(target_df, pd.DataFrame):
+        if not isinstance(target_df, (pd.DataFrame, dict)):
             raise TypeError("target_df must be a pandas DataFrame")
 
         self.source_df = source_df
@@ -15,57 +25,42 @@ class Count_Comparison:
             print("Source DataFrame:\n", self.source_df)
             print("Target DataFrame:\n", self.target_df)
 
+    @staticmethod
+    def profile(df: pd.DataFrame) -> dict:
+        """Count profile of a DataFrame; blank rows are shared and cached per DataFrame."""
+        preparation = Dataset_Preparation.of(df)
+        return {"rows": len(df), "blank_rows": preparation.blank_rows_count, "columns": list(df.columns)}
+
     def perform_test(self) -> dict:
-        if self.source_df.empty:
+        source = self.source_df if isinstance(self.source_df, dict) else self.profile(self.source_df)
+        target = self.target_df if isinstance(self.target_df, dict) else self.profile(self.target_df)
+        if not source["rows"] or not source["columns"]:
             raise ValueError("source_df is empty")
-        if self.target_df.empty:
+        if not target["rows"] or not target["columns"]:
             raise ValueError("target_df is empty")
 
-        def clean_str(x):
-            if pd.isna(x):
-                return ''
-            # Remove common invisible whitespace characters
-            return str(x).replace('\xa0', '').strip()
-
-        def is_blank_row(row):
-            stripped_values = [clean_str(x) for x in row]
-            return all(val == '' for val in stripped_values)
-
-        # Create boolean masks identifying blank rows in each DataFrame
-        source_blank_rows_mask = self.source_df.apply(is_blank_row, axis=1)
-        target_blank_rows_mask = self.target_df.apply(is_blank_row, axis=1)
-
-        source_blank_rows = source_blank_rows_mask.sum()
-        target_blank_rows = target_blank_rows_mask.sum()
+        # Blank rows (every cell missing or whitespace, '\xa0' included) are not counted
+        source_blank_rows = source["blank_rows"]
+        target_blank_rows = target["blank_rows"]
 
         if self.verbose:
-            print(f"Source blank rows mask:\n{source_blank_rows_mask}")
-            print(f"Target blank rows mask:\n{target_blank_rows_mask}")
             print(f"Source blank rows count: {source_blank_rows}")
             print(f"Target blank rows count: {target_blank_rows}")
 
-        # Remove blank rows and reset index
-        source_df_clean = self.source_df.loc[~source_blank_rows_mask].reset_index(drop=True)
-        target_df_clean = self.target_df.loc[~target_blank_rows_mask].reset_index(drop=True)
-
-        if self.verbose:
-            print("Cleaned Source DataFrame:\n", source_df_clean)
-            print("Cleaned Target DataFrame:\n", target_df_clean)
-
         # Count rows and columns after cleaning
-        source_row_count = len(source_df_clean)
-        target_row_count = len(target_df_clean)
+        source_row_count = source["rows"] - source_blank_rows
+        target_row_count = target["rows"] - target_blank_rows
 
-        source_col_count = len(source_df_clean.columns)
-        target_col_count = len(target_df_clean.columns)
+        source_col_count = len(source["columns"])
+        target_col_count = len(target["columns"])
 
         # Calculate extra rows based on counts difference
         extra_rows_in_source = max(0, source_row_count - target_row_count)
         extra_rows_in_target = max(0, target_row_count - source_row_count)
 
         # Calculate extra columns based on column name differences
-        extra_cols_in_source = list(set(source_df_clean.columns) - set(target_df_clean.columns))
-        extra_cols_in_target = list(set(target_df_clean.columns) - set(source_df_clean.columns))
+        extra_cols_in_source = list(set(source["columns"]) - set(target["columns"]))
+        extra_cols_in_target = list(set(target["columns"]) - set(source["columns"]))
 
         # Final status: True only if rows and columns match exactly and no extras
         status = (
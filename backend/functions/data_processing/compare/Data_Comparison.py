@@ -1,34 +1,31 @@
+import numpy as np
 import pandas as pd
 import traceback
-from collections import Counter
+
+from functions.data_processing.Dataset_Preparation import Dataset_Preparation
+from functions.data_processing.compare.Hash_Compare_Engine import Hash_Compare_Engine
+from functions.data_processing.compare.Index_Compare_Engine import Index_Compare_Engine
+from functions.data_processing.compare.Key_Value_Compare_Engine import Key_Value_Compare_Engine
+from functions.data_processing.compare.Row_Fingerprint import Fingerprint_Compare
 
 
 class Data_Comparison:
+    # Compare numeric, datetime and bool column pairs in their native dtype; subclasses whose
+    # hashes must stay stable across runs with varying dtypes turn this off
+    _NATIVE_KINDS = True
+    _column_kinds = None
+
     def __init__(self, source_df, target_df, test_params=None, user_id: int = 0):
-        self.source_df = source_df.copy()
-        self.target_df = target_df.copy()
         self.test_params = test_params or {}
         self.user_id = user_id
 
-        # Count blank rows in original data before removing
-        self.blank_rows_source = self.source_df.apply(
-            lambda row: all(row.isna()) or all(row.astype(str).str.strip() == ''), axis=1
-        ).sum()
-        self.blank_rows_target = self.target_df.apply(
-            lambda row: all(row.isna()) or all(row.astype(str).str.strip() == ''), axis=1
-        ).sum()
-
-        # Remove completely blank rows from source
-        blank_rows_source = self.source_df.apply(
-            lambda row: all(row.isna()) or all(row.astype(str).str.strip() == ''), axis=1
-        )
-        self.source_df = self.source_df.loc[~blank_rows_source]
-
-        # Remove completely blank rows from target
-        blank_rows_target = self.target_df.apply(
-            lambda row: all(row.isna()) or all(row.astype(str).str.strip() == ''), axis=1
-        )
-        self.target_df = self.target_df.loc[~blank_rows_target]
+        # Count and remove completely blank rows (shared, cached per DataFrame)
+        source_preparation = Dataset_Preparation.of(source_df)
+        target_preparation = Dataset_Preparation.of(target_df)
+        self.blank_rows_source = source_preparation.blank_rows_count
+        self.blank_rows_target = target_preparation.blank_rows_count
+        self.source_df = source_preparation.cleaned
+        self.target_df = target_preparation.cleaned
 
         # Column selection
         if not self.test_params.get("compare_columns_source") or not self.test_params.get("compare_columns_target"):
@@ -45,6 +42,20 @@ class Data_Comparison:
         self.to_lower_case = self.test_params.get("to_lower_case", False)
         self.on_index = self.test_params.get("on_index", False)
 
+        # Key + value mode: key columns identify a row, value columns are compared cell by cell.
+        # Both are given as source column names and mapped to target through the compare column lists.
+        self.key_columns = self.test_params.get("key_columns", []) or []
+        self.value_columns = self.test_params.get("value_columns", []) or []
+        if isinstance(self.key_columns, str):
+            self.key_columns = [self.key_columns]
+        if isinstance(self.value_columns, str):
+            self.value_columns = [self.value_columns]
+        if self.key_columns and not self.value_columns:
+            self.value_columns = [c for c in self.compare_columns_source if c not in self.key_columns]
+
+        # "fingerprint" diffs one 64-bit digest per row and only materializes the differing rows
+        self.compare_mode = self.test_params.get("compare_mode", "standard")
+
     def preprocess_column(self, series, for_output=False):
         # Convert to string and strip spaces
         result = series.fillna("").astype(str).str.strip()
@@ -64,6 +75,75 @@ class Data_Comparison:
 
         return result
 
+    def column_kind(self, source, target) -> str:
+        """
+        How a source/target column pair is compared: "integer", "float", "datetime" and
+        "bool" pairs natively, everything else (including mixed pairs) as normalized strings.
+        """
+        if not self._NATIVE_KINDS:
+            return "string"
+        source_dtype, target_dtype = source.dtype, target.dtype
+        if pd.api.types.is_bool_dtype(source_dtype) and pd.api.types.is_bool_dtype(target_dtype):
+            return "bool"
+        if pd.api.types.is_bool_dtype(source_dtype) or pd.api.types.is_bool_dtype(target_dtype):
+            return "string"
+        if pd.api.types.is_numeric_dtype(source_dtype) and pd.api.types.is_numeric_dtype(target_dtype):
+            if all(isinstance(d, np.dtype) and d.kind == "i" for d in (source_dtype, target_dtype)):
+                return "integer"
+            return "float"
+        if pd.api.types.is_datetime64_any_dtype(source_dtype) and pd.api.types.is_datetime64_any_dtype(target_dtype):
+            return "datetime"
+        return "string"
+
+    def comparison_column(self, series, kind: str) -> pd.Series:
+        """
+        Comparison form of one column. Native forms are canonical so equal values hash
+        equally: 1 and 1.0 meet as float64, -0.0 becomes 0.0, every NaN is the same NaN
+        and datetimes are naive UTC.
+        """
+        if kind == "integer":
+            return series.astype(np.int64)
+        if kind in ("float", "bool"):
+            values = series.to_numpy(dtype=np.float64, na_value=np.nan) + 0.0
+            values[np.isnan(values)] = np.nan
+            return pd.Series(values, index=series.index)
+        if kind == "datetime":
+            if getattr(series.dt, "tz", None) is not None:
+                series = series.dt.tz_convert("UTC").dt.tz_localize(None)
+            return series.astype("datetime64[ns]")
+        return self.preprocess_column(series, for_output=False)
+
+    def column_kinds(self, side: str) -> dict:
+        """
+        Compare column -> kind for "source" or "target", decided once per column pair.
+        """
+        if self._column_kinds is None:
+            kinds = [
+                self.column_kind(self.source_df[source_col], self.target_df[target_col])
+                for source_col, target_col in zip(self.compare_columns_source, self.compare_columns_target)
+            ]
+            self._column_kinds = {
+                "source": dict(zip(self.compare_columns_source, kinds)),
+                "target": dict(zip(self.compare_columns_target, kinds))
+            }
+        return self._column_kinds[side]
+
+    def comparison_df(self, df, columns, side: str) -> pd.DataFrame:
+        kinds = self.column_kinds(side)
+        return pd.DataFrame(
+            {col: self.comparison_column(df[col], kinds[col]) for col in columns},
+            index=df.index,
+            columns=columns
+        )
+
+    def _display_records(self, rows, columns) -> list:
+        # Display values are only built for the reported rows
+        return self.to_native_python(self.preprocess_df(rows[columns], columns, for_output=True)).to_dict(orient="records")
+
+    def _key_values(self, rows, columns) -> list:
+        """Normalized key lists of the failed_rows_indexes report entries; subclasses must not reuse the name."""
+        return self.preprocess_df(rows[columns], columns, for_output=False).values.tolist()
+
     def preprocess_df(self, df, columns, for_output=False):
         df_copy = df.copy()
         for col in columns:
@@ -84,17 +164,230 @@ class Data_Comparison:
         else:
             return [list(x) for x in keys_df.drop_duplicates().values]
 
-    def get_excess_rows(self, df, key_columns, excess_keys):
-        key_tuples = df[key_columns].apply(tuple, axis=1)
-        indexes = []
-
-        excess_counter = Counter(excess_keys)
+    def _target_column_for(self) -> dict:
+        return dict(zip(self.compare_columns_source, self.compare_columns_target))
+
+    def _compare_on_index(self, source_comp, target_comp, source_raw, target_raw) -> dict:
+        # Index-based comparison, one whole column pair at a time
+        diff = Index_Compare_Engine(
+            source_comp, target_comp, self.compare_columns_source, self.compare_columns_target
+        ).compare()
+
+        mismatch_indexes = diff["mismatch_indexes"].tolist()
+        not_in_target_indexes = diff["not_in_target_indexes"].tolist()
+        not_in_source_indexes = diff["not_in_source_indexes"].tolist()
+
+        return {
+            "matched_rows": len(diff["common_indexes"]) - len(mismatch_indexes),
+            "failed_rows": len(mismatch_indexes) + len(not_in_target_indexes) + len(not_in_source_indexes),
+            "not_in_target_count": len(not_in_target_indexes),
+            "not_in_source_count": len(not_in_source_indexes),
+            "column_mismatch_counts": diff["column_mismatch_counts"],
+            "failed_rows_indexes": {
+                "mismatched_rows": mismatch_indexes,
+                "not_in_target": not_in_target_indexes,
+                "not_in_source": not_in_source_indexes
+            },
+            "failed_rows_details": {
+                "mismatched_rows_source": self._display_records(
+                    source_raw.loc[mismatch_indexes], self.compare_columns_source
+                ),
+                "mismatched_rows_target": self._display_records(
+                    target_raw.loc[mismatch_indexes], self.compare_columns_target
+                ),
+                "mismatched_cells": [
+                    {
+                        "index": idx,
+                        "first_mismatch_column": first_col,
+                        "mismatched_columns": cols
+                    }
+                    for idx, first_col, cols in zip(
+                        mismatch_indexes, diff["first_mismatch_column"], diff["mismatched_columns"]
+                    )
+                ],
+                "not_in_target_rows": self._display_records(
+                    source_raw.loc[not_in_target_indexes], self.compare_columns_source
+                ),
+                "not_in_source_rows": self._display_records(
+                    target_raw.loc[not_in_source_indexes], self.compare_columns_target
+                )
+            }
+        }
+
+    def _compare_key_value(self, source_comp, target_comp, source_raw, target_raw) -> dict:
+        # Key + value comparison: changed rows are reported once as mismatches
+        target_column_for = self._target_column_for()
+        source_key_columns = self.key_columns
+        target_key_columns = [target_column_for[c] for c in self.key_columns]
+
+        diff = Key_Value_Compare_Engine(
+            source_comp, target_comp,
+            source_key_columns, target_key_columns,
+            self.value_columns, [target_column_for[c] for c in self.value_columns]
+        ).compare()
+
+        return self._key_value_outcome(
+            diff["matched_rows"],
+            diff["changed_source_positions"],
+            diff["changed_target_positions"],
+            diff["not_in_target_positions"],
+            diff["not_in_source_positions"],
+            diff,
+            source_raw, target_raw
+        )
 
-        for key, count in excess_counter.items():
-            matching_indexes = key_tuples[key_tuples == key].index.tolist()
-            indexes.extend(matching_indexes[:count])
+    def _key_value_outcome(self, matched_rows, changed_source_positions, changed_target_positions,
+                           not_in_target_positions, not_in_source_positions, mismatch_description,
+                           source_raw, target_raw) -> dict:
+        """
+        Report part of a key + value compare. The raw frames only need to hold the
+        rows at the given positions (in the same row order as the full frames).
+        """
+        target_column_for = self._target_column_for()
+        source_key_columns = self.key_columns
+        target_key_columns = [target_column_for[c] for c in self.key_columns]
+        source_row_columns = self.key_columns + self.value_columns
+        target_row_columns = [target_column_for[c] for c in source_row_columns]
+
+        mismatched_keys = self._key_values(source_raw.iloc[changed_source_positions], source_key_columns)
+        not_in_target_keys = self._key_values(source_raw.iloc[not_in_target_positions], source_key_columns)
+        not_in_source_keys = self._key_values(target_raw.iloc[not_in_source_positions], target_key_columns)
+
+        return {
+            "matched_rows": matched_rows,
+            "failed_rows": len(mismatched_keys) + len(not_in_target_keys) + len(not_in_source_keys),
+            "not_in_target_count": len(not_in_target_keys),
+            "not_in_source_count": len(not_in_source_keys),
+            "column_mismatch_counts": mismatch_description["column_mismatch_counts"],
+            "failed_rows_indexes": {
+                "mismatched_rows": mismatched_keys,
+                "not_in_target": not_in_target_keys,
+                "not_in_source": not_in_source_keys
+            },
+            "failed_rows_details": {
+                "mismatched_rows_source": self._display_records(
+                    source_raw.iloc[changed_source_positions], source_row_columns
+                ),
+                "mismatched_rows_target": self._display_records(
+                    target_raw.iloc[changed_target_positions], target_row_columns
+                ),
+                "mismatched_cells": [
+                    {
+                        "key": key,
+                        "first_mismatch_column": first_col,
+                        "mismatched_columns": cols
+                    }
+                    for key, first_col, cols in zip(
+                        mismatched_keys,
+                        mismatch_description["first_mismatch_column"],
+                        mismatch_description["mismatched_columns"]
+                    )
+                ],
+                "not_in_target_rows": self._display_records(
+                    source_raw.iloc[not_in_target_positions], source_row_columns
+                ),
+                "not_in_source_rows": self._display_records(
+                    target_raw.iloc[not_in_source_positions], target_row_columns
+                )
+            }
+        }
+
+    def _compare_rows(self, source_comp, target_comp, source_raw, target_raw) -> dict:
+        # Key-based comparison with duplicate counts, as a vectorized multiset diff over row hashes
+        diff = Hash_Compare_Engine(
+            Hash_Compare_Engine.hash_columns(source_comp, self.compare_columns_source),
+            Hash_Compare_Engine.hash_columns(target_comp, self.compare_columns_target)
+        ).compare()
+
+        return self._rows_outcome(
+            diff["matched_rows"], diff["not_in_target"], diff["not_in_source"],
+            source_raw, target_raw
+        )
 
-        return indexes
+    def _rows_outcome(self, matched_rows, not_in_target, not_in_source, source_raw, target_raw) -> dict:
+        """
+        Report part of a whole-row compare; not_in_target/not_in_source select rows of the frames.
+        """
+        not_in_target_keys = self._key_values(source_raw.loc[not_in_target], self.compare_columns_source)
+        not_in_source_keys = self._key_values(target_raw.loc[not_in_source], self.compare_columns_target)
+
+        return {
+            "matched_rows": matched_rows,
+            "failed_rows": len(not_in_target_keys) + len(not_in_source_keys),
+            "not_in_target_count": len(not_in_target_keys),
+            "not_in_source_count": len(not_in_source_keys),
+            "column_mismatch_counts": {},
+            "failed_rows_indexes": {
+                "mismatched_rows": [],
+                "not_in_target": not_in_target_keys,
+                "not_in_source": not_in_source_keys
+            },
+            "failed_rows_details": {
+                "mismatched_rows_source": [],
+                "mismatched_rows_target": [],
+                "not_in_target_rows": self._display_records(
+                    source_raw.loc[not_in_target], self.compare_columns_source
+                ),
+                "not_in_source_rows": self._display_records(
+                    target_raw.loc[not_in_source], self.compare_columns_target
+                )
+            }
+        }
+
+    def _build_report(self, outcome: dict) -> dict:
+        return {
+            "Connection": {
+                "source": {
+                    "conn": "source",
+                    "conn_params": self.test_params.get("source_conn_params", {}),
+                    "conn_type": self.test_params.get("source_conn_type", "file_upload"),
+                    "headers": list(self.source_df.columns)
+                },
+                "target": {
+                    "conn": "target",
+                    "conn_params": self.test_params.get("target_conn_params", {}),
+                    "conn_type": self.test_params.get("target_conn_type", "file_upload"),
+                    "headers": list(self.target_df.columns)
+                }
+            },
+            "Test": {
+                "logged_in_user_id": self.user_id,
+                "operation": "compare_data",
+                "test_params": {
+                    "compare_columns_source": self.compare_columns_source,
+                    "compare_columns_target": self.compare_columns_target,
+                    "ignore_case": self.ignore_case,
+                    "ignore_spaces": self.ignore_spaces,
+                    "on_index": self.on_index,
+                    "key_columns": self.key_columns,
+                    "value_columns": self.value_columns,
+                    "to_lower_case": self.to_lower_case,
+                    "compare_mode": self.compare_mode
+                },
+                "test_type": "compare"
+            },
+            "failed_rows_details": outcome["failed_rows_details"],
+            "result_metadata": {
+                "blank_rows_source": int(self.blank_rows_source),
+                "blank_rows_target": int(self.blank_rows_target),
+                "status": outcome["failed_rows"] == 0,
+                "matched_rows": outcome["matched_rows"],
+                "failed_rows": outcome["failed_rows"],
+                "failed_rows_indexes": outcome["failed_rows_indexes"],
+                "column_mismatch_counts": outcome["column_mismatch_counts"],
+                "source": {
+                    "rows": self.source_df.shape[0],
+                    "columns": len(self.compare_columns_source),
+                    "not_in_target": outcome["not_in_target_count"]
+                },
+                "target": {
+                    "rows": self.target_df.shape[0],
+                    "columns": len(self.compare_columns_target),
+                    "not_in_source": outcome["not_in_source_count"]
+                }
+            },
+            "type_of_test": "compare"
+        }
 
     def perform_test(self):
         try:
@@ -107,158 +400,27 @@ class Data_Comparison:
             assert len(self.compare_columns_source) == len(self.compare_columns_target), \
                 "compare_columns_source and compare_columns_target must have the same length"
 
-            # Preprocess for comparison
-            source_comp = self.preprocess_df(self.source_df, self.compare_columns_source, for_output=False)
-            target_comp = self.preprocess_df(self.target_df, self.compare_columns_target, for_output=False)
+            if self.key_columns:
+                target_column_for = self._target_column_for()
+                unknown_columns = [c for c in self.key_columns + self.value_columns if c not in target_column_for]
+                assert not unknown_columns, \
+                    f"key_columns/value_columns must be part of compare_columns_source: {unknown_columns}"
 
-            # Preprocess for output display
-            source_out = self.preprocess_df(self.source_df, self.compare_columns_source, for_output=True)
-            target_out = self.preprocess_df(self.target_df, self.compare_columns_target, for_output=True)
+            if self.compare_mode == "fingerprint":
+                return self._build_report(Fingerprint_Compare(self).compare())
 
-            if self.on_index:
-                # Index-based comparison
-                source_indexes = set(source_comp.index)
-                target_indexes = set(target_comp.index)
-                not_in_target_indexes = list(source_indexes - target_indexes)
-                not_in_source_indexes = list(target_indexes - source_indexes)
-                common_indexes = list(source_indexes & target_indexes)
-
-                mismatch_indexes = []
-                for idx in common_indexes:
-                    src_row = source_comp.loc[idx, self.compare_columns_source]
-                    tgt_row = target_comp.loc[idx, self.compare_columns_target]
-                    if isinstance(src_row, pd.Series) and isinstance(tgt_row, pd.Series):
-                        if not src_row.equals(tgt_row):
-                            mismatch_indexes.append(idx)
-                    elif src_row != tgt_row:
-                        mismatch_indexes.append(idx)
-
-                matched_rows = len(common_indexes) - len(mismatch_indexes)
-                failed_rows = len(mismatch_indexes) + len(not_in_target_indexes) + len(not_in_source_indexes)
-
-                failed_rows_indexes = {
-                    "mismatched_rows": mismatch_indexes,
-                    "not_in_target": not_in_target_indexes,
-                    "not_in_source": not_in_source_indexes
-                }
-
-                failed_rows_details = {
-                    "mismatched_rows_source": self.to_native_python(
-                        source_out.loc[mismatch_indexes, self.compare_columns_source]
-                    ).to_dict(orient="records"),
-                    "mismatched_rows_target": self.to_native_python(
-                        target_out.loc[mismatch_indexes, self.compare_columns_target]
-                    ).to_dict(orient="records"),
-                    "not_in_target_rows": self.to_native_python(
-                        source_out.loc[not_in_target_indexes, self.compare_columns_source]
-                    ).to_dict(orient="records"),
-                    "not_in_source_rows": self.to_native_python(
-                        target_out.loc[not_in_source_indexes, self.compare_columns_target]
-                    ).to_dict(orient="records")
-                }
+            # Comparison form, built once; display values are derived from the raw frames for reported rows only
+            source_comp = self.comparison_df(self.source_df, self.compare_columns_source, "source")
+            target_comp = self.comparison_df(self.target_df, self.compare_columns_target, "target")
 
+            if self.on_index:
+                outcome = self._compare_on_index(source_comp, target_comp, self.source_df, self.target_df)
+            elif self.key_columns:
+                outcome = self._compare_key_value(source_comp, target_comp, self.source_df, self.target_df)
             else:
-                # Key-based comparison with duplicate counts
-                source_tuples = source_comp[self.compare_columns_source].apply(tuple, axis=1)
-                target_tuples = target_comp[self.compare_columns_target].apply(tuple, axis=1)
-
-                source_counts = source_tuples.value_counts()
-                target_counts = target_tuples.value_counts()
-
-                all_keys = set(source_counts.index).union(set(target_counts.index))
-
-                matched_rows = 0
-                not_in_target_keys = []
-                not_in_source_keys = []
-
-                for key in all_keys:
-                    src_count = source_counts.get(key, 0)
-                    tgt_count = target_counts.get(key, 0)
-
-                    matched = min(src_count, tgt_count)
-                    matched_rows += matched
-
-                    if src_count > tgt_count:
-                        diff = src_count - tgt_count
-                        not_in_target_keys.extend([key] * diff)
-
-                    if tgt_count > src_count:
-                        diff = tgt_count - src_count
-                        not_in_source_keys.extend([key] * diff)
+                outcome = self._compare_rows(source_comp, target_comp, self.source_df, self.target_df)
 
-                failed_rows = len(not_in_target_keys) + len(not_in_source_keys)
-
-                not_in_target_indexes = self.get_excess_rows(source_out, self.compare_columns_source, not_in_target_keys)
-                not_in_source_indexes = self.get_excess_rows(target_out, self.compare_columns_target, not_in_source_keys)
-
-                failed_rows_indexes = {
-                    "mismatched_rows": [],
-                    "not_in_target": [list(k) if isinstance(k, tuple) else [k] for k in not_in_target_keys],
-                    "not_in_source": [list(k) if isinstance(k, tuple) else [k] for k in not_in_source_keys]
-                }
-
-                failed_rows_details = {
-                    "mismatched_rows_source": [],
-                    "mismatched_rows_target": [],
-                    "not_in_target_rows": self.to_native_python(
-                        source_out.loc[not_in_target_indexes, self.compare_columns_source]
-                    ).to_dict(orient="records"),
-                    "not_in_source_rows": self.to_native_python(
-                        target_out.loc[not_in_source_indexes, self.compare_columns_target]
-                    ).to_dict(orient="records")
-                }
-
-            status = (failed_rows == 0)
-
-            return {
-                "Connection": {
-                    "source": {
-                        "conn": "source",
-                        "conn_params": self.test_params.get("source_conn_params", {}),
-                        "conn_type": self.test_params.get("source_conn_type", "file_upload"),
-                        "headers": list(self.source_df.columns)
-                    },
-                    "target": {
-                        "conn": "target",
-                        "conn_params": self.test_params.get("target_conn_params", {}),
-                        "conn_type": self.test_params.get("target_conn_type", "file_upload"),
-                        "headers": list(self.target_df.columns)
-                    }
-                },
-                "Test": {
-                    "logged_in_user_id": self.user_id,
-                    "operation": "compare_data",
-                    "test_params": {
-                        "compare_columns_source": self.compare_columns_source,
-                        "compare_columns_target": self.compare_columns_target,
-                        "ignore_case": self.ignore_case,
-                        "ignore_spaces": self.ignore_spaces,
-                        "on_index": self.on_index,
-                        "to_lower_case": self.to_lower_case
-                    },
-                    "test_type": "compare"
-                },
-                "failed_rows_details": failed_rows_details,
-                "result_metadata": {
-                    "blank_rows_source": int(self.blank_rows_source),
-                    "blank_rows_target": int(self.blank_rows_target),
-                    "status": status,
-                    "matched_rows": matched_rows,
-                    "failed_rows": failed_rows,
-                    "failed_rows_indexes": failed_rows_indexes,
-                    "source": {
-                        "rows": self.source_df.shape[0],
-                        "columns": len(self.compare_columns_source),
-                        "not_in_target": len(not_in_target_keys)
-                    },
-                    "target": {
-                        "rows": self.target_df.shape[0],
-                        "columns": len(self.compare_columns_target),
-                        "not_in_source": len(not_in_source_keys)
-                    }
-                },
-                "type_of_test": "compare"
-            }
+            return self._build_report(outcome)
 
         except AssertionError as ae:
             return {"error": f"AssertionError: {ae}"}
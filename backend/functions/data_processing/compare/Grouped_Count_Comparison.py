@@ -0,0 +1,63 @@
+import itertools
+
+import pandas as pd
+
+from functions.data_processing.compare.Aggregate_Comparison import Aggregate_Comparison
+
+
+class Grouped_Count_Comparison(Aggregate_Comparison):
+    """
+    Row counts per group of `group_by` columns, to locate which partitions (day,
+    region, ...) are off before any row level compare.
+
+    A side is a DataFrame, a pushdown source dict (one GROUP BY query on the
+    server) or an iterable of DataFrame chunks, whose group counts are summed chunk
+    by chunk so files are counted with flat memory. Group values are normalized like
+    compare keys and blank rows are not counted.
+    """
+
+    def __init__(self, source, target, test_params=None, user_id: int = 0):
+        super().__init__(source, target, test_params, user_id)
+        assert self.group_by, "group_by is required for a grouped count"
+        self._stream_headers = {}
+
+    def _measure_columns(self, side: str) -> list:
+        return []
+
+    def _prepare_side(self, side):
+        if self._is_pushdown(side) or isinstance(side, pd.DataFrame):
+            return super()._prepare_side(side)
+        chunks = iter(side)
+        first = next(chunks, None)
+        if first is None:
+            return pd.DataFrame()
+        stream = itertools.chain([first], chunks)
+        self._stream_headers[id(stream)] = list(first.columns)
+        return stream
+
+    def _headers(self, side) -> list:
+        if id(side) in self._stream_headers:
+            return self._stream_headers[id(side)]
+        return super()._headers(side)
+
+    def _aggregate(self, side, name: str) -> dict:
+        if id(side) not in self._stream_headers:
+            return super()._aggregate(side, name)
+        counts = {}
+        for chunk in side:
+            for key, group in self._aggregate_frame(chunk, name).items():
+                counts[key] = counts.get(key, 0) + group["rows"]
+        return {key: {"rows": rows, "metrics": []} for key, rows in counts.items()}
+
+    def perform_test(self) -> dict:
+        report = super().perform_test()
+        if "error" in report:
+            return report
+        metadata = report["result_metadata"]
+        for group in metadata["mismatched_groups"]:
+            # The only metric is the row count, already in "rows"
+            group.pop("mismatches", None)
+            group["difference"] = (group["rows"]["source"] or 0) - (group["rows"]["target"] or 0)
+        metadata.pop("aggregate_columns_source")
+        metadata.pop("aggregate_columns_target")
+        return report
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+
+class Hash_Compare_Engine:
+    """
+    Vectorized multiset diff between two row sets.
+
+    Every row is reduced to a 64-bit code hashed over its normalized key columns.
+    Codes from both sides are factorized into one shared group space, and the
+    diff is computed from per-group sizes and the running occurrence number of
+    each row inside its group, so no Python loop ever touches individual keys.
+    """
+
+    def __init__(self, source_codes, target_codes):
+        self.source_codes = np.asarray(source_codes, dtype=np.uint64)
+        self.target_codes = np.asarray(target_codes, dtype=np.uint64)
+
+    @staticmethod
+    def hash_columns(df: pd.DataFrame, columns) -> np.ndarray:
+        """
+        Hash the given columns of every row into a single uint64 code.
+        Column names are not part of the hash, so source and target columns
+        holding the same normalized values produce the same codes.
+        """
+        if len(columns) == 0:
+            return np.zeros(len(df), dtype=np.uint64)
+        return pd.util.hash_pandas_object(df[list(columns)], index=False).to_numpy(dtype=np.uint64)
+
+    @staticmethod
+    def _occurrences(group_ids: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+        # 0-based position of every row among the rows of its group, in row order
+        order = np.argsort(group_ids, kind="stable")
+        starts = np.cumsum(sizes) - sizes
+        occurrence = np.empty(len(group_ids), dtype=np.int64)
+        occurrence[order] = np.arange(len(group_ids), dtype=np.int64) - np.repeat(starts, sizes)
+        return occurrence
+
+    def compare(self) -> dict:
+        """
+        Returns the matched row count and boolean masks (positional) of the
+        excess rows on each side. As with the original key counting, when a key
+        occurs more often on one side the first surplus occurrences are reported.
+        """
+        source_len = len(self.source_codes)
+        group_ids, uniques = pd.factorize(np.concatenate([self.source_codes, self.target_codes]))
+        source_ids = group_ids[:source_len]
+        target_ids = group_ids[source_len:]
+
+        source_sizes = np.bincount(source_ids, minlength=len(uniques))
+        target_sizes = np.bincount(target_ids, minlength=len(uniques))
+
+        source_excess = np.clip(source_sizes - target_sizes, 0, None)
+        target_excess = np.clip(target_sizes - source_sizes, 0, None)
+
+        not_in_target = self._occurrences(source_ids, source_sizes) < source_excess[source_ids]
+        not_in_source = self._occurrences(target_ids, target_sizes) < target_excess[target_ids]
+
+        return {
+            "matched_rows": int(np.minimum(source_sizes, target_sizes).sum()),
+            "not_in_target": not_in_target,
+            "not_in_source": not_in_source
+        }
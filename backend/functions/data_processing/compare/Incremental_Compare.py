@@ -0,0 +1,285 @@
+import os
+import re
+import sqlite3
+import time
+import traceback
+
+import numpy as np
+import pandas as pd
+
+from functions.data_processing.compare.Data_Comparison import Data_Comparison
+from functions.data_processing.compare.Row_Fingerprint import Fingerprint_Compare
+
+
+class Fingerprint_Store:
+    """
+    SQLite file holding the latest per-key row fingerprints of every dataset
+    (connection + table) seen by incremental compares, plus the batches applied.
+    Hashes are stored as signed 64-bit integers.
+    """
+
+    KEY_SEPARATOR = "\x1f"
+    # Server side config: requests only pick a store name inside STORE_DIR
+    STORE_DIR = "resources"
+    DEFAULT_NAME = "fingerprint_store"
+    _NAME = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+    @classmethod
+    def path_for(cls, name: str) -> str:
+        assert cls._NAME.match(str(name or "")), \
+            f"Invalid fingerprint_store name: {name} (letters, digits, '_' and '-' only)"
+        return os.path.join(cls.STORE_DIR, f"{name}.sqlite")
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=60)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS fingerprints (
+                dataset TEXT NOT NULL,
+                key_hash INTEGER NOT NULL,
+                occurrence INTEGER NOT NULL,
+                fingerprint INTEGER NOT NULL,
+                key_values TEXT,
+                batch_id TEXT,
+                updated_at REAL,
+                PRIMARY KEY (dataset, key_hash, occurrence)
+            );
+            CREATE TABLE IF NOT EXISTS batches (
+                dataset TEXT NOT NULL,
+                batch_id TEXT NOT NULL,
+                applied_at REAL,
+                rows INTEGER,
+                PRIMARY KEY (dataset, batch_id)
+            );
+        """)
+
+    def upsert(self, dataset: str, batch_id: str, digests: pd.DataFrame, key_values: pd.Series):
+        """
+        Apply one batch: `digests` has key, occurrence and value (fingerprint) columns,
+        `key_values` the display form of each row's key.
+        """
+        now = time.time()
+        rows = zip(
+            [dataset] * len(digests),
+            digests["key"].to_numpy(dtype=np.uint64).view(np.int64).tolist(),
+            digests["occurrence"].astype(np.int64).tolist(),
+            digests["value"].to_numpy(dtype=np.uint64).view(np.int64).tolist(),
+            key_values.tolist(),
+            [batch_id] * len(digests),
+            [now] * len(digests)
+        )
+        with self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self.connection.execute(
+                "INSERT OR REPLACE INTO batches VALUES (?, ?, ?, ?)", (dataset, batch_id, now, len(digests))
+            )
+
+    def lookup(self, dataset: str, keys: pd.DataFrame) -> pd.DataFrame:
+        """
+        Stored state of the given (key, occurrence) pairs; pairs without state are left out.
+        """
+        with self.connection:
+            self.connection.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS lookup_keys (key_hash INTEGER, occurrence INTEGER)"
+            )
+            self.connection.execute("DELETE FROM lookup_keys")
+            self.connection.executemany("INSERT INTO lookup_keys VALUES (?, ?)", zip(
+                keys["key"].to_numpy(dtype=np.uint64).view(np.int64).tolist(),
+                keys["occurrence"].astype(np.int64).tolist()
+            ))
+            state = pd.read_sql_query(
+                "SELECT f.key_hash, f.occurrence, f.fingerprint, f.key_values, f.batch_id "
+                "FROM lookup_keys k JOIN fingerprints f "
+                "ON f.dataset = ? AND f.key_hash = k.key_hash AND f.occurrence = k.occurrence",
+                self.connection,
+                params=(dataset,)
+            )
+        state["key"] = state.pop("key_hash").to_numpy(dtype=np.int64).view(np.uint64)
+        state["fingerprint"] = state["fingerprint"].to_numpy(dtype=np.int64).view(np.uint64)
+        return state
+
+    def size(self, dataset: str) -> int:
+        return self.connection.execute(
+            "SELECT COUNT(*) FROM fingerprints WHERE dataset = ?", (dataset,)
+        ).fetchone()[0]
+
+    def evict(self, dataset: str, keep_batches=None, max_age_days=None) -> int:
+        """
+        Drop fingerprints written by batches older than the newest `keep_batches`
+        batches or older than `max_age_days`. Returns the number of rows removed.
+        """
+        removed = 0
+        with self.connection:
+            if keep_batches:
+                removed += self.connection.execute("""
+                    DELETE FROM fingerprints WHERE dataset = ? AND batch_id NOT IN (
+                        SELECT batch_id FROM batches WHERE dataset = ? ORDER BY applied_at DESC LIMIT ?
+                    )""", (dataset, dataset, int(keep_batches))).rowcount
+                self.connection.execute("""
+                    DELETE FROM batches WHERE dataset = ? AND batch_id NOT IN (
+                        SELECT batch_id FROM batches WHERE dataset = ? ORDER BY applied_at DESC LIMIT ?
+                    )""", (dataset, dataset, int(keep_batches)))
+            if max_age_days:
+                cutoff = time.time() - float(max_age_days) * 86400
+                removed += self.connection.execute(
+                    "DELETE FROM fingerprints WHERE dataset = ? AND updated_at < ?", (dataset, cutoff)
+                ).rowcount
+                self.connection.execute("DELETE FROM batches WHERE dataset = ? AND applied_at < ?", (dataset, cutoff))
+        return removed
+
+    def compact(self):
+        """Reclaim the space of evicted and overwritten rows."""
+        self.connection.execute("VACUUM")
+
+    def close(self):
+        self.connection.close()
+
+
+class Incremental_Compare(Data_Comparison):
+    """
+    Incremental key + value compare of one load batch.
+
+    Per-key fingerprints of both datasets are kept in a Fingerprint_Store between
+    runs. A run applies the current source and target batches to their stored
+    state and re-checks only the keys those batches touched, each against the
+    other side's latest state; the rest of the history is never re-extracted.
+    Failing keys whose counterpart is part of the current batches are drilled
+    down with the regular compare, keys that only differ from the stored state
+    are listed under history_mismatches.
+    """
+
+    # Stored fingerprints must not depend on the dtypes a particular batch happened to load with
+    _NATIVE_KINDS = False
+
+    def __init__(self, source_df, target_df, test_params=None, user_id: int = 0,
+                 source_dataset: str = "source", target_dataset: str = "target", batch_id=None):
+        super().__init__(source_df, target_df, test_params, user_id)
+        self.source_dataset = source_dataset
+        self.target_dataset = target_dataset
+        self.batch_id = str(self.test_params.get("batch_id") or batch_id or int(time.time()))
+        self.store_name = self.test_params.get("fingerprint_store", Fingerprint_Store.DEFAULT_NAME)
+        self.keep_batches = self.test_params.get("store_keep_batches")
+        self.max_age_days = self.test_params.get("store_max_age_days")
+        self.compact_store = self.test_params.get("store_compact", False)
+
+    def _stored_key_values(self, df, key_columns) -> pd.Series:
+        """Key values joined into the one text key Fingerprint_Store keeps per row."""
+        keys = self.preprocess_df(df[key_columns], key_columns, for_output=True)
+        joined = keys[key_columns[0]]
+        if len(key_columns) > 1:
+            joined = joined.str.cat([keys[col] for col in key_columns[1:]], sep=Fingerprint_Store.KEY_SEPARATOR)
+        return joined.reset_index(drop=True)
+
+    def _history_mismatches(self, joined: pd.DataFrame, history: np.ndarray) -> list:
+        rows = joined.loc[history]
+        return [
+            {
+                "key": key_values.split(Fingerprint_Store.KEY_SEPARATOR),
+                "batch_side": batch_side,
+                "stored_batch_id": stored_batch_id
+            }
+            for key_values, batch_side, stored_batch_id in zip(
+                rows["key_values"], rows["batch_side"], rows["stored_batch_id"]
+            )
+        ]
+
+    def _compare_incremental(self, store: Fingerprint_Store) -> dict:
+        fingerprint = Fingerprint_Compare(self)
+        target_column_for = self._target_column_for()
+        target_key_columns = [target_column_for[col] for col in self.key_columns]
+        target_value_columns = [target_column_for[col] for col in self.value_columns]
+
+        source_digests = fingerprint._keyed_digests(self.source_df, self.key_columns, self.value_columns, "source")
+        target_digests = fingerprint._keyed_digests(self.target_df, target_key_columns, target_value_columns, "target")
+        store.upsert(self.source_dataset, self.batch_id, source_digests,
+                     self._stored_key_values(self.source_df, self.key_columns))
+        store.upsert(self.target_dataset, self.batch_id, target_digests,
+                     self._stored_key_values(self.target_df, target_key_columns))
+
+        # Keys touched by this batch on either side, with each side's latest state
+        touched = pd.concat([source_digests[["key", "occurrence"]], target_digests[["key", "occurrence"]]])
+        touched = touched.drop_duplicates(ignore_index=True)
+        source_state = store.lookup(self.source_dataset, touched)
+        target_state = store.lookup(self.target_dataset, touched)
+        joined = pd.merge(source_state, target_state, on=["key", "occurrence"], how="outer",
+                          suffixes=("_source", "_target"), indicator=True)
+        joined = joined.merge(source_digests[["key", "occurrence", "position"]], on=["key", "occurrence"], how="left")
+        joined = joined.merge(target_digests[["key", "occurrence", "position"]], on=["key", "occurrence"], how="left",
+                              suffixes=("_source", "_target"))
+
+        both = joined["_merge"].to_numpy() == "both"
+        source_only = joined["_merge"].to_numpy() == "left_only"
+        target_only = joined["_merge"].to_numpy() == "right_only"
+        changed = both & (joined["fingerprint_source"].to_numpy() != joined["fingerprint_target"].to_numpy())
+        in_source_batch = joined["position_source"].notna().to_numpy()
+        in_target_batch = joined["position_target"].notna().to_numpy()
+
+        # A changed key is only drilled down when both rows are in this batch
+        history = changed & ~(in_source_batch & in_target_batch)
+        drill_source = (changed & ~history | source_only) & in_source_batch
+        drill_target = (changed & ~history | target_only) & in_target_batch
+
+        source_rows = self.key_columns + self.value_columns
+        target_rows = target_key_columns + target_value_columns
+        outcome = fingerprint._drill_down(
+            self._compare_key_value,
+            self.source_df.iloc[np.sort(joined.loc[drill_source, "position_source"].to_numpy(dtype=np.int64))][source_rows],
+            self.target_df.iloc[np.sort(joined.loc[drill_target, "position_target"].to_numpy(dtype=np.int64))][target_rows],
+            source_rows, target_rows
+        )
+
+        joined["key_values"] = joined["key_values_source"].fillna(joined["key_values_target"])
+        joined["batch_side"] = np.where(in_source_batch, "source", "target")
+        joined["stored_batch_id"] = np.where(in_source_batch, joined["batch_id_target"], joined["batch_id_source"])
+        outcome["matched_rows"] = int(both.sum() - changed.sum())
+        outcome["failed_rows"] += int(history.sum())
+        outcome["failed_rows_details"]["history_mismatches"] = self._history_mismatches(joined, history)
+        return outcome
+
+    def perform_test(self):
+        try:
+            missing_in_source = [c for c in self.compare_columns_source if c not in self.source_df.columns]
+            missing_in_target = [c for c in self.compare_columns_target if c not in self.target_df.columns]
+            assert not missing_in_source, f"Missing columns in source dataframe: {missing_in_source}"
+            assert not missing_in_target, f"Missing columns in target dataframe: {missing_in_target}"
+            assert len(self.compare_columns_source) == len(self.compare_columns_target), \
+                "compare_columns_source and compare_columns_target must have the same length"
+            assert self.key_columns, "key_columns are required in incremental compare mode"
+            unknown_columns = [c for c in self.key_columns + self.value_columns if c not in self._target_column_for()]
+            assert not unknown_columns, \
+                f"key_columns/value_columns must be part of compare_columns_source: {unknown_columns}"
+
+            store = Fingerprint_Store(Fingerprint_Store.path_for(self.store_name))
+            try:
+                outcome = self._compare_incremental(store)
+                evicted = 0
+                for dataset in (self.source_dataset, self.target_dataset):
+                    evicted += store.evict(dataset, self.keep_batches, self.max_age_days)
+                if self.compact_store:
+                    store.compact()
+                summary = {
+                    "batch_id": self.batch_id,
+                    "source_dataset": self.source_dataset,
+                    "target_dataset": self.target_dataset,
+                    "source_keys_stored": store.size(self.source_dataset),
+                    "target_keys_stored": store.size(self.target_dataset),
+                    "evicted_rows": evicted
+                }
+            finally:
+                store.close()
+
+            report = self._build_report(outcome)
+            report["Test"]["test_params"].update({
+                "batch_id": self.batch_id,
+                "store_keep_batches": self.keep_batches,
+                "store_max_age_days": self.max_age_days
+            })
+            report["result_metadata"]["store_summary"] = summary
+            return report
+
+        except AssertionError as ae:
+            return {"error": f"AssertionError: {ae}"}
+        except Exception as e:
+            return {"error": str(e), "traceback": traceback.format_exc()}
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+
+class Index_Compare_Engine:
+    """
+    Column-wise comparison of two frames aligned on their row index.
+
+    Rows present on both sides are compared one whole column pair at a time,
+    building a boolean cell-mismatch matrix from which the row mismatch mask,
+    per-column mismatch counts and the first differing column per row are read.
+    """
+
+    def __init__(self, source_df: pd.DataFrame, target_df: pd.DataFrame, source_columns, target_columns):
+        if not source_df.index.is_unique or not target_df.index.is_unique:
+            raise ValueError("on_index comparison requires unique row indexes on both source and target")
+
+        self.source_df = source_df
+        self.target_df = target_df
+        self.source_columns = list(source_columns)
+        self.target_columns = list(target_columns)
+
+    def compare(self) -> dict:
+        common_indexes = self.source_df.index.intersection(self.target_df.index, sort=False)
+        not_in_target_indexes = self.source_df.index.difference(self.target_df.index, sort=False)
+        not_in_source_indexes = self.target_df.index.difference(self.source_df.index, sort=False)
+
+        source_aligned = self.source_df.loc[common_indexes, self.source_columns]
+        target_aligned = self.target_df.loc[common_indexes, self.target_columns]
+
+        cell_mismatches = self.cell_mismatches(
+            source_aligned, target_aligned, self.source_columns, self.target_columns
+        )
+        mismatch_mask = cell_mismatches.any(axis=1)
+
+        return {
+            "common_indexes": common_indexes,
+            "not_in_target_indexes": not_in_target_indexes,
+            "not_in_source_indexes": not_in_source_indexes,
+            "mismatch_mask": mismatch_mask,
+            "mismatch_indexes": common_indexes[mismatch_mask],
+            **self.describe_mismatches(cell_mismatches, mismatch_mask, self.source_columns)
+        }
+
+    @staticmethod
+    def cell_mismatches(source_aligned: pd.DataFrame, target_aligned: pd.DataFrame,
+                        source_columns, target_columns) -> np.ndarray:
+        """
+        Boolean (rows x columns) matrix of differing cells between two row-aligned frames.
+        """
+        cell_mismatches = np.zeros((len(source_aligned), len(source_columns)), dtype=bool)
+        for position, (source_col, target_col) in enumerate(zip(source_columns, target_columns)):
+            source_values = source_aligned[source_col].to_numpy()
+            target_values = target_aligned[target_col].to_numpy()
+            if source_values.dtype != target_values.dtype or source_values.dtype == object:
+                source_values = source_values.astype(object)
+                target_values = target_values.astype(object)
+            differ = source_values != target_values
+            if source_values.dtype.kind in "fmM":
+                # Missing on both sides counts as equal, as '' == '' did for strings
+                differ &= ~(pd.isna(source_values) & pd.isna(target_values))
+            cell_mismatches[:, position] = differ
+        return cell_mismatches
+
+    @staticmethod
+    def describe_mismatches(cell_mismatches: np.ndarray, mismatch_mask: np.ndarray, columns) -> dict:
+        """
+        Per-column mismatch counts plus first/all differing columns of every mismatched row.
+        """
+        mismatched_cells = cell_mismatches[mismatch_mask]
+        column_names = np.asarray(columns, dtype=object)
+        return {
+            "column_mismatch_counts": {
+                col: int(count) for col, count in zip(columns, cell_mismatches.sum(axis=0))
+            },
+            "first_mismatch_column": column_names[mismatched_cells.argmax(axis=1)].tolist(),
+            "mismatched_columns": [column_names[row].tolist() for row in mismatched_cells]
+        }
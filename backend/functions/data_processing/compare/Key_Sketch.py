@@ -0,0 +1,115 @@
+import math
+
+import numpy as np
+
+
+def _mix(codes: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer: a second, independent looking 64-bit hash of the codes."""
+    with np.errstate(over="ignore"):
+        z = codes + np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return z ^ (z >> np.uint64(31))
+
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    length = np.zeros(len(values), dtype=np.int64)
+    values = values.copy()
+    for shift in (32, 16, 8, 4, 2, 1):
+        big = values >= (np.uint64(1) << np.uint64(shift))
+        length[big] += shift
+        values[big] >>= np.uint64(shift)
+    return length + (values > 0)
+
+
+class Bloom_Filter:
+    """
+    Bloom filter over 64-bit key hashes (see Hash_Compare_Engine.hash_columns).
+
+    Sized for `expected_keys` at `false_positive_rate`; the k bit positions of a key
+    come from double hashing the code with its splitmix64 mix. A key that is not in
+    the filter was certainly never added.
+    """
+
+    def __init__(self, expected_keys: int, false_positive_rate: float = 0.01):
+        expected_keys = max(int(expected_keys), 1)
+        self.num_bits = max(int(math.ceil(-expected_keys * math.log(false_positive_rate) / math.log(2) ** 2)), 64)
+        self.num_hashes = max(int(round(self.num_bits / expected_keys * math.log(2))), 1)
+        self.bits = np.zeros((self.num_bits + 7) // 8, dtype=np.uint8)
+        self.added = 0
+
+    def _positions(self, codes: np.ndarray):
+        step = _mix(codes) | np.uint64(1)
+        size = np.uint64(self.num_bits)
+        with np.errstate(over="ignore"):
+            for i in range(self.num_hashes):
+                yield (codes + np.uint64(i) * step) % size
+
+    def add(self, codes: np.ndarray):
+        for positions in self._positions(codes):
+            np.bitwise_or.at(self.bits, positions >> np.uint64(3),
+                             np.left_shift(1, positions & np.uint64(7)).astype(np.uint8))
+        self.added += len(codes)
+
+    def contains(self, codes: np.ndarray) -> np.ndarray:
+        found = np.ones(len(codes), dtype=bool)
+        for positions in self._positions(codes):
+            found &= ((self.bits[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype(np.uint8)) & 1) == 1
+        return found
+
+    def false_positive_rate(self) -> float:
+        """Expected false positive rate for the number of keys actually added."""
+        return (1 - math.exp(-self.num_hashes * self.added / self.num_bits)) ** self.num_hashes
+
+    def size_bytes(self) -> int:
+        return int(self.bits.nbytes)
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct count estimate over 64-bit key hashes, with 2**precision
+    registers (standard error about 1.04 / sqrt(2**precision)).
+    """
+
+    def __init__(self, precision: int = 14):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add(self, codes: np.ndarray):
+        hashed = _mix(codes)
+        index = (hashed >> np.uint64(64 - self.precision)).astype(np.int64)
+        rest = hashed & np.uint64((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - _bit_length(rest) + 1
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    def count(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+class Key_Multiset_Checksum:
+    """
+    Order independent checksum of a multiset of 64-bit key hashes: row count plus
+    two wrapping sums of mixed hashes. Two sides holding the same keys the same
+    number of times always agree; differing multiplicities disagree unless the
+    sums collide.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.sums = [np.uint64(0), np.uint64(0)]
+
+    def add(self, codes: np.ndarray):
+        mixed = _mix(codes)
+        with np.errstate(over="ignore"):
+            self.sums[0] += np.sum(mixed, dtype=np.uint64)
+            self.sums[1] += np.sum(_mix(mixed ^ np.uint64(0x5851F42D4C957F2D)), dtype=np.uint64)
+        self.rows += len(codes)
+
+    def matches(self, other: "Key_Multiset_Checksum") -> bool:
+        return self.rows == other.rows and self.sums == other.sums
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+from functions.data_processing.compare.Hash_Compare_Engine import Hash_Compare_Engine
+from functions.data_processing.compare.Index_Compare_Engine import Index_Compare_Engine
+
+
+class Key_Value_Compare_Engine:
+    """
+    Single-pass key + value comparison.
+
+    Rows are joined on a 64-bit hash of their key columns with one vectorized
+    outer merge (repeated keys are paired in order of occurrence), and the value
+    columns of joined rows are then compared column by column. Every row ends up
+    as matched, changed, missing in target or missing in source.
+    """
+
+    def __init__(self, source_df: pd.DataFrame, target_df: pd.DataFrame,
+                 source_key_columns, target_key_columns,
+                 source_value_columns, target_value_columns):
+        self.source_df = source_df
+        self.target_df = target_df
+        self.source_key_columns = list(source_key_columns)
+        self.target_key_columns = list(target_key_columns)
+        self.source_value_columns = list(source_value_columns)
+        self.target_value_columns = list(target_value_columns)
+
+    @staticmethod
+    def _keyed_positions(df: pd.DataFrame, key_columns) -> pd.DataFrame:
+        codes = Hash_Compare_Engine.hash_columns(df, key_columns)
+        return pd.DataFrame({
+            "key": codes,
+            "occurrence": pd.Series(codes).groupby(codes).cumcount().to_numpy(),
+            "position": np.arange(len(df), dtype=np.int64)
+        })
+
+    def compare(self) -> dict:
+        """
+        Returns positional row arrays for each class; source and target positions
+        of changed rows are aligned element by element.
+        """
+        joined = pd.merge(
+            self._keyed_positions(self.source_df, self.source_key_columns),
+            self._keyed_positions(self.target_df, self.target_key_columns),
+            on=["key", "occurrence"],
+            how="outer",
+            suffixes=("_source", "_target"),
+            indicator=True
+        )
+
+        both = joined["_merge"].to_numpy() == "both"
+        source_positions = joined.loc[both, "position_source"].to_numpy(dtype=np.int64)
+        target_positions = joined.loc[both, "position_target"].to_numpy(dtype=np.int64)
+        # Report changed rows in source row order rather than in hash order
+        order = np.argsort(source_positions, kind="stable")
+        source_positions = source_positions[order]
+        target_positions = target_positions[order]
+
+        cell_mismatches = Index_Compare_Engine.cell_mismatches(
+            self.source_df.iloc[source_positions],
+            self.target_df.iloc[target_positions],
+            self.source_value_columns,
+            self.target_value_columns
+        )
+        changed_mask = cell_mismatches.any(axis=1)
+
+        return {
+            "matched_rows": int((~changed_mask).sum()),
+            "changed_source_positions": source_positions[changed_mask],
+            "changed_target_positions": target_positions[changed_mask],
+            "not_in_target_positions": np.sort(
+                joined.loc[joined["_merge"] == "left_only", "position_source"].to_numpy(dtype=np.int64)
+            ),
+            "not_in_source_positions": np.sort(
+                joined.loc[joined["_merge"] == "right_only", "position_target"].to_numpy(dtype=np.int64)
+            ),
+            **Index_Compare_Engine.describe_mismatches(cell_mismatches, changed_mask, self.source_value_columns)
+        }
@@ -0,0 +1,125 @@
+import os
+import pickle
+import shutil
+import tempfile
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+from functions.data_processing.compare.Partitioned_Compare import Partitioned_Compare, Partition_Spill
+
+
+def _spill_chunk_task(params: dict, user_id: int, work_dir: str, side: str, chunk_no: int, offset: int) -> dict:
+    """
+    Worker: normalize, hash and partition one raw chunk into its own spill files.
+    """
+    raw_path = os.path.join(work_dir, f"raw_{side}_{chunk_no}.pkl")
+    with open(raw_path, "rb") as f:
+        chunk = pickle.load(f)
+    os.remove(raw_path)
+
+    helper = Partitioned_Compare(None, None, params, user_id)
+    spill = Partition_Spill(work_dir, f"{side}_{chunk_no}", helper.num_partitions)
+    return helper._spill_chunk(chunk, offset, spill, side)
+
+
+def _compare_partition_task(params: dict, user_id: int, work_dir: str, chunk_counts: dict, partition: int) -> list:
+    """
+    Worker: gather one partition from every chunk spill and compare it.
+    Pickle streams are self-delimiting, so per-chunk partition files are simply concatenated.
+    """
+    helper = Partitioned_Compare(None, None, params, user_id)
+    spills = {}
+    for side in ("source", "target"):
+        spill = Partition_Spill(work_dir, side, helper.num_partitions)
+        with open(spill.path(partition), "wb") as out:
+            for chunk_no in range(chunk_counts[side]):
+                chunk_spill = Partition_Spill(work_dir, f"{side}_{chunk_no}", helper.num_partitions)
+                if os.path.exists(chunk_spill.path(partition)):
+                    with open(chunk_spill.path(partition), "rb") as f:
+                        shutil.copyfileobj(f, out)
+                    chunk_spill.remove(partition)
+        spills[side] = spill
+
+    reports = list(helper._compare_partition(spills["source"], spills["target"], partition, 0, work_dir))
+    spills["source"].remove(partition)
+    spills["target"].remove(partition)
+    return reports
+
+
+class Parallel_Compare(Partitioned_Compare):
+    """
+    Multi-core variant of Partitioned_Compare.
+
+    The parent process only streams raw chunks to disk. A process pool then
+    hash-partitions the chunks and afterwards compares the partitions, so
+    normalization, hashing and diffing all scale with the worker count. Chunks and
+    partitions are handed over as pickle files in the work directory (pyarrow is
+    not a dependency, so there is no Arrow IPC or shared memory handoff): the pool
+    itself only carries file names and the partial reports, but every row is still
+    pickled to disk and unpickled by a worker, twice.
+    """
+
+    def __init__(self, source_chunks, target_chunks, test_params=None, user_id: int = 0):
+        super().__init__(source_chunks, target_chunks, test_params, user_id)
+        self.workers = int(self.test_params.get("workers") or os.cpu_count() or 1)
+        if "partitions" not in self.test_params:
+            # A few partitions per worker keeps the pool busy when partition sizes are skewed
+            self.num_partitions = self.workers * 4
+
+    def _partition_params(self) -> dict:
+        params = super()._partition_params()
+        params["partitions"] = self.num_partitions
+        return params
+
+    def _submit_chunks(self, pool, chunks, side: str, work_dir: str) -> list:
+        futures = []
+        offset = 0
+        for chunk_no, chunk in enumerate(chunks):
+            with open(os.path.join(work_dir, f"raw_{side}_{chunk_no}.pkl"), "wb") as f:
+                pickle.dump(chunk, f, protocol=pickle.HIGHEST_PROTOCOL)
+            futures.append(pool.submit(
+                _spill_chunk_task, self._partition_params(), self.user_id, work_dir, side, chunk_no, offset
+            ))
+            offset += len(chunk)
+        return futures
+
+    @staticmethod
+    def _sum_stats(futures) -> dict:
+        stats = {"rows": 0, "blank_rows": 0}
+        for future in futures:
+            chunk_stats = future.result()
+            stats["rows"] += chunk_stats["rows"]
+            stats["blank_rows"] += chunk_stats["blank_rows"]
+        return stats
+
+    def perform_test(self):
+        work_dir = tempfile.mkdtemp(prefix="etl_compare_", dir=self.spill_dir)
+        try:
+            source_chunks, target_chunks = self._resolve_compare_columns()
+
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                source_futures = self._submit_chunks(pool, source_chunks, "source", work_dir)
+                target_futures = self._submit_chunks(pool, target_chunks, "target", work_dir)
+                source_stats = self._sum_stats(source_futures)
+                target_stats = self._sum_stats(target_futures)
+
+                chunk_counts = {"source": len(source_futures), "target": len(target_futures)}
+                partition_futures = [
+                    pool.submit(
+                        _compare_partition_task, self._partition_params(), self.user_id,
+                        work_dir, chunk_counts, partition
+                    )
+                    for partition in range(self.num_partitions)
+                ]
+                reports = (report for future in partition_futures for report in future.result())
+
+                template = self._build_template(source_stats, target_stats)
+                template["Test"]["test_params"]["workers"] = self.workers
+                return self.merge_reports(reports, template, self.failed_rows_spill)
+
+        except AssertionError as ae:
+            return {"error": f"AssertionError: {ae}"}
+        except Exception as e:
+            return {"error": str(e), "traceback": traceback.format_exc()}
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
@@ -0,0 +1,351 @@
+import itertools
+import os
+import pickle
+import shutil
+import tempfile
+import traceback
+
+import numpy as np
+import pandas as pd
+
+from functions.data_processing.Dataset_Preparation import Dataset_Preparation
+from functions.data_processing.compare.Data_Comparison import Data_Comparison
+from functions.data_processing.compare.Hash_Compare_Engine import Hash_Compare_Engine
+from functions.data_processing.reporter.Failed_Rows_Spill import Failed_Rows_Spill
+
+
+class Partition_Spill:
+    """
+    Append-only on-disk store of DataFrame pieces split into hash partitions.
+    Each partition is one file holding consecutive pickled (frame, codes) pieces.
+    """
+
+    # Server side config: root of the spill work directories, None for the system temp directory
+    SPILL_ROOT = None
+
+    def __init__(self, directory: str, name: str, num_partitions: int):
+        self.directory = directory
+        self.name = name
+        self.num_partitions = num_partitions
+
+    def path(self, partition: int) -> str:
+        return os.path.join(self.directory, f"{self.name}_{partition}.pkl")
+
+    def add(self, df: pd.DataFrame, codes: np.ndarray, level: int = 0):
+        """
+        Route every row to partition (code // P**level) % P, so a partition can later be
+        split again on the next digit of the same hash without rehashing.
+        """
+        divisor = np.uint64(self.num_partitions) ** np.uint64(level)
+        partitions = (codes // divisor) % np.uint64(self.num_partitions)
+        for partition in np.unique(partitions):
+            mask = partitions == partition
+            with open(self.path(int(partition)), "ab") as f:
+                pickle.dump((df[mask], codes[mask]), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def pieces(self, partition: int):
+        path = self.path(partition)
+        if not os.path.exists(path):
+            return
+        with open(path, "rb") as f:
+            while True:
+                try:
+                    yield pickle.load(f)
+                except EOFError:
+                    return
+
+    def remove(self, partition: int):
+        if os.path.exists(self.path(partition)):
+            os.remove(self.path(partition))
+
+    def size(self, partition: int) -> int:
+        path = self.path(partition)
+        return os.path.getsize(path) if os.path.exists(path) else 0
+
+    def read(self, partition: int, columns) -> pd.DataFrame:
+        frames = [frame for frame, _ in self.pieces(partition)]
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(frames)
+
+
+class Partitioned_Compare(Data_Comparison):
+    """
+    Out-of-core variant of Data_Comparison.
+
+    Source and target are consumed as chunk iterators, blank rows are dropped and
+    counted per chunk, and the remaining rows are hash-partitioned on their
+    normalized compare key into spill files. Partitions are then compared one at a
+    time with Data_Comparison (re-split on the next hash digits while a partition
+    exceeds the memory budget) and the partial reports are merged into the same
+    report shape perform_test returns.
+
+    Only the normalization helpers are inherited from Data_Comparison; neither side
+    ever exists in memory as a whole.
+    """
+
+    # Rough peak memory of comparing a partition relative to its pickled size
+    # (working copy + comparison and display preprocessing copies)
+    _MEMORY_EXPANSION = 6
+    _MAX_SPLIT_DEPTH = 4
+
+    def __init__(self, source_chunks, target_chunks, test_params=None, user_id: int = 0):
+        self.source_chunks = source_chunks
+        self.target_chunks = target_chunks
+        self.test_params = test_params or {}
+        self.user_id = user_id
+
+        self.ignore_case = self.test_params.get("ignore_case", False)
+        self.ignore_spaces = self.test_params.get("ignore_spaces", False)
+        self.to_lower_case = self.test_params.get("to_lower_case", False)
+        self.on_index = self.test_params.get("on_index", False)
+        self.key_columns = self.test_params.get("key_columns", []) or []
+        if isinstance(self.key_columns, str):
+            self.key_columns = [self.key_columns]
+
+        self.num_partitions = int(self.test_params.get("partitions", 16))
+        self.memory_budget = int(self.test_params.get("memory_budget_mb", 512)) * 1024 * 1024
+        self.spill_dir = Partition_Spill.SPILL_ROOT
+        # With spill_failed_rows the failed rows of every partition go straight to disk
+        self.failed_rows_spill = Failed_Rows_Spill.from_params(self.test_params)
+
+        self.compare_columns_source = self.test_params.get("compare_columns_source") or []
+        self.compare_columns_target = self.test_params.get("compare_columns_target") or []
+        self.source_headers = []
+        self.target_headers = []
+
+    def _partition_codes(self, df: pd.DataFrame, columns, target_column_for=None) -> np.ndarray:
+        if self.on_index:
+            return pd.util.hash_array(df.index.to_numpy())
+        hash_columns = list(columns)
+        if self.key_columns:
+            hash_columns = [target_column_for[c] for c in self.key_columns] if target_column_for \
+                else list(self.key_columns)
+        normalized = self.preprocess_df(df[hash_columns], hash_columns, for_output=False)
+        return Hash_Compare_Engine.hash_columns(normalized, hash_columns)
+
+    def _spill_chunk(self, chunk: pd.DataFrame, offset: int, spill: Partition_Spill, side: str) -> dict:
+        """
+        Spill one chunk whose first row sits at global position `offset`; rows keep
+        their global position as index label.
+        """
+        chunk = chunk.copy()
+        chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+
+        blank_mask = Dataset_Preparation.blank_rows_mask(chunk)
+        chunk = chunk.loc[~blank_mask]
+
+        columns = self.compare_columns_source if side == "source" else self.compare_columns_target
+        missing = [c for c in columns if c not in chunk.columns]
+        assert not missing, f"Missing columns in {side} dataframe: {missing}"
+
+        chunk = chunk[columns]
+        target_column_for = dict(zip(self.compare_columns_source, self.compare_columns_target)) \
+            if side == "target" else None
+        spill.add(chunk, self._partition_codes(chunk, columns, target_column_for))
+        return {"rows": len(chunk), "blank_rows": int(blank_mask.sum())}
+
+    def _spill(self, chunks, spill: Partition_Spill, side: str) -> dict:
+        """
+        Stream one side into the spill.
+        """
+        stats = {"rows": 0, "blank_rows": 0}
+        offset = 0
+        for chunk in chunks:
+            chunk_stats = self._spill_chunk(chunk, offset, spill, side)
+            offset += len(chunk)
+            stats["rows"] += chunk_stats["rows"]
+            stats["blank_rows"] += chunk_stats["blank_rows"]
+        return stats
+
+    @staticmethod
+    def _peek(chunks):
+        """
+        Returns the column headers of a chunk stream and the stream with its first chunk put back.
+        """
+        chunks = iter(chunks)
+        first = next(chunks, None)
+        if first is None:
+            return [], iter(())
+        return list(first.columns), itertools.chain([first], chunks)
+
+    @staticmethod
+    def _peek_chunk(chunks):
+        """
+        Returns the first chunk of a non-empty stream and the stream with that chunk put back.
+        """
+        chunks = iter(chunks)
+        first = next(chunks)
+        return first, itertools.chain([first], chunks)
+
+    def _resolve_compare_columns(self):
+        """
+        Peek at both streams to default the compare columns to the common headers.
+        Returns both chunk streams, with their first chunks put back.
+        """
+        self.source_headers, source_chunks = self._peek(self.source_chunks)
+        self.target_headers, target_chunks = self._peek(self.target_chunks)
+        assert self.source_headers, "source_df is empty"
+        assert self.target_headers, "target_df is empty"
+
+        if not self.compare_columns_source or not self.compare_columns_target:
+            common_cols = [c for c in self.source_headers if c in self.target_headers]
+            self.compare_columns_source = common_cols
+            self.compare_columns_target = common_cols
+
+        assert len(self.compare_columns_source) == len(self.compare_columns_target), \
+            "compare_columns_source and compare_columns_target must have the same length"
+        return source_chunks, target_chunks
+
+    def _partition_params(self) -> dict:
+        params = dict(self.test_params)
+        params["compare_columns_source"] = self.compare_columns_source
+        params["compare_columns_target"] = self.compare_columns_target
+        return params
+
+    def _compare_partition(self, source_spill, target_spill, partition, level, work_dir):
+        """
+        Yields one Data_Comparison report per (sub-)partition that fits the memory budget.
+        """
+        estimated = (source_spill.size(partition) + target_spill.size(partition)) * self._MEMORY_EXPANSION
+        if estimated > self.memory_budget and level < self._MAX_SPLIT_DEPTH:
+            sub_dir = tempfile.mkdtemp(prefix=f"p{partition}_", dir=work_dir)
+            sub_source = Partition_Spill(sub_dir, "source", self.num_partitions)
+            sub_target = Partition_Spill(sub_dir, "target", self.num_partitions)
+            for frame, codes in source_spill.pieces(partition):
+                sub_source.add(frame, codes, level=level + 1)
+            for frame, codes in target_spill.pieces(partition):
+                sub_target.add(frame, codes, level=level + 1)
+            source_spill.remove(partition)
+            target_spill.remove(partition)
+            for sub_partition in range(self.num_partitions):
+                yield from self._compare_partition(sub_source, sub_target, sub_partition, level + 1, sub_dir)
+            return
+
+        source_df = source_spill.read(partition, self.compare_columns_source)
+        target_df = target_spill.read(partition, self.compare_columns_target)
+        if source_df.empty and target_df.empty:
+            return
+        yield Data_Comparison(source_df, target_df, self._partition_params(), self.user_id).perform_test()
+
+    @staticmethod
+    def merge_reports(reports, template: dict, failed_rows_spill=None) -> dict:
+        """
+        Fold partial compare reports into one: counts are summed and row lists concatenated,
+        or appended to `failed_rows_spill` as each partial report arrives.
+        """
+        merged = template
+        metadata = merged["result_metadata"]
+        metadata.update({
+            "matched_rows": 0,
+            "failed_rows": 0,
+            "column_mismatch_counts": {},
+            "failed_rows_indexes": {"mismatched_rows": [], "not_in_target": [], "not_in_source": []}
+        })
+        metadata["source"]["not_in_target"] = 0
+        metadata["target"]["not_in_source"] = 0
+        details = {}
+
+        for report in reports:
+            if "error" in report:
+                return report
+            part = report["result_metadata"]
+            metadata["matched_rows"] += part["matched_rows"]
+            metadata["failed_rows"] += part["failed_rows"]
+            metadata["source"]["not_in_target"] += part["source"]["not_in_target"]
+            metadata["target"]["not_in_source"] += part["target"]["not_in_source"]
+            for col, count in part.get("column_mismatch_counts", {}).items():
+                metadata["column_mismatch_counts"][col] = metadata["column_mismatch_counts"].get(col, 0) + count
+            for key, values in part["failed_rows_indexes"].items():
+                metadata["failed_rows_indexes"].setdefault(key, []).extend(values)
+            if failed_rows_spill is not None:
+                failed_rows_spill.add(report["failed_rows_details"])
+                continue
+            for key, values in report["failed_rows_details"].items():
+                details.setdefault(key, []).extend(values)
+
+        metadata["status"] = metadata["failed_rows"] == 0
+        merged["failed_rows_details"] = details or {
+            "mismatched_rows_source": [],
+            "mismatched_rows_target": [],
+            "not_in_target_rows": [],
+            "not_in_source_rows": []
+        }
+        if failed_rows_spill is not None:
+            return failed_rows_spill.finish_report(merged)
+        return merged
+
+    def _build_template(self, source_stats, target_stats) -> dict:
+        return {
+            "Connection": {
+                "source": {
+                    "conn": "source",
+                    "conn_params": self.test_params.get("source_conn_params", {}),
+                    "conn_type": self.test_params.get("source_conn_type", "file_upload"),
+                    "headers": self.source_headers
+                },
+                "target": {
+                    "conn": "target",
+                    "conn_params": self.test_params.get("target_conn_params", {}),
+                    "conn_type": self.test_params.get("target_conn_type", "file_upload"),
+                    "headers": self.target_headers
+                }
+            },
+            "Test": {
+                "logged_in_user_id": self.user_id,
+                "operation": "compare_data",
+                "test_params": {
+                    "compare_columns_source": self.compare_columns_source,
+                    "compare_columns_target": self.compare_columns_target,
+                    "ignore_case": self.ignore_case,
+                    "ignore_spaces": self.ignore_spaces,
+                    "on_index": self.on_index,
+                    "to_lower_case": self.to_lower_case,
+                    "key_columns": self.key_columns,
+                    "compare_mode": self.test_params.get("compare_mode", "partitioned"),
+                    "partitions": self.num_partitions,
+                    "memory_budget_mb": self.memory_budget // (1024 * 1024)
+                },
+                "test_type": "compare"
+            },
+            "failed_rows_details": {},
+            "result_metadata": {
+                "blank_rows_source": source_stats["blank_rows"],
+                "blank_rows_target": target_stats["blank_rows"],
+                "source": {
+                    "rows": source_stats["rows"],
+                    "columns": len(self.compare_columns_source)
+                },
+                "target": {
+                    "rows": target_stats["rows"],
+                    "columns": len(self.compare_columns_target)
+                }
+            },
+            "type_of_test": "compare"
+        }
+
+    def perform_test(self):
+        work_dir = tempfile.mkdtemp(prefix="etl_compare_", dir=self.spill_dir)
+        try:
+            source_spill = Partition_Spill(work_dir, "source", self.num_partitions)
+            target_spill = Partition_Spill(work_dir, "target", self.num_partitions)
+
+            source_chunks, target_chunks = self._resolve_compare_columns()
+
+            source_stats = self._spill(source_chunks, source_spill, "source")
+            target_stats = self._spill(target_chunks, target_spill, "target")
+
+            reports = (
+                report
+                for partition in range(self.num_partitions)
+                for report in self._compare_partition(source_spill, target_spill, partition, 0, work_dir)
+            )
+            return self.merge_reports(reports, self._build_template(source_stats, target_stats),
+                                      self.failed_rows_spill)
+
+        except AssertionError as ae:
+            return {"error": f"AssertionError: {ae}"}
+        except Exception as e:
+            return {"error": str(e), "traceback": traceback.format_exc()}
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
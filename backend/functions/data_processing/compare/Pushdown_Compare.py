@@ -0,0 +1,108 @@
+import pandas as pd
+
+from functions.data_processing.compare.Partitioned_Compare import Partitioned_Compare
+from functions.integrations.SQL_Dialect import SQL_Dialect
+
+
+class Pushdown_Compare(Partitioned_Compare):
+    """
+    Base for compare modes that run their heavy lifting as SQL inside the databases.
+
+    `source` and `target` are dicts with the dialect name, a DB-API connection and
+    the query selecting the dataset (see GetDataFrameFromConnection.get_pushdown_source).
+    Subclasses fetch only the rows that differ, compare those with Data_Comparison
+    and reuse the report template and merging of Partitioned_Compare.
+    """
+
+    compare_mode = None
+
+    def __init__(self, source: dict, target: dict, test_params=None, user_id: int = 0):
+        super().__init__(None, None, test_params, user_id)
+        self.source = dict(source, dialect=SQL_Dialect.for_name(source["dialect"]))
+        self.target = dict(target, dialect=SQL_Dialect.for_name(target["dialect"]))
+
+    def _execute(self, side: dict, sql: str):
+        cursor = side["connection"].cursor()
+        try:
+            cursor.execute(sql)
+            columns = [d[0] for d in cursor.description] if cursor.description else []
+            return columns, cursor.fetchall()
+        finally:
+            cursor.close()
+
+    def _headers(self, side: dict) -> list:
+        columns, _ = self._execute(side, f"SELECT * FROM ({side['query']}) src WHERE 1 = 0")
+        return columns
+
+    def _resolve_compare_columns(self):
+        self.source_headers = self._headers(self.source)
+        self.target_headers = self._headers(self.target)
+        assert self.source_headers, "source_df is empty"
+        assert self.target_headers, "target_df is empty"
+
+        if not self.compare_columns_source or not self.compare_columns_target:
+            common_cols = [c for c in self.source_headers if c in self.target_headers]
+            self.compare_columns_source = common_cols
+            self.compare_columns_target = common_cols
+
+        assert len(self.compare_columns_source) == len(self.compare_columns_target), \
+            "compare_columns_source and compare_columns_target must have the same length"
+        for side, columns, headers in (("source", self.compare_columns_source, self.source_headers),
+                                       ("target", self.compare_columns_target, self.target_headers)):
+            missing = [c for c in columns if c not in headers]
+            assert not missing, f"Missing columns in {side} dataframe: {missing}"
+
+        unknown_columns = [c for c in self.key_columns if c not in self.compare_columns_source]
+        assert not unknown_columns, f"key_columns must be part of compare_columns_source: {unknown_columns}"
+
+    def _prepare(self):
+        assert not self.on_index, f"on_index is not supported in {self.compare_mode} compare mode"
+        for side in (self.source, self.target):
+            side["dialect"].prepare(side["connection"])
+        self._resolve_compare_columns()
+
+    def _columns(self, side: dict) -> list:
+        return self.compare_columns_source if side is self.source else self.compare_columns_target
+
+    def _key_columns(self, side: dict) -> list:
+        if side is self.source:
+            return list(self.key_columns)
+        target_column_for = dict(zip(self.compare_columns_source, self.compare_columns_target))
+        return [target_column_for[c] for c in self.key_columns]
+
+    def _normalize(self, side: dict, column: str) -> str:
+        """SQL counterpart of Data_Comparison.preprocess_column(for_output=False)."""
+        return side["dialect"].normalize(column, self.ignore_case or self.to_lower_case, self.ignore_spaces)
+
+    def _row_hash(self, side: dict, columns) -> str:
+        return side["dialect"].row_hash(columns, self.ignore_case or self.to_lower_case, self.ignore_spaces)
+
+    def _blank(self, side: dict) -> str:
+        """Blank rows are judged on all columns of the dataset, as in Data_Comparison."""
+        headers = self.source_headers if side is self.source else self.target_headers
+        return side["dialect"].blank_row_predicate(headers)
+
+    def _not_blank(self, side: dict) -> str:
+        return f"NOT {self._blank(side)}"
+
+    def _blank_rows(self, side: dict) -> int:
+        _, rows = self._execute(side, f"SELECT COUNT(*) FROM ({side['query']}) src WHERE {self._blank(side)}")
+        return int(rows[0][0])
+
+    def _frame(self, rows, columns) -> pd.DataFrame:
+        if not rows:
+            return pd.DataFrame(columns=columns)
+        return pd.DataFrame.from_records(rows, columns=columns)
+
+    def _mode_params(self) -> dict:
+        """Mode specific settings echoed in the report."""
+        return {}
+
+    def _build_template(self, source_stats, target_stats) -> dict:
+        template = super()._build_template(source_stats, target_stats)
+        test_params = template["Test"]["test_params"]
+        test_params.pop("partitions")
+        test_params.pop("memory_budget_mb")
+        test_params["compare_mode"] = self.compare_mode
+        test_params.update(self._mode_params())
+        return template
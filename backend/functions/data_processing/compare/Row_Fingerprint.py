@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+
+from functions.data_processing.compare.Hash_Compare_Engine import Hash_Compare_Engine
+
+
+class Row_Fingerprint:
+    """
+    One 64-bit digest per row, built column by column so that only a single
+    normalized column is alive at any time.
+    """
+
+    _OFFSET_BASIS = np.uint64(0xCBF29CE484222325)
+    _PRIME = np.uint64(0x100000001B3)
+
+    @staticmethod
+    def digest(df: pd.DataFrame, columns, normalize) -> np.ndarray:
+        """
+        FNV-style fold of the per-column value hashes; `normalize(name, column)` maps a
+        raw column to its normalized comparison form. Column order matters, names do not.
+        """
+        digest = np.full(len(df), Row_Fingerprint._OFFSET_BASIS, dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            for col in columns:
+                col_hash = pd.util.hash_pandas_object(normalize(col, df[col]), index=False).to_numpy(dtype=np.uint64)
+                digest = (digest ^ col_hash) * Row_Fingerprint._PRIME
+        return digest
+
+
+class Fingerprint_Compare:
+    """
+    Fingerprint mode of Data_Comparison.
+
+    Both sides are reduced to row digests over the compare columns (and key
+    digests in key + value mode), the digests are diffed, and only the rows whose
+    digests differ are normalized and run through the regular compare path to
+    produce row and cell level details. Because matched rows drop out of both
+    sides in pairs, the reduced compare classifies the remaining rows exactly as
+    the full compare would.
+    """
+
+    def __init__(self, comparison):
+        self.comparison = comparison  # Data_Comparison providing frames, columns and normalization
+
+    def _digest(self, df, columns, side: str) -> np.ndarray:
+        kinds = self.comparison.column_kinds(side)
+        return Row_Fingerprint.digest(
+            df, columns, lambda col, series: self.comparison.comparison_column(series, kinds[col])
+        )
+
+    def _drill_down(self, compare, source_rows, target_rows, source_columns, target_columns) -> dict:
+        c = self.comparison
+        return compare(
+            c.comparison_df(source_rows, source_columns, "source"),
+            c.comparison_df(target_rows, target_columns, "target"),
+            source_rows,
+            target_rows
+        )
+
+    def _compare_rows(self) -> dict:
+        c = self.comparison
+        diff = Hash_Compare_Engine(
+            self._digest(c.source_df, c.compare_columns_source, "source"),
+            self._digest(c.target_df, c.compare_columns_target, "target")
+        ).compare()
+
+        outcome = self._drill_down(
+            c._compare_rows,
+            c.source_df.loc[diff["not_in_target"], c.compare_columns_source],
+            c.target_df.loc[diff["not_in_source"], c.compare_columns_target],
+            c.compare_columns_source, c.compare_columns_target
+        )
+        outcome["matched_rows"] = diff["matched_rows"]
+        return outcome
+
+    def _compare_on_index(self) -> dict:
+        c = self.comparison
+        source_digest = pd.Series(self._digest(c.source_df, c.compare_columns_source, "source"), index=c.source_df.index)
+        target_digest = pd.Series(self._digest(c.target_df, c.compare_columns_target, "target"), index=c.target_df.index)
+
+        common_indexes = source_digest.index.intersection(target_digest.index, sort=False)
+        mismatched = common_indexes[
+            source_digest.loc[common_indexes].to_numpy() != target_digest.loc[common_indexes].to_numpy()
+        ]
+        source_failing = ~source_digest.index.isin(common_indexes) | source_digest.index.isin(mismatched)
+        target_failing = ~target_digest.index.isin(common_indexes) | target_digest.index.isin(mismatched)
+
+        outcome = self._drill_down(
+            c._compare_on_index,
+            c.source_df.loc[source_failing, c.compare_columns_source],
+            c.target_df.loc[target_failing, c.compare_columns_target],
+            c.compare_columns_source, c.compare_columns_target
+        )
+        outcome["matched_rows"] = len(common_indexes) - len(mismatched)
+        return outcome
+
+    def _keyed_digests(self, df, key_columns, value_columns, side: str) -> pd.DataFrame:
+        keys = self._digest(df, key_columns, side)
+        return pd.DataFrame({
+            "key": keys,
+            "occurrence": pd.Series(keys).groupby(keys).cumcount().to_numpy(),
+            "value": self._digest(df, value_columns, side),
+            "position": np.arange(len(df), dtype=np.int64)
+        })
+
+    def _compare_key_value(self) -> dict:
+        c = self.comparison
+        target_column_for = c._target_column_for()
+        target_key_columns = [target_column_for[col] for col in c.key_columns]
+        target_value_columns = [target_column_for[col] for col in c.value_columns]
+        source_row_columns = c.key_columns + c.value_columns
+        target_row_columns = target_key_columns + target_value_columns
+
+        joined = pd.merge(
+            self._keyed_digests(c.source_df, c.key_columns, c.value_columns, "source"),
+            self._keyed_digests(c.target_df, target_key_columns, target_value_columns, "target"),
+            on=["key", "occurrence"],
+            how="outer",
+            suffixes=("_source", "_target"),
+            indicator=True
+        )
+        both = joined["_merge"].to_numpy() == "both"
+        changed = both & (joined["value_source"].to_numpy() != joined["value_target"].to_numpy())
+        source_failing = joined.loc[changed | (joined["_merge"].to_numpy() == "left_only"), "position_source"]
+        target_failing = joined.loc[changed | (joined["_merge"].to_numpy() == "right_only"), "position_target"]
+
+        outcome = self._drill_down(
+            c._compare_key_value,
+            c.source_df.iloc[np.sort(source_failing.to_numpy(dtype=np.int64))][source_row_columns],
+            c.target_df.iloc[np.sort(target_failing.to_numpy(dtype=np.int64))][target_row_columns],
+            source_row_columns, target_row_columns
+        )
+        outcome["matched_rows"] = int(both.sum() - changed.sum())
+        return outcome
+
+    def compare(self) -> dict:
+        if self.comparison.on_index:
+            return self._compare_on_index()
+        if self.comparison.key_columns:
+            return self._compare_key_value()
+        return self._compare_rows()
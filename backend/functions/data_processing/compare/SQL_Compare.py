@@ -0,0 +1,103 @@
+import traceback
+
+from functions.data_processing.compare.Data_Comparison import Data_Comparison
+from functions.data_processing.compare.Pushdown_Compare import Pushdown_Compare
+
+
+class SQL_Compare(Pushdown_Compare):
+    """
+    Compare two datasets living on the same engine and host in a single query.
+
+    Both sides are normalized in SQL and numbered per normalized key with
+    ROW_NUMBER() in normalized value order, then FULL OUTER JOINed on (key,
+    occurrence): in row mode the key is the whole row, in key + value mode the
+    key columns, with differing value columns marking a changed row. Only unmatched and changed rows (with their raw
+    values) leave the database; they are run through Data_Comparison for the row
+    and cell details while the matched count comes from the same join.
+    """
+
+    compare_mode = "sql"
+
+    def _numbered(self, side: dict) -> str:
+        dialect = side["dialect"]
+        columns = self._columns(side)
+        join_columns = self._key_columns(side) if self.key_columns else columns
+        raw = [f"{dialect.quote(c)} AS r{i}" for i, c in enumerate(columns)]
+        normalized = [f"{self._normalize(side, c)} AS n{i}" for i, c in enumerate(columns)]
+        join_positions = [columns.index(c) for c in join_columns]
+        partition = ", ".join(f"n{i}" for i in join_positions)
+        # Repeated keys are numbered in normalized value order, so they pair the same way on every run
+        order = ", ".join(f"n{i}" for i in range(len(columns)) if i not in join_positions) or partition
+        return (
+            f"SELECT r.*, ROW_NUMBER() OVER (PARTITION BY {partition} ORDER BY {order}) AS occ "
+            f"FROM (SELECT {', '.join(raw + normalized)} FROM ({side['query']}) src "
+            f"WHERE {self._not_blank(side)}) r"
+        )
+
+    def _joined(self) -> tuple:
+        """
+        Returns the FROM clause joining both numbered sides and the predicate of matched rows.
+        """
+        columns = self.compare_columns_source
+        join_positions = [columns.index(c) for c in self.key_columns] if self.key_columns \
+            else list(range(len(columns)))
+        value_positions = [i for i in range(len(columns)) if i not in join_positions]
+
+        on = " AND ".join([f"s.n{i} = t.n{i}" for i in join_positions] + ["s.occ = t.occ"])
+        matched = " AND ".join(
+            ["s.occ IS NOT NULL", "t.occ IS NOT NULL"] + [f"s.n{i} = t.n{i}" for i in value_positions]
+        )
+        return (
+            f"({self._numbered(self.source)}) s FULL OUTER JOIN ({self._numbered(self.target)}) t ON {on}",
+            matched
+        )
+
+    def _counts(self, joined: str, matched: str) -> tuple:
+        _, rows = self._execute(
+            self.source,
+            f"SELECT COUNT(s.occ), COUNT(t.occ), SUM(CASE WHEN {matched} THEN 1 ELSE 0 END) FROM {joined}"
+        )
+        return tuple(int(value or 0) for value in rows[0])
+
+    def _differences(self, joined: str, matched: str) -> tuple:
+        """
+        Source and target rows that have no identical counterpart, with their raw values.
+        """
+        width = len(self.compare_columns_source)
+        select = ", ".join(
+            ["s.occ", "t.occ"] + [f"s.r{i}" for i in range(width)] + [f"t.r{i}" for i in range(width)]
+        )
+        _, rows = self._execute(self.source, f"SELECT {select} FROM {joined} WHERE NOT ({matched})")
+        source_rows = [row[2:2 + width] for row in rows if row[0] is not None]
+        target_rows = [row[2 + width:] for row in rows if row[1] is not None]
+        return (self._frame(source_rows, self.compare_columns_source),
+                self._frame(target_rows, self.compare_columns_target))
+
+    def perform_test(self):
+        try:
+            assert type(self.source["dialect"]) is type(self.target["dialect"]) \
+                and self.source.get("location") == self.target.get("location"), \
+                "sql compare mode needs source and target on the same engine and host"
+            self._prepare()
+
+            joined, matched = self._joined()
+            source_rows, target_rows, matched_rows = self._counts(joined, matched)
+            source_df, target_df = self._differences(joined, matched)
+
+            reports = []
+            if len(source_df) or len(target_df):
+                reports.append(Data_Comparison(source_df, target_df, self._partition_params(), self.user_id).perform_test())
+
+            report = self.merge_reports(reports, self._build_template(
+                {"rows": source_rows, "blank_rows": self._blank_rows(self.source)},
+                {"rows": target_rows, "blank_rows": self._blank_rows(self.target)}
+            ), self.failed_rows_spill)
+            if "error" in report:
+                return report
+            report["result_metadata"]["matched_rows"] += matched_rows
+            return report
+
+        except AssertionError as ae:
+            return {"error": f"AssertionError: {ae}"}
+        except Exception as e:
+            return {"error": str(e), "traceback": traceback.format_exc()}
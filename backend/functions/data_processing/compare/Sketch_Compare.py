@@ -0,0 +1,199 @@
+import traceback
+
+import numpy as np
+import pandas as pd
+
+from functions.data_processing.Dataset_Preparation import Dataset_Preparation
+from functions.data_processing.compare.Data_Comparison import Data_Comparison
+from functions.data_processing.compare.Hash_Compare_Engine import Hash_Compare_Engine
+from functions.data_processing.compare.Key_Sketch import Bloom_Filter, HyperLogLog, Key_Multiset_Checksum
+from functions.data_processing.compare.Partitioned_Compare import Partitioned_Compare
+
+
+class Sketch_Compare(Partitioned_Compare):
+    """
+    Approximate key membership compare for very large key sets.
+
+    The target is streamed once into a Bloom filter and a HyperLogLog sketch of its
+    normalized keys (the whole row without key_columns). The source is streamed
+    through the target filter, building its own sketches, and the target is streamed
+    again through the source filter. Only the rows whose key is absent from the other
+    side's filter are kept; Bloom filters have no false negatives, so these are
+    certainly missing and are verified and reported by Data_Comparison. Memory is
+    bounded by the filter size, not the table size.
+
+    Keys present on both sides are not compared on their values. Their multiplicities
+    are checked with a Key_Multiset_Checksum of each side's filter-matched rows: when
+    the two disagree (a key repeated more often on one side, or a missing key hidden
+    behind a filter false positive), the surplus rows are counted as failed and the
+    status is false, but which keys they belong to is not known. With key_columns
+    a run without failed rows has status None (unknown), as values were not
+    compared. Results are approximate and the report says so
+    (result_metadata.approximate).
+
+    `source_chunks` and `target_chunks` are callables returning a fresh chunk
+    iterator, as the target is read twice.
+    """
+
+    compare_mode = "sketch"
+
+    def __init__(self, source_chunks, target_chunks, test_params=None, user_id: int = 0):
+        super().__init__(None, None, test_params, user_id)
+        self.open_source_chunks = source_chunks
+        self.open_target_chunks = target_chunks
+        self.expected_keys = int(self.test_params.get("expected_keys", 10_000_000))
+        self.false_positive_rate = float(self.test_params.get("false_positive_rate", 0.01))
+        self.hll_precision = int(self.test_params.get("hll_precision", 14))
+        self._key_kinds = None
+
+    def _hash_columns(self, side: str) -> list:
+        columns = self.key_columns or self.compare_columns_source
+        if side == "source":
+            return list(columns)
+        target_column_for = dict(zip(self.compare_columns_source, self.compare_columns_target))
+        return [target_column_for[c] for c in columns]
+
+    def _decide_key_kinds(self, source_chunk: pd.DataFrame, target_chunk: pd.DataFrame):
+        """
+        Hash form per key column pair, from the first chunks. Numbers hash as float64
+        whatever dtype a later chunk infers, so 1 and 1.0 always meet.
+        """
+        kinds = {}
+        for source_col, target_col in zip(self._hash_columns("source"), self._hash_columns("target")):
+            kind = self.column_kind(source_chunk[source_col], target_chunk[target_col])
+            kind = "float" if kind in ("integer", "bool") else kind
+            kinds[("source", source_col)] = kind
+            kinds[("target", target_col)] = kind
+        self._key_kinds = kinds
+
+    def _key_codes(self, chunk: pd.DataFrame, side: str) -> np.ndarray:
+        columns = self._hash_columns(side)
+        try:
+            keys = pd.DataFrame(
+                {c: self.comparison_column(chunk[c], self._key_kinds[(side, c)]) for c in columns},
+                index=chunk.index
+            )
+        except (TypeError, ValueError) as e:
+            raise AssertionError(f"{side} key columns {columns} change type between chunks: {e}")
+        return Hash_Compare_Engine.hash_columns(keys, columns)
+
+    def _keyed_chunks(self, chunks, side: str):
+        """
+        Yields (rows, key hashes, blank rows) per chunk, rows restricted to the compare
+        columns and keeping their global position as index label.
+        """
+        columns = self.compare_columns_source if side == "source" else self.compare_columns_target
+        offset = 0
+        for chunk in chunks:
+            chunk = chunk.copy()
+            chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+            offset += len(chunk)
+            blank_mask = Dataset_Preparation.blank_rows_mask(chunk)
+            chunk = chunk.loc[~blank_mask]
+            missing = [c for c in columns if c not in chunk.columns]
+            assert not missing, f"Missing columns in {side} dataframe: {missing}"
+            chunk = chunk[columns]
+            yield chunk, self._key_codes(chunk, side), int(blank_mask.sum())
+
+    def _sketch(self, chunks, side: str, bloom: Bloom_Filter, hll: HyperLogLog, other: Bloom_Filter = None):
+        """
+        Streams one side into its sketches; with `other`, also collects the rows whose
+        key is not in the other side's filter and checksums the keys of the others.
+        """
+        stats = {"rows": 0, "blank_rows": 0, "matched_keys": Key_Multiset_Checksum()}
+        candidates = []
+        for chunk, codes, blank_rows in self._keyed_chunks(chunks, side):
+            stats["rows"] += len(chunk)
+            stats["blank_rows"] += blank_rows
+            if bloom is not None:
+                bloom.add(codes)
+                hll.add(codes)
+            if other is not None:
+                missing = ~other.contains(codes)
+                stats["matched_keys"].add(codes[~missing])
+                if missing.any():
+                    candidates.append(chunk.loc[missing])
+        return stats, candidates
+
+    def _candidates(self, frames, side: str) -> pd.DataFrame:
+        columns = self.compare_columns_source if side == "source" else self.compare_columns_target
+        return pd.concat(frames) if frames else pd.DataFrame(columns=columns)
+
+    def perform_test(self):
+        try:
+            assert not self.on_index, "on_index is not supported in sketch compare mode"
+            self.source_chunks = self.open_source_chunks()
+            self.target_chunks = self.open_target_chunks()
+            source_chunks, target_chunks = self._resolve_compare_columns()
+            unknown_columns = [c for c in self.key_columns if c not in self.compare_columns_source]
+            assert not unknown_columns, f"key_columns must be part of compare_columns_source: {unknown_columns}"
+            first_source, source_chunks = self._peek_chunk(source_chunks)
+            first_target, target_chunks = self._peek_chunk(target_chunks)
+            self._decide_key_kinds(first_source, first_target)
+
+            source_bloom = Bloom_Filter(self.expected_keys, self.false_positive_rate)
+            target_bloom = Bloom_Filter(self.expected_keys, self.false_positive_rate)
+            source_hll, target_hll = HyperLogLog(self.hll_precision), HyperLogLog(self.hll_precision)
+
+            target_stats, _ = self._sketch(target_chunks, "target", target_bloom, target_hll)
+            source_stats, source_frames = self._sketch(source_chunks, "source", source_bloom, source_hll, target_bloom)
+            target_matched, target_frames = self._sketch(self.open_target_chunks(), "target", None, None, source_bloom)
+            source_matched = source_stats.pop("matched_keys")
+            target_matched = target_matched["matched_keys"]
+            target_stats.pop("matched_keys")
+
+            source_df = self._candidates(source_frames, "source")
+            target_df = self._candidates(target_frames, "target")
+            reports = []
+            if len(source_df) or len(target_df):
+                reports.append(Data_Comparison(source_df, target_df, self._partition_params(), self.user_id).perform_test())
+
+            template = self._build_template(source_stats, target_stats)
+            test_params = template["Test"]["test_params"]
+            test_params.pop("partitions")
+            test_params.pop("memory_budget_mb")
+            test_params.update({
+                "compare_mode": self.compare_mode,
+                "expected_keys": self.expected_keys,
+                "false_positive_rate": self.false_positive_rate,
+                "hll_precision": self.hll_precision
+            })
+            report = self.merge_reports(reports, template, self.failed_rows_spill)
+            if "error" in report:
+                return report
+
+            # Keys found in the other side's filter count as matched when both sides hold them
+            # equally often; their values are not compared
+            metadata = report["result_metadata"]
+            multiplicities_match = source_matched.matches(target_matched)
+            surplus_rows = abs(source_matched.rows - target_matched.rows)
+            if not multiplicities_match:
+                surplus_rows = max(surplus_rows, 1)
+            metadata["matched_rows"] += min(source_matched.rows, target_matched.rows)
+            metadata["failed_rows"] += surplus_rows
+            # With key_columns the values of matched keys are never compared, so no failure is no pass
+            if metadata["failed_rows"]:
+                metadata["status"] = False
+            else:
+                metadata["status"] = None if self.key_columns else True
+            metadata["approximate"] = True
+            metadata["sketch_summary"] = {
+                "approximate": True,
+                "values_compared": not self.key_columns,
+                "multiplicities_match": multiplicities_match,
+                "unattributed_failed_rows": surplus_rows,
+                "distinct_keys_source": source_hll.count(),
+                "distinct_keys_target": target_hll.count(),
+                "bloom_filter_bytes": source_bloom.size_bytes() + target_bloom.size_bytes(),
+                "bloom_hashes": source_bloom.num_hashes,
+                "false_positive_rate_source": source_bloom.false_positive_rate(),
+                "false_positive_rate_target": target_bloom.false_positive_rate(),
+                "candidate_rows_source": len(source_df),
+                "candidate_rows_target": len(target_df)
+            }
+            return report
+
+        except AssertionError as ae:
+            return {"error": f"AssertionError: {ae}"}
+        except Exception as e:
+            return {"error": str(e), "traceback": traceback.format_exc()}
@@ -0,0 +1,252 @@
+import shutil
+import traceback
+
+import numpy as np
+import pandas as pd
+
+from functions.data_processing.Dataset_Preparation import Dataset_Preparation
+from functions.data_processing.compare.Data_Comparison import Data_Comparison
+from functions.data_processing.compare.Partitioned_Compare import Partitioned_Compare
+
+
+class Sort_Order_Violation(Exception):
+    pass
+
+
+class Sorted_Stream:
+    """
+    Buffered view of one side of a sorted merge: the rows read so far and not yet
+    compared, with their order keys. Every chunk read is checked to continue the
+    sort order of the rows before it.
+    """
+
+    def __init__(self, owner, chunks, side: str):
+        self.owner = owner
+        self.chunks = iter(chunks)
+        self.side = side
+        self.columns = owner.compare_columns_source if side == "source" else owner.compare_columns_target
+        self.order_columns = owner._order_columns(side)
+        self.frame = None
+        self.keys = []
+        self.last = None
+        self.exhausted = False
+        self.offset = 0
+        self.stats = {"rows": 0, "blank_rows": 0}
+
+    def __len__(self):
+        return 0 if self.frame is None else len(self.frame)
+
+    def key_at(self, position: int) -> tuple:
+        return tuple(values[position] for values in self.keys)
+
+    def last_key(self):
+        return self.key_at(len(self) - 1) if len(self) else None
+
+    def read(self):
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            self.exhausted = True
+            return
+        chunk = chunk.copy()
+        chunk.index = pd.RangeIndex(self.offset, self.offset + len(chunk))
+        self.offset += len(chunk)
+
+        blank_mask = Dataset_Preparation.blank_rows_mask(chunk)
+        chunk = chunk.loc[~blank_mask]
+        missing = [c for c in self.columns if c not in chunk.columns]
+        assert not missing, f"Missing columns in {self.side} dataframe: {missing}"
+        chunk = chunk[self.columns]
+        self.stats["rows"] += len(chunk)
+        self.stats["blank_rows"] += int(blank_mask.sum())
+        if chunk.empty:
+            return
+
+        keys = [self.owner._order_key(chunk[c], c, self.side) for c in self.order_columns]
+        self._check_sorted(keys, chunk.index[0])
+        if self.frame is None or self.frame.empty:
+            self.frame, self.keys = chunk, keys
+        else:
+            self.frame = pd.concat([self.frame, chunk])
+            self.keys = [np.concatenate([old, new]) for old, new in zip(self.keys, keys)]
+        self.last = self.last_key()
+
+    def _check_sorted(self, keys, first_row: int):
+        """
+        Rows must be in non-decreasing lexicographic key order, within the chunk and
+        relative to the last row of the previous chunk.
+        """
+        if self.last is not None:
+            keys = [np.concatenate([np.array([last], dtype=values.dtype), values])
+                    for last, values in zip(self.last, keys)]
+            first_row -= 1
+        decided = np.zeros(len(keys[0]) - 1, dtype=bool)
+        descending = np.zeros(len(keys[0]) - 1, dtype=bool)
+        for values in keys:
+            if values.dtype.kind == "f" and np.isnan(values).any():
+                raise Sort_Order_Violation(f"{self.side} has null keys near row {first_row}")
+            before, after = values[:-1], values[1:]
+            less, greater = before < after, before > after
+            descending |= ~decided & greater
+            decided |= less | greater
+        if descending.any():
+            raise Sort_Order_Violation(
+                f"{self.side} is not sorted by {self.order_columns} at row {first_row + int(np.argmax(descending)) + 1}"
+            )
+
+    def prefix(self, boundary) -> int:
+        """Number of buffered rows whose key sorts before `boundary` (all rows for None)."""
+        if boundary is None:
+            return len(self)
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            if self.key_at(middle) < boundary:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def take(self, rows: int) -> pd.DataFrame:
+        if self.frame is None:
+            return pd.DataFrame(columns=self.columns)
+        taken = self.frame.iloc[:rows]
+        self.frame = self.frame.iloc[rows:]
+        self.keys = [values[rows:] for values in self.keys]
+        return taken
+
+
+class Sorted_Merge_Compare(Partitioned_Compare):
+    """
+    Streaming merge join for extracts that arrive sorted by their key.
+
+    Both sides are read chunk by chunk (file readers and DB cursors via fetchmany)
+    and only the rows up to the smaller of the two last buffered keys are
+    compared, so memory stays at about a chunk per side whatever the table size.
+    Rows are ordered by the key columns in key + value mode and by all compare
+    columns otherwise, using the comparison form of Data_Comparison.
+
+    `source_chunks` and `target_chunks` are callables returning a fresh chunk
+    iterator: when a stream turns out not to be sorted the compare restarts on the
+    hash partitioned engine (Partitioned_Compare).
+    """
+
+    compare_mode = "sorted_merge"
+
+    def __init__(self, source_chunks, target_chunks, test_params=None, user_id: int = 0):
+        super().__init__(None, None, test_params, user_id)
+        self.open_source_chunks = source_chunks
+        self.open_target_chunks = target_chunks
+        self._order_kinds = None
+
+    def _order_columns(self, side: str) -> list:
+        columns = self.key_columns or self.compare_columns_source
+        if side == "source":
+            return list(columns)
+        target_column_for = dict(zip(self.compare_columns_source, self.compare_columns_target))
+        return [target_column_for[c] for c in columns]
+
+    def _decide_order_kinds(self, source_chunk: pd.DataFrame, target_chunk: pd.DataFrame):
+        """
+        Order key kind per key column pair, from the first chunks: numbers order as
+        float64, datetimes as nanoseconds, everything else as normalized strings.
+        """
+        kinds = {}
+        for source_col, target_col in zip(self._order_columns("source"), self._order_columns("target")):
+            kind = self.column_kind(source_chunk[source_col], target_chunk[target_col])
+            kind = "float" if kind in ("integer", "bool") else kind
+            kinds[("source", source_col)] = kind
+            kinds[("target", target_col)] = kind
+        self._order_kinds = kinds
+
+    def _order_key(self, series: pd.Series, column: str, side: str) -> np.ndarray:
+        kind = self._order_kinds[(side, column)]
+        try:
+            values = self.comparison_column(series, kind)
+        except (TypeError, ValueError) as e:
+            raise Sort_Order_Violation(f"{side} key {column} does not keep one type: {e}")
+        if kind == "datetime":
+            if values.isna().any():
+                raise Sort_Order_Violation(f"{side} has null keys in {column}")
+            return values.to_numpy().astype(np.int64)
+        if kind == "float":
+            return values.to_numpy(dtype=np.float64)
+        return values.to_numpy(dtype=object)
+
+    def _merged_reports(self, source: Sorted_Stream, target: Sorted_Stream):
+        """
+        Yields one Data_Comparison report per merge step. A step compares every
+        buffered row sorting strictly before the smaller last key of the streams
+        still being read, so all rows sharing a key are always compared together.
+        """
+        while True:
+            for stream in (source, target):
+                while not stream.exhausted and not len(stream):
+                    stream.read()
+            if not len(source) and not len(target):
+                return
+
+            open_ends = [stream.last_key() for stream in (source, target) if not stream.exhausted]
+            boundary = min(open_ends) if open_ends else None
+            source_rows, target_rows = source.prefix(boundary), target.prefix(boundary)
+            if not source_rows and not target_rows:
+                # Every buffered row sits at the boundary key: read on where that key may continue
+                for stream in (source, target):
+                    if not stream.exhausted and stream.last_key() == boundary:
+                        stream.read()
+                continue
+
+            yield Data_Comparison(
+                source.take(source_rows), target.take(target_rows), self._partition_params(), self.user_id
+            ).perform_test()
+
+    def _merge(self) -> dict:
+        self.source_chunks = self.open_source_chunks()
+        self.target_chunks = self.open_target_chunks()
+        source_chunks, target_chunks = self._resolve_compare_columns()
+        unknown_columns = [c for c in self.key_columns if c not in self.compare_columns_source]
+        assert not unknown_columns, f"key_columns must be part of compare_columns_source: {unknown_columns}"
+
+        source = Sorted_Stream(self, source_chunks, "source")
+        target = Sorted_Stream(self, target_chunks, "target")
+        first_source, source.chunks = self._peek_chunk(source.chunks)
+        first_target, target.chunks = self._peek_chunk(target.chunks)
+        self._decide_order_kinds(first_source, first_target)
+
+        template = self._build_template(source.stats, target.stats)
+        test_params = template["Test"]["test_params"]
+        test_params.pop("partitions")
+        test_params.pop("memory_budget_mb")
+        test_params["compare_mode"] = self.compare_mode
+
+        report = self.merge_reports(self._merged_reports(source, target), template, self.failed_rows_spill)
+        if "error" in report:
+            return report
+        for side, stream in (("source", source), ("target", target)):
+            report["result_metadata"][side]["rows"] = stream.stats["rows"]
+            report["result_metadata"][f"blank_rows_{side}"] = stream.stats["blank_rows"]
+        return report
+
+    def _fallback(self, violation: Sort_Order_Violation) -> dict:
+        print(f"[INFO] sorted_merge falls back to the hash engine: {violation}")
+        if self.failed_rows_spill is not None:
+            shutil.rmtree(self.failed_rows_spill.directory, ignore_errors=True)
+        params = dict(self.test_params, compare_mode="partitioned")
+        report = Partitioned_Compare(
+            self.open_source_chunks(), self.open_target_chunks(), params, self.user_id
+        ).perform_test()
+        if "error" not in report:
+            report["result_metadata"]["sorted_merge_fallback"] = str(violation)
+        return report
+
+    def perform_test(self):
+        try:
+            assert not self.on_index, "on_index is not supported in sorted_merge compare mode"
+            try:
+                return self._merge()
+            except Sort_Order_Violation as violation:
+                return self._fallback(violation)
+
+        except AssertionError as ae:
+            return {"error": f"AssertionError: {ae}"}
+        except Exception as e:
+            return {"error": str(e), "traceback": traceback.format_exc()}
@@ -0,0 +1,281 @@
+import heapq
+import shutil
+import tempfile
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from functions.data_processing.compare.Partitioned_Compare import Partition_Spill
+from functions.data_processing.quality.Duplicate_Check_Engine import Duplicate_Check_Engine
+
+
+class Chunked_Duplicate_Check:
+    """
+    Duplicate_Check over a chunk iterator, for tables too big to load.
+
+    Every chunk is first reduced to its distinct keys (per tested column, and for
+    the column combination) with their row count, first row and raw values. Then:
+
+    - "exact": the distinct keys are hash-partitioned into spill files
+      (Partition_Spill) and each partition is summed on its own, so counts are
+      exact and memory is bounded by the largest partition.
+    - "sketch": the distinct keys are merged into a Misra-Gries summary of
+      `sketch_capacity` counters (mergeable heavy hitters) in fixed memory. A
+      reported count may be low by at most `count_error_bound`, and totals only
+      cover the keys the summary kept, so they are reported as tracked_* counts
+      (tracked_unexpected_count, tracked_duplicate_values, ...) rather than under
+      the Duplicate_Check names.
+
+    Keys compare on a 64-bit hash of a canonical form (see canonical_hashes), so a
+    column read as int in one chunk and as float or text in another still counts
+    as one column. Labels are only built for reported keys. The result has the
+    Duplicate_Check shape; row index samples are not available.
+    """
+
+    MODES = ("exact", "sketch")
+    MISSING_HASH = np.uint64(0x9E3779B97F4A7C15)
+
+    def __init__(self, chunks, test_params: dict, user_id: int = 0):
+        self._chunks = chunks
+        self._test_options = test_params
+        self._user_id = user_id
+
+        mode = self._test_options.get("chunked", "exact")
+        self._mode = "exact" if mode is True else mode
+        assert self._mode in self.MODES, f"Unknown chunked duplicate check mode: {mode}"
+        self._top_k = self._test_options.get("top_k", 100)
+        self._num_partitions = int(self._test_options.get("partitions", 16))
+        self._spill_dir = Partition_Spill.SPILL_ROOT
+        self._capacity = int(self._test_options.get("sketch_capacity", 100_000))
+
+    # --- per chunk ---
+
+    @staticmethod
+    def canonical_hashes(series: pd.Series) -> tuple:
+        """
+        (codes, hashes): factorize codes of the column (-1 for missing) and a 64-bit
+        hash per distinct value. Numbers hash as float64, so do texts whose canonical
+        number text they are ("5", "1.5", but not "007" or "5.0"); other values hash
+        their str(). Only distinct values are converted.
+        """
+        codes, uniques = pd.factorize(series)
+        uniques = np.asarray(uniques)
+        numeric = pd.api.types.is_numeric_dtype(uniques.dtype) and not pd.api.types.is_bool_dtype(uniques.dtype)
+        if numeric and (not pd.api.types.is_integer_dtype(uniques.dtype) or not len(uniques)
+                        or np.abs(uniques).max() < 2 ** 53):
+            return codes, pd.util.hash_array(uniques.astype(np.float64) + 0.0)
+
+        text = pd.Series(uniques.astype(str).astype(object))
+        numbers = pd.to_numeric(text, errors="coerce").to_numpy(dtype=np.float64) + 0.0
+        parsed = ~np.isnan(numbers)
+        whole = parsed & np.isfinite(numbers) & (numbers == np.floor(numbers)) & (np.abs(numbers) < 2 ** 53)
+        number_text = np.where(whole, np.where(whole, numbers, 0).astype(np.int64).astype(str), numbers.astype(str))
+        is_number = parsed & (number_text.astype(object) == text.to_numpy())
+        hashes = pd.util.hash_array(text.to_numpy())
+        hashes[is_number] = pd.util.hash_array(numbers[is_number])
+        return codes, hashes
+
+    @staticmethod
+    def _label(values: tuple, combined: bool) -> str:
+        """The key as the in-memory check labels it: str() of the value or of the key tuple."""
+        values = tuple(v.item() if isinstance(v, np.generic) else v for v in values)
+        if combined:
+            return str(tuple("null" if pd.isna(v) else v for v in values))
+        return str(values[0])
+
+    def _reduce(self, chunk: pd.DataFrame, columns: List[str], offset: int, combined: bool) -> pd.DataFrame:
+        """Distinct keys of the chunk: key hash, count, first row and the raw values at that row."""
+        hashed = [self.canonical_hashes(chunk[c]) for c in columns]
+        if combined:
+            # Missing values become one more code (and hash), so they pair up like any value
+            codes = Duplicate_Check_Engine.combine_codes([np.where(c < 0, len(h), c) for c, h in hashed])
+            rows = np.arange(len(chunk))
+        else:
+            rows = np.flatnonzero(hashed[0][0] >= 0)
+            codes = hashed[0][0][rows]
+        counts = np.bincount(codes) if len(codes) else np.zeros(0, dtype=np.int64)
+        positions = rows[Duplicate_Check_Engine.first_rows(codes, len(counts))]
+
+        key = np.zeros(len(counts), dtype=np.uint64)
+        for column_codes, hashes in hashed:
+            with np.errstate(over="ignore"):
+                key = key * np.uint64(0x100000001B3) ^ np.append(hashes, self.MISSING_HASH)[column_codes[positions]]
+        reduced = pd.DataFrame({
+            "key": pd.util.hash_array(key) if combined else key,
+            "count": counts,
+            "first_row": offset + positions
+        })
+        for i, column in enumerate(columns):
+            reduced[f"v{i}"] = chunk[column].iloc[positions].to_numpy()
+        return reduced
+
+    @staticmethod
+    def _sum_keys(keys: np.ndarray, counts: np.ndarray, first_rows: np.ndarray) -> tuple:
+        """Merge entries of the same key: (entry of its earliest row, summed count) per key."""
+        order = np.argsort(first_rows, kind="stable")
+        codes, _ = pd.factorize(keys[order])
+        sums = np.bincount(codes, weights=counts[order]).astype(np.int64)
+        return order[Duplicate_Check_Engine.first_rows(codes, len(sums))], sums
+
+    def _heaviest(self, counts: np.ndarray, first_rows: np.ndarray) -> np.ndarray:
+        """Positions of the duplicate keys, most rows first (ties by first appearance), cut at top_k."""
+        duplicated = np.flatnonzero(counts > 1)
+        duplicated = duplicated[np.lexsort((first_rows[duplicated], -counts[duplicated]))]
+        return duplicated if self._top_k is None else duplicated[:int(self._top_k)]
+
+    # --- exact ---
+
+    def _exact(self, key_sets, reduced_chunks, work_dir: str) -> tuple:
+        spills = [Partition_Spill(work_dir, f"keys{i}", self._num_partitions) for i in range(len(key_sets))]
+        rows = 0
+        for chunk_rows, reduced in reduced_chunks:
+            rows += chunk_rows
+            for spill, frame in zip(spills, reduced):
+                if len(frame):
+                    spill.add(frame, frame["key"].to_numpy())
+
+        results = []
+        for spill, (columns, combined) in zip(spills, key_sets):
+            heaviest, duplicated_rows, duplicated_keys = [], 0, 0
+            for partition in range(self._num_partitions):
+                # Pieces stay apart so every chunk keeps the dtypes of its values
+                pieces = [frame for frame, _ in spill.pieces(partition)]
+                if not pieces:
+                    continue
+                piece_ids = np.repeat(np.arange(len(pieces)), [len(frame) for frame in pieces])
+                local = np.concatenate([np.arange(len(frame)) for frame in pieces])
+                first_rows = np.concatenate([frame["first_row"].to_numpy() for frame in pieces])
+                entries, counts = self._sum_keys(
+                    np.concatenate([frame["key"].to_numpy() for frame in pieces]),
+                    np.concatenate([frame["count"].to_numpy() for frame in pieces]),
+                    first_rows
+                )
+                first_rows = first_rows[entries]
+                duplicated_rows += int(counts[counts > 1].sum())
+                duplicated_keys += int((counts > 1).sum())
+                for position in self._heaviest(counts, first_rows).tolist():
+                    entry = entries[position]
+                    piece = pieces[piece_ids[entry]]
+                    values = tuple(piece[f"v{i}"].iat[local[entry]] for i in range(len(columns)))
+                    # Most rows first, ties by first appearance
+                    item = (int(counts[position]), -int(first_rows[position]), self._label(values, combined))
+                    if self._top_k is None or len(heaviest) < int(self._top_k):
+                        heapq.heappush(heaviest, item)
+                    elif item > heaviest[0]:
+                        heapq.heapreplace(heaviest, item)
+                spill.remove(partition)
+            details = {label: {"count": count} for count, _, label in sorted(heaviest, reverse=True)}
+            results.append((details, duplicated_rows, duplicated_keys, None))
+        return rows, results
+
+    # --- sketch ---
+
+    def _merge_summary(self, summary: pd.DataFrame, frame: pd.DataFrame, combined: bool) -> tuple:
+        """Misra-Gries merge; returns the summary and the count taken off every key."""
+        merged = pd.concat([summary[["key", "count", "first_row"]], frame[["key", "count", "first_row"]]],
+                           ignore_index=True)
+        entries, counts = self._sum_keys(merged["key"].to_numpy(), merged["count"].to_numpy(),
+                                         merged["first_row"].to_numpy())
+        cut = 0
+        if len(counts) > self._capacity:
+            cut = int(np.partition(counts, len(counts) - self._capacity - 1)[len(counts) - self._capacity - 1])
+            kept = counts > cut
+            entries, counts = entries[kept], counts[kept] - cut
+
+        # Labels are only built for new keys that made it into the summary
+        value_columns = [c for c in frame.columns if c.startswith("v")]
+        labels = np.empty(len(entries), dtype=object)
+        old = entries < len(summary)
+        labels[old] = summary["label"].to_numpy()[entries[old]]
+        new_values = frame[value_columns].iloc[entries[~old] - len(summary)]
+        labels[~old] = [self._label(values, combined) for values in new_values.itertuples(index=False, name=None)]
+        return pd.DataFrame({
+            "key": merged["key"].to_numpy()[entries],
+            "count": counts,
+            "first_row": merged["first_row"].to_numpy()[entries],
+            "label": labels
+        }), cut
+
+    def _sketch(self, key_sets, reduced_chunks) -> tuple:
+        empty = pd.DataFrame({"key": np.zeros(0, dtype=np.uint64), "count": np.zeros(0, dtype=np.int64),
+                              "first_row": np.zeros(0, dtype=np.int64), "label": np.zeros(0, dtype=object)})
+        summaries = [empty] * len(key_sets)
+        error_bounds = [0] * len(key_sets)
+        rows = 0
+        for chunk_rows, reduced in reduced_chunks:
+            rows += chunk_rows
+            for position, frame in enumerate(reduced):
+                if len(frame):
+                    summaries[position], cut = self._merge_summary(summaries[position], frame, key_sets[position][1])
+                    error_bounds[position] += cut
+
+        results = []
+        for summary, error_bound in zip(summaries, error_bounds):
+            counts, first_rows = summary["count"].to_numpy(), summary["first_row"].to_numpy()
+            top = self._heaviest(counts, first_rows)
+            labels = summary["label"].to_numpy()
+            details = {labels[i]: {"count": int(counts[i])} for i in top.tolist()}
+            results.append((details, int(counts[counts > 1].sum()), int((counts > 1).sum()), error_bound))
+        return rows, results
+
+    # --- run ---
+
+    def perform_test(self) -> List[dict]:
+        columns_to_test = self._test_options.get("column_to_test")
+        if not columns_to_test:
+            raise ValueError("No 'column_to_test' specified in test parameters.")
+        if isinstance(columns_to_test, str):
+            columns_to_test = [columns_to_test]
+
+        key_sets = [([column], False) for column in columns_to_test]
+        if len(columns_to_test) > 1:
+            key_sets.append((columns_to_test, True))
+
+        def reduced_chunks():
+            offset = 0
+            for chunk in self._chunks:
+                missing = [c for c in columns_to_test if c not in chunk.columns]
+                assert not missing, f"Missing columns in dataframe: {missing}"
+                yield len(chunk), [self._reduce(chunk, columns, offset, combined) for columns, combined in key_sets]
+                offset += len(chunk)
+
+        work_dir = tempfile.mkdtemp(prefix="etl_duplicates_", dir=self._spill_dir)
+        try:
+            if self._mode == "exact":
+                rows, results = self._exact(key_sets, reduced_chunks(), work_dir)
+            else:
+                rows, results = self._sketch(key_sets, reduced_chunks())
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        # Sketch totals only cover the keys the summary kept
+        prefix = "tracked_" if self._mode == "sketch" else ""
+        output = []
+        for (columns, combined), (details, duplicated_rows, duplicated_keys, error_bound) in zip(key_sets, results):
+            if combined:
+                result = {
+                    "columns_combined": columns,
+                    f"{prefix}row_duplicates_count": duplicated_rows,
+                    f"{prefix}duplicate_keys": duplicated_keys
+                }
+                details_name = "row_duplicate_details"
+            else:
+                result = {
+                    "column": columns[0],
+                    "element_count": rows,
+                    f"{prefix}unexpected_count": duplicated_rows,
+                    f"{prefix}duplicate_values": duplicated_keys
+                }
+                details_name = "duplicate_value_details"
+            if error_bound is not None:
+                result["count_error_bound"] = error_bound
+            result[details_name] = details
+            result[f"{details_name}_truncated"] = duplicated_keys > len(details)
+            result["chunked"] = self._mode
+            output.append(result)
+
+        print("Duplicate_Check output:", [
+            {k: v for k, v in result.items() if not k.endswith("_details")} for result in output
+        ])
+        return output
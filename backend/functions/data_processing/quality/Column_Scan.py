@@ -0,0 +1,110 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+
+class Column_Scan:
+    """
+    Per column work the quality checks of one table share: factorize codes,
+    distinct values and what is derived from them (null-like and blank masks,
+    rule masks, numbers and datetimes of text columns). Each is computed once per
+    column and kept until release(column), so checks running on the same scan pay
+    for a column only once.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self._cache = {}
+
+    def _cached(self, column: str, key, build):
+        per_column = self._cache.setdefault(column, {})
+        if key not in per_column:
+            per_column[key] = build()
+        return per_column[key]
+
+    def release(self, column: str):
+        self._cache.pop(column, None)
+
+    @staticmethod
+    def is_text(series: pd.Series) -> bool:
+        return series.dtype == object or pd.api.types.is_string_dtype(series.dtype)
+
+    def factorize(self, column: str):
+        """(codes, uniques) of a column, code -1 for missing values; values equal under hashing share a code."""
+        return self._cached(column, "factorize", lambda: pd.factorize(self.df[column]))
+
+    def distinct(self, column: str):
+        """
+        (codes, distinct values) of a column, code -1 for missing values. Object
+        columns holding more than strings are keyed by type and value, since hashing
+        alone puts True, 1 and 1.0 together.
+        """
+        def build():
+            series = self.df[column]
+            if series.dtype != object or pd.api.types.infer_dtype(series, skipna=True) in ("string", "empty"):
+                codes, uniques = self.factorize(column)
+                return codes, pd.Series(np.asarray(uniques, dtype=object))
+            value_codes, value_uniques = self.factorize(column)
+            type_codes, _ = pd.factorize(series.map(type))
+            combined = (type_codes.astype(np.int64) * len(value_uniques) + value_codes).astype(np.float64)
+            combined[value_codes < 0] = np.nan
+            codes, _ = pd.factorize(combined)
+            present = np.flatnonzero(codes >= 0)
+            _, first = np.unique(codes[present], return_index=True)
+            return codes, pd.Series(series.iloc[present[first]].to_numpy(dtype=object))
+
+        return self._cached(column, "distinct", build)
+
+    def missing(self, column: str) -> np.ndarray:
+        """Per row mask of missing values (None, NaN, NaT, pd.NA)."""
+        def build():
+            series = self.df[column]
+            if self.is_text(series):
+                return self.factorize(column)[0] < 0
+            return series.isna().to_numpy().copy()
+
+        return self._cached(column, "missing", build)
+
+    def _per_distinct(self, column: str, name, convert, fill):
+        """Per row values of `convert` (distinct values Series -> array), `fill` for missing values."""
+        def build():
+            codes, distinct = self.distinct(column)
+            converted = np.asarray(convert(distinct))
+            return np.append(converted, np.array([fill], dtype=converted.dtype))[codes]
+
+        return self._cached(column, name, build)
+
+    def distinct_mask(self, column: str, name, predicate) -> np.ndarray:
+        """
+        Per row mask of `predicate` (distinct values Series -> bool array), evaluated
+        once per distinct value and cached under `name`; missing values are False.
+        """
+        return self._per_distinct(column, name, lambda distinct: np.asarray(predicate(distinct), dtype=bool), False)
+
+    def numbers(self, column: str) -> np.ndarray:
+        """float64 values, NaN where missing or not a number; text is converted once per distinct value."""
+        series = self.df[column]
+        if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+            return self._cached(column, "numbers", lambda: series.to_numpy(dtype=np.float64, na_value=np.nan))
+        return self._per_distinct(
+            column, "numbers",
+            lambda distinct: pd.to_numeric(distinct, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan),
+            np.nan
+        )
+
+    def datetimes(self, column: str) -> np.ndarray:
+        """datetime64[ns] values, NaT where missing or not a date; text is parsed once per distinct value."""
+        series = self.df[column]
+        if pd.api.types.is_datetime64_any_dtype(series.dtype):
+            return self._cached(column, "datetimes", lambda: series.to_numpy(dtype="datetime64[ns]"))
+
+        def parse(distinct):
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                try:
+                    return pd.to_datetime(distinct, errors="coerce").to_numpy(dtype="datetime64[ns]")
+                except (TypeError, ValueError, OverflowError):
+                    return np.full(len(distinct), np.datetime64("NaT"), dtype="datetime64[ns]")
+
+        return self._per_distinct(column, "datetimes", parse, np.datetime64("NaT"))
@@ -1,27 +1,33 @@
-import pandas as pd
-import numpy as np
-import great_expectations as gx
+import numbers
 import re
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from functions.data_processing.quality.Column_Scan import Column_Scan
+
 
 class Data_Type_Check:
-    def __init__(self, connected_data, test_params, connection_type, user_id: int = 0):
-        self.__dataframe = connected_data.copy()
+    NULL_EQUIVALENTS = ['null', 'nan', 'none', '']
+    BOOL_TOKENS = ['true', 'false', '0', '1']
+    _INT_PATTERN = r"\s*[+-]?\d+(?:_\d+)*\s*"
+
+    def __init__(self, connected_data, test_params, connection_type, user_id: int = 0, scan: Column_Scan = None):
+        self.__dataframe = connected_data
         self.__test_options = test_params
         self.__user_id = user_id
         self.__connection_type = connection_type
-        self.__replace_string_nulls()
-
-    def __replace_string_nulls(self):
-        null_equivalents = ['null', 'NULL', 'NaN', 'nan', 'None', 'none', '']
+        self.__max_indexes = self.__test_options.get("max_indexes", 1000)
+        # Distinct values of text columns, possibly shared with other checks
+        self.__scan = scan or Column_Scan(connected_data)
 
-        def clean_nulls(val):
-            if isinstance(val, str):
-                val_clean = val.strip().lower()
-                if val_clean in null_equivalents:
-                    return np.nan
-            return val
-
-        self.__dataframe = self.__dataframe.applymap(clean_nulls)
+    def __null_like(self, values: pd.Series) -> np.ndarray:
+        """Strings that strip and lower to a null equivalent."""
+        try:
+            return values.str.strip().str.lower().isin(self.NULL_EQUIVALENTS).eq(True).to_numpy()
+        except AttributeError:  # no strings at all
+            return np.zeros(len(values), dtype=bool)
 
     def __normalize_sql_type(self, sql_type: str) -> str:
         sql_type = sql_type.lower().strip()
@@ -41,7 +47,108 @@ class Data_Type_Check:
             return bool(value)
         return value
 
-    def perform_test(self):
+    @staticmethod
+    def __check_type(value, expected_dtype):
+        try:
+            if 'int' in expected_dtype:
+                int(value)
+            elif 'float' in expected_dtype:
+                float(value)
+            elif 'bool' in expected_dtype:
+                if str(value).lower() not in Data_Type_Check.BOOL_TOKENS:
+                    return False
+            elif 'datetime' in expected_dtype:
+                pd.to_datetime(value)
+            # For 'object' or string types, accept any non-null value
+            return True
+        except Exception:
+            return False
+
+    def __matches_type(self, series: pd.Series, expected_dtype: str) -> np.ndarray:
+        """
+        Per non-null value, whether it converts to `expected_dtype`. Bulk conversions
+        accept most values; what they reject is checked value by value, once per
+        distinct value, so only genuinely odd values pay the scalar cost.
+        """
+        if series.empty:
+            return np.zeros(0, dtype=bool)
+        if 'bool' in expected_dtype:
+            return series.astype(str).str.lower().isin(self.BOOL_TOKENS).to_numpy()
+        if not any(kind in expected_dtype for kind in ('int', 'float', 'datetime')):
+            return np.ones(len(series), dtype=bool)
+
+        if 'datetime' in expected_dtype:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                try:
+                    accepted = pd.to_datetime(series, errors="coerce").notna().to_numpy()
+                except (TypeError, ValueError, OverflowError):
+                    accepted = np.zeros(len(series), dtype=bool)
+        elif pd.api.types.is_numeric_dtype(series.dtype):
+            accepted = np.isfinite(series.to_numpy(dtype=np.float64)) if 'int' in expected_dtype \
+                else np.ones(len(series), dtype=bool)
+        else:
+            if pd.api.types.infer_dtype(series, skipna=True) == "string":
+                is_text = np.ones(len(series), dtype=bool)
+                is_number = ~is_text
+            else:
+                types = series.map(type)
+                is_text = types.isin([str, np.str_]).to_numpy()
+                number_types = [t for t in types.unique() if issubclass(t, numbers.Number)]
+                is_number = types.isin(number_types).to_numpy() & ~is_text
+            accepted = np.zeros(len(series), dtype=bool)
+            text = series[is_text].astype(str)
+            if 'int' in expected_dtype:
+                # Plain digit strings need no regex
+                digits = text.str.isdecimal().to_numpy(dtype=bool).copy()
+                digits[~digits] = text[~digits].str.fullmatch(self._INT_PATTERN).to_numpy(dtype=bool)
+                accepted[is_text] = digits
+            else:
+                accepted[is_text] = pd.to_numeric(text, errors="coerce").notna().to_numpy()
+            numbers_only = pd.to_numeric(series[is_number], errors="coerce").to_numpy(dtype=np.float64)
+            accepted[is_number] = np.isfinite(numbers_only) if 'int' in expected_dtype else ~np.isnan(numbers_only)
+
+        rejected = np.flatnonzero(~accepted)
+        if len(rejected):
+            accepted = accepted.copy()
+            values = series.iloc[rejected]
+            # By type and value: hashing alone puts True, 1 and 1.0 together
+            type_codes, _ = pd.factorize(values.map(type))
+            value_codes, value_uniques = pd.factorize(values, use_na_sentinel=False)
+            codes, _ = pd.factorize(type_codes.astype(np.int64) * len(value_uniques) + value_codes)
+            _, first = np.unique(codes, return_index=True)
+            unique_ok = np.array([self.__check_type(v, expected_dtype) for v in values.iloc[first]], dtype=bool)
+            accepted[rejected] = unique_ok[codes]
+        return accepted
+
+    def __group_values(self, values: pd.Series, codes: np.ndarray, index: pd.Index) -> list:
+        """
+        Count and row indexes per bad value, in order of first appearance, from the
+        per row `codes` into `values`; indexes capped at max_indexes. Values comparing
+        equal share one entry, as grouping by value always did.
+        """
+        if not len(codes):
+            return []
+        ids, seen = pd.factorize(codes)
+        merged, uniques = pd.factorize(values.iloc[seen], use_na_sentinel=False)
+        groups = merged[ids]
+        counts = np.bincount(groups, minlength=len(uniques))
+        rows = index.to_numpy()[np.argsort(groups, kind="stable")]
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        grouped = []
+        for position, value in enumerate(uniques):
+            stop = starts[position] + counts[position]
+            if self.__max_indexes is not None:
+                stop = min(stop, starts[position] + int(self.__max_indexes))
+            grouped.append({
+                "value": self.__to_native_type(value),
+                "count": int(counts[position]),
+                "indexes": rows[starts[position]:stop].tolist()
+            })
+        return grouped
+
+    def column_types(self) -> list:
+        """(column, expected SQL type, expected pandas dtype) for every tested column."""
         headers = self.__test_options.get("column_to_test", [])
         data_types = self.__test_options.get("data_types", [])
 
@@ -69,79 +176,61 @@ class Data_Type_Check:
 
         normalized_types = [self.__normalize_sql_type(dtype) for dtype in data_types]
         mapped_types = [sql_to_pandas_type.get(ntype, ntype) for ntype in normalized_types]
-
-        context = gx.get_context(mode="ephemeral")
-        data_source = context.data_sources.add_pandas("pandas")
-        data_asset = data_source.add_dataframe_asset(name="pd_dataframe_asset")
-        batch_definition = data_asset.add_batch_definition_whole_dataframe("batch_definition")
-        batch = batch_definition.get_batch(batch_parameters={"dataframe": self.__dataframe})
-
-        suite_name = f"Data Type Check_{self.__user_id}"
-        suite = gx.ExpectationSuite(name=suite_name)
-        validator = context.get_validator(batch=batch, expectation_suite=suite)
-
-        def check_type(value, expected_dtype):
-            if pd.isna(value):
-                return True  # nulls pass the type check
-            try:
-                if 'int' in expected_dtype:
-                    int(value)
-                elif 'float' in expected_dtype:
-                    float(value)
-                elif 'bool' in expected_dtype:
-                    if str(value).lower() not in ['true', 'false', '0', '1']:
-                        return False
-                elif 'datetime' in expected_dtype:
-                    pd.to_datetime(value)
-                # For 'object' or string types, accept any non-null value
-                return True
-            except Exception:
-                return False
-
-        results = []
-
-        for header, sql_expected_type, pandas_expected_type in zip(headers, normalized_types, mapped_types):
-            validator.expect_column_values_to_be_of_type(column=header, type_=pandas_expected_type)
-
-            actual_dtype = str(self.__dataframe[header].dtype)
-            total_count = len(self.__dataframe[header])
-            null_count = self.__dataframe[header].isna().sum()
-
-            if actual_dtype == pandas_expected_type:
-                match_count = total_count - null_count
-                not_match_count = 0
-                success = True
-                non_matching_unique_values_with_counts = []
+        return list(zip(headers, normalized_types, mapped_types))
+
+    def check_column(self, header: str, sql_expected_type: str, pandas_expected_type: str) -> dict:
+        series = self.__dataframe[header]
+        total_count = len(series)
+        codes = None
+
+        # Text columns are cleaned and checked once per distinct value
+        if Column_Scan.is_text(series):
+            codes, distinct = self.__scan.distinct(header)
+            null_like = self.__null_like(distinct)
+            if null_like.any():
+                null_rows = np.append(null_like, False)[codes]  # code -1 hits the False
+                codes = np.where(null_rows, -1, codes)
+                series = series.mask(null_rows, np.nan)
+                if series.dtype == object:
+                    series = series.infer_objects()
+
+        actual_dtype = str(series.dtype)
+        null_count = series.isna().sum()
+
+        if actual_dtype == pandas_expected_type:
+            match_count = total_count - null_count
+            not_match_count = 0
+            success = True
+            non_matching_unique_values_with_counts = []
+        else:
+            if codes is not None and Column_Scan.is_text(series):
+                bad_distinct = ~self.__matches_type(distinct, pandas_expected_type) & ~null_like
+                bad = np.flatnonzero(np.append(bad_distinct, False)[codes])
+                non_matching_unique_values_with_counts = self.__group_values(
+                    distinct, codes[bad], series.index[bad]
+                )
             else:
-                series = self.__dataframe[header]
-                non_matching_mask = ~series.apply(lambda x: check_type(x, pandas_expected_type))
-                non_matching_series = series[non_matching_mask].dropna()
-
-                non_matching_values = non_matching_series.unique()
-
-                non_matching_unique_values_with_counts = []
-                for val in non_matching_values:  # No limit here
-                    matching_indexes = non_matching_series[non_matching_series == val].index.tolist()
-                    non_matching_unique_values_with_counts.append({
-                        "value": self.__to_native_type(val),
-                        "count": len(matching_indexes),
-                        "indexes": matching_indexes
-                    })
-
-                match_count = 0
-                not_match_count = total_count - null_count
-                success = False
-
-            results.append({
-                "column": header,
-                "expected_type": sql_expected_type,
-                "actual_type": actual_dtype,
-                "match_count": self.__to_native_type(match_count),
-                "not_match_count": self.__to_native_type(not_match_count),
-                "null_count": self.__to_native_type(null_count),
-                "total_count": self.__to_native_type(total_count),
-                "success": self.__to_native_type(success),
-                "non_matching_unique_values_with_counts": non_matching_unique_values_with_counts
-            })
+                non_null = np.flatnonzero(series.notna().to_numpy())
+                bad = non_null[~self.__matches_type(series.iloc[non_null], pandas_expected_type)]
+                non_matching_unique_values_with_counts = self.__group_values(
+                    series.iloc[bad], np.arange(len(bad)), series.index[bad]
+                )
+
+            match_count = 0
+            not_match_count = total_count - null_count
+            success = False
+
+        return {
+            "column": header,
+            "expected_type": sql_expected_type,
+            "actual_type": actual_dtype,
+            "match_count": self.__to_native_type(match_count),
+            "not_match_count": self.__to_native_type(not_match_count),
+            "null_count": self.__to_native_type(null_count),
+            "total_count": self.__to_native_type(total_count),
+            "success": self.__to_native_type(success),
+            "non_matching_unique_values_with_counts": non_matching_unique_values_with_counts
+        }
 
-        return results
+    def perform_test(self):
+        return [self.check_column(*column_type) for column_type in self.column_types()]
@@ -1,78 +1,72 @@
-import great_expectations as gx
-from great_expectations.core import ExpectationSuite
 from typing import List
-import time
-import pandas as pd
+
+from functions.data_processing.quality.Duplicate_Check_Engine import Duplicate_Check_Engine
+
+try:
+    import great_expectations as gx
+    from functions.data_processing.quality.GX_Context_Pool import GX_Context_Pool
+except ImportError:  # GX is optional, duplicate checks then run on the native engine only
+    gx = None
 
 
 class Duplicate_Check:
-    def __init__(self, connected_data, test_params: dict, user_id: int = 0):
+    """
+    Duplicate values per column and duplicate rows over the column combination.
+    Counts come from the native engine (Duplicate_Check_Engine) unless
+    test_params.engine is "gx"; details are the top_k heaviest keys either way.
+    """
+
+    def __init__(self, connected_data, test_params: dict, user_id: int = 0, scan=None):
         self._dataframe = connected_data
         self._test_options = test_params
         self._user_id = user_id
-
-        # Initialize ephemeral context and data source
-        self._context = gx.get_context(mode="ephemeral")
-        self._data_source = self._context.data_sources.add_pandas("pandas")
-        self._data_asset = self._data_source.add_dataframe_asset(name="pd_dataframe_asset")
-
-    def get_duplicates_with_indexes(self, column: str) -> dict:
-        value_counts = self._dataframe[column].value_counts()
-        duplicates = value_counts[value_counts > 1]
-
-        # Return only value and count (no index), exclude count <= 1
-        duplicate_details = {
-            str(val): {"count": int(duplicates[val])}
-            for val in duplicates.index
-        }
-        return duplicate_details
-
-    def get_row_duplicates_by_columns(self, columns: List[str]) -> dict:
-        # Identify duplicated rows (keep=False keeps all duplicates)
-        duplicated_rows = self._dataframe[self._dataframe.duplicated(subset=columns, keep=False)]
-
-        duplicate_details = {}
-        for _, row in duplicated_rows.iterrows():
-            key = tuple("null" if pd.isna(row[col]) else row[col] for col in columns)
-            if key not in duplicate_details:
-                duplicate_details[key] = {
-                    "count": 0
-                }
-            duplicate_details[key]["count"] += 1
-
-        # Only return duplicates with count > 1
-        filtered_details = {
-            str(k): v for k, v in duplicate_details.items() if v["count"] > 1
-        }
-
-        return filtered_details
-
-    def perform_test(self) -> List[dict]:
+        self._engine = Duplicate_Check_Engine(
+            connected_data,
+            top_k=self._test_options.get("top_k", 100),
+            sample_indexes=self._test_options.get("sample_indexes", 0),
+            scan=scan
+        )
+
+    @property
+    def engine(self) -> Duplicate_Check_Engine:
+        return self._engine
+
+    def columns_to_test(self) -> List[str]:
         columns_to_test = self._test_options.get("column_to_test")
         if not columns_to_test:
             raise ValueError("No 'column_to_test' specified in test parameters.")
 
         if isinstance(columns_to_test, str):
             columns_to_test = [columns_to_test]
+        return columns_to_test
+
+    @staticmethod
+    def log_output(output: List[dict]):
+        print("Duplicate_Check output:", [
+            {k: v for k, v in result.items() if not k.endswith("_details")} for result in output
+        ])
 
-        # Create batch from whole DataFrame
-        batch_definition = self._data_asset.add_batch_definition_whole_dataframe("batch_definition")
-        batch = batch_definition.get_batch(batch_parameters={"dataframe": self._dataframe})
+    def get_duplicates_with_indexes(self, column: str) -> dict:
+        return self._engine.column_duplicates(column)["duplicate_value_details"]
 
-        suite_name = f"Duplicate_Check_user_{self._user_id}_{int(time.time())}"
-        suite = ExpectationSuite(suite_name)
-        validator = self._context.get_validator(batch=batch, expectation_suite=suite)
+    def get_row_duplicates_by_columns(self, columns: List[str]) -> dict:
+        return self._engine.row_duplicates(columns)["row_duplicate_details"]
 
-        output = []
+    def _gx_column_results(self, columns_to_test: List[str]) -> List[dict]:
+        assert gx is not None, "The gx duplicate check engine needs great_expectations"
 
-        # Add uniqueness expectations for each column
-        for column in columns_to_test:
-            print(f"Adding strict uniqueness expectation for column: {column}")
-            validator.expect_column_values_to_be_unique(column)
+        def build_suite(suite):
+            # Add uniqueness expectations for each column
+            for column in columns_to_test:
+                print(f"Adding strict uniqueness expectation for column: {column}")
+                suite.add_expectation(gx.expectations.ExpectColumnValuesToBeUnique(column=column))
 
-        validator.save_expectation_suite()
-        validation_results = validator.validate(result_format={"result_format": "COMPLETE"})
+        suite_name = f"Duplicate_Check_user_{self._user_id}"
+        with GX_Context_Pool.shared().lease() as gx_context:
+            validator = gx_context.validator(self._dataframe, suite_name, tuple(columns_to_test), build_suite)
+            validation_results = validator.validate(result_format={"result_format": "COMPLETE"})
 
+        output = []
         # Process individual column results (excluding unexpected list/index)
         for result in validation_results.get("results", []):
             exp_config = result.get("expectation_config", {})
@@ -81,23 +75,28 @@ class Duplicate_Check:
             if exp_config.get("type") == "expect_column_values_to_be_unique":
                 column = kwargs.get("column")
                 result_data = result.get("result", {})
-
-                output.append({
-                    "column": column,
+                column_result = self._engine.column_duplicates(column)
+                column_result.update({
                     "element_count": int(result_data.get("element_count", 0)),
-                    "unexpected_count": int(result_data.get("unexpected_count", 0)),
-                    "duplicate_value_details": self.get_duplicates_with_indexes(column)
+                    "unexpected_count": int(result_data.get("unexpected_count", 0))
                 })
+                output.append(column_result)
+        return output
+
+    def perform_test(self) -> List[dict]:
+        columns_to_test = self.columns_to_test()
+
+        engine = self._test_options.get("engine", "native")
+        assert engine in ("native", "gx"), f"Unknown duplicate check engine: {engine}"
+        if engine == "gx":
+            output = self._gx_column_results(columns_to_test)
+        else:
+            output = [self._engine.column_duplicates(column) for column in columns_to_test]
 
         # If more than one column, check row-level duplicates
         if len(columns_to_test) > 1:
             print(f"Checking duplicates based on row combinations of columns: {columns_to_test}")
-            row_duplicates = self.get_row_duplicates_by_columns(columns_to_test)
-            output.append({
-                "columns_combined": columns_to_test,
-                "row_duplicates_count": sum(detail["count"] for detail in row_duplicates.values()),
-                "row_duplicate_details": row_duplicates
-            })
-
-        print("Duplicate_Check output:", output)
-        return output
\ No newline at end of file
+            output.append(self._engine.row_duplicates(columns_to_test))
+
+        self.log_output(output)
+        return output
@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+
+from functions.data_processing.quality.Column_Scan import Column_Scan
+
+
+class Duplicate_Check_Engine:
+    """
+    Native duplicate check: one hash factorize pass per column and per column
+    combination, then exact counts per distinct key with a bincount.
+
+    Counts are exact whatever the cardinality; only the details are bounded: the
+    `top_k` heaviest duplicate keys (None for all), each with up to
+    `sample_indexes` row indexes. Missing values are left out of single column
+    checks (as GX and value_counts do) and are a key value of their own in column
+    combinations (as DataFrame.duplicated does), shown as "null". Codes come from
+    a Column_Scan, which may be shared with other checks.
+    """
+
+    def __init__(self, df: pd.DataFrame, top_k: int = 100, sample_indexes: int = 0, scan: Column_Scan = None):
+        self.df = df
+        self.top_k = top_k
+        self.sample_indexes = int(sample_indexes or 0)
+        self.scan = scan or Column_Scan(df)
+
+    def _check_columns(self, columns: list):
+        missing = [c for c in columns if c not in self.df.columns]
+        assert not missing, f"Missing columns in dataframe: {missing}"
+
+    def factorize(self, column: str):
+        """(codes, uniques) of a column, code -1 for missing values; computed once per column."""
+        return self.scan.factorize(column)
+
+    @staticmethod
+    def first_rows(codes: np.ndarray, size: int) -> np.ndarray:
+        """Position of the first row of every code."""
+        first = np.zeros(size, dtype=np.int64)
+        first[codes[::-1]] = np.arange(len(codes) - 1, -1, -1)
+        return first
+
+    @staticmethod
+    def combine_codes(columns_codes: list) -> np.ndarray:
+        """One code per distinct combination of per column codes, in order of first appearance."""
+        combined = columns_codes[0]
+        if len(combined) == 0:
+            return combined
+        for codes in columns_codes[1:]:
+            combined, _ = pd.factorize(combined.astype(np.int64) * (int(codes.max()) + 1) + codes)
+        return combined
+
+    def heaviest(self, counts: np.ndarray) -> np.ndarray:
+        """Duplicate key codes, most rows first (ties by first appearance), cut at top_k."""
+        duplicated = np.flatnonzero(counts > 1)
+        duplicated = duplicated[np.argsort(-counts[duplicated], kind="stable")]
+        return duplicated if self.top_k is None else duplicated[:int(self.top_k)]
+
+    def _sample(self, codes: np.ndarray, keys: np.ndarray) -> dict:
+        """Up to sample_indexes row indexes per key code in `keys`."""
+        if not self.sample_indexes or not len(keys):
+            return {}
+        positions = np.flatnonzero(np.isin(codes, keys))
+        positions = positions[np.argsort(codes[positions], kind="stable")]
+        key_codes = codes[positions]
+        starts = np.searchsorted(key_codes, keys, side="left")
+        index = self.df.index.to_numpy()
+        return {
+            key: index[positions[start:min(start + self.sample_indexes, np.searchsorted(key_codes, key, side="right"))]].tolist()
+            for key, start in zip(keys.tolist(), starts)
+        }
+
+    def _details(self, codes: np.ndarray, counts: np.ndarray, label) -> tuple:
+        keys = self.heaviest(counts)
+        samples = self._sample(codes, keys)
+        details = {}
+        for key in keys.tolist():
+            detail = {"count": int(counts[key])}
+            if self.sample_indexes:
+                detail["indexes"] = samples[key]
+            details[label(key)] = detail
+        return details, int((counts > 1).sum())
+
+    def column_duplicates(self, column: str) -> dict:
+        self._check_columns([column])
+        codes, uniques = self.factorize(column)
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        details, duplicate_values = self._details(codes, counts, lambda key: str(uniques[key]))
+        return {
+            "column": column,
+            "element_count": int(len(codes)),
+            "unexpected_count": int(counts[counts > 1].sum()),
+            "duplicate_values": duplicate_values,
+            "duplicate_value_details": details,
+            "duplicate_value_details_truncated": duplicate_values > len(details)
+        }
+
+    def row_duplicates(self, columns: list) -> dict:
+        self._check_columns(columns)
+        factorized = [self.factorize(c) for c in columns]
+        # Missing values become one more code, so they pair up like any value
+        codes = self.combine_codes([np.where(c < 0, len(u), c) for c, u in factorized])
+        counts = np.bincount(codes)
+        first_rows = self.first_rows(codes, len(counts))
+
+        def label(key):
+            row = first_rows[key]
+            values = ("null" if c[row] < 0 else u[c[row]] for c, u in factorized)
+            return str(tuple(v.item() if isinstance(v, np.generic) else v for v in values))
+
+        details, duplicate_keys = self._details(codes, counts, label)
+        return {
+            "columns_combined": columns,
+            "row_duplicates_count": int(counts[counts > 1].sum()),
+            "duplicate_keys": duplicate_keys,
+            "row_duplicate_details": details,
+            "row_duplicate_details_truncated": duplicate_keys > len(details)
+        }
@@ -0,0 +1,101 @@
+import contextlib
+import threading
+from collections import OrderedDict
+
+import great_expectations as gx
+import pandas as pd
+
+
+class Pooled_GX_Context:
+    """
+    One ephemeral GX context with its pandas data source, DataFrame asset and whole
+    DataFrame batch definition built once; every request only binds its DataFrame as
+    a new batch. Suites are cached by key, least recently used evicted first.
+    Only used by one thread at a time (see GX_Context_Pool.lease).
+    """
+
+    def __init__(self, max_suites: int):
+        self.context = gx.get_context(mode="ephemeral")
+        data_source = self.context.data_sources.add_pandas("pandas")
+        data_asset = data_source.add_dataframe_asset(name="pd_dataframe_asset")
+        self.batch_definition = data_asset.add_batch_definition_whole_dataframe("batch_definition")
+        self.max_suites = max_suites
+        self.suites = OrderedDict()
+
+    def suite(self, name: str, key: tuple, build) -> gx.ExpectationSuite:
+        """The cached suite for `key`, built by `build(suite)` on a miss."""
+        key = (name,) + tuple(key)
+        suite = self.suites.get(key)
+        if suite is not None:
+            self.suites.move_to_end(key)
+            return suite
+        suite = gx.ExpectationSuite(name=name)
+        build(suite)
+        self.suites[key] = suite
+        if len(self.suites) > self.max_suites:
+            self.suites.popitem(last=False)
+        return suite
+
+    def validator(self, df: pd.DataFrame, name: str, key: tuple, build):
+        batch = self.batch_definition.get_batch(batch_parameters={"dataframe": df})
+        return self.context.get_validator(batch=batch, expectation_suite=self.suite(name, key, build))
+
+
+class GX_Context_Pool:
+    """
+    Process wide pool of prepared GX contexts, so quality checks skip building a
+    context, data source, asset and suite on every request.
+
+    A context is leased to one request at a time; up to `max_contexts` are built on
+    demand and kept, further requests wait for a free one. Use
+    GX_Context_Pool.shared().lease().
+    """
+
+    max_contexts = 4
+    max_suites = 64
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_contexts: int = None, max_suites: int = None):
+        self.max_contexts = max_contexts or self.max_contexts
+        self.max_suites = max_suites or self.max_suites
+        self._idle = []
+        self._created = 0
+        self._available = threading.Condition()
+
+    @classmethod
+    def shared(cls) -> "GX_Context_Pool":
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def _acquire(self) -> Pooled_GX_Context:
+        with self._available:
+            while not self._idle and self._created >= self.max_contexts:
+                self._available.wait()
+            if self._idle:
+                return self._idle.pop()
+            self._created += 1
+        try:
+            # Built outside the lock: building a context takes a while
+            return Pooled_GX_Context(self.max_suites)
+        except Exception:
+            with self._available:
+                self._created -= 1
+                self._available.notify()
+            raise
+
+    def _release(self, pooled: Pooled_GX_Context):
+        with self._available:
+            self._idle.append(pooled)
+            self._available.notify()
+
+    @contextlib.contextmanager
+    def lease(self):
+        pooled = self._acquire()
+        try:
+            yield pooled
+        finally:
+            self._release(pooled)
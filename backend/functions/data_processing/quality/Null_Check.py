@@ -1,10 +1,23 @@
-import great_expectations as gx
 import pandas as pd
 
+from functions.data_processing.quality.Null_Check_Engine import Null_Check_Engine
 from functions.data_processing.reporter.GXReporter import GXReporter
 
+try:
+    import great_expectations as gx
+    from functions.data_processing.quality.GX_Context_Pool import GX_Context_Pool
+except ImportError:  # GX is optional, null checks then run on the native engine only
+    gx = None
+
 
 class Null_Check:
+    """
+    Null, blank and null-like value check per column. Runs on the native fused
+    engine (Null_Check_Engine) unless test_params.engine is "gx".
+    """
+
+    NULL_LIKE_VALUES = ['null', 'NULL', 'NaN', 'nan', 'None', 'none', '']
+
     __dataframe = None
 
     def __init__(self, connected_data, test_params, user_id: int = 0):
@@ -14,55 +27,60 @@ class Null_Check:
 
     def clean_null_like_values(self):
         """Replace string representations of nulls with actual nulls."""
-        null_like_values = ['null', 'NULL', 'NaN', 'nan', 'None', 'none', '']
         for col in self.__dataframe.columns:
-            self.__dataframe[col] = self.__dataframe[col].replace(null_like_values, pd.NA)
-
-    def perform_test(self):
-        self.clean_null_like_values()  # <-- Pre-clean the DataFrame here
-
-        print(self.__test_options)
+            self.__dataframe[col] = self.__dataframe[col].replace(self.NULL_LIKE_VALUES, pd.NA)
 
+    def __headers_and_mostly(self):
         __headers = self.__test_options.get("column_to_test", None)
         print(__headers)
         threshold = self.__test_options.get("threshold", 100)
 
         mostly = threshold / 100 if isinstance(threshold, (int, float)) else 1.0
-        expectation_kwargs = {"mostly": mostly}
 
         if __headers is None:
             __headers = self.__dataframe.columns.to_list()
 
         print(__headers)
 
-        context = gx.get_context(mode="ephemeral")
+        if isinstance(__headers, str):
+            __headers = [__headers]
+        return __headers, mostly
 
-        data_source = context.data_sources.add_pandas("pandas")
-        data_asset = data_source.add_dataframe_asset(name="pd dataframe asset")
+    def native_engine(self, scan=None) -> Null_Check_Engine:
+        """The native engine set up from the test options, optionally on a shared Column_Scan."""
+        __headers, mostly = self.__headers_and_mostly()
+        return Null_Check_Engine(
+            self.__dataframe, __headers, mostly, self.NULL_LIKE_VALUES,
+            self.__test_options.get("workers", 1), scan
+        )
 
-        batch_definition = data_asset.add_batch_definition_whole_dataframe("batch definition")
-        batch = batch_definition.get_batch(batch_parameters={"dataframe": self.__dataframe})
+    def perform_test(self):
+        print(self.__test_options)
 
-        suite_name = "Null Check"
-        suite = gx.ExpectationSuite(name=suite_name)
-        validator = context.get_validator(batch=batch, expectation_suite=suite)
+        engine = self.__test_options.get("engine", "native")
+        assert engine in ("native", "gx"), f"Unknown null check engine: {engine}"
+        if engine == "native":
+            return self.native_engine().run()
 
-        if isinstance(__headers, str):
-            validator.expect_column_values_to_not_be_null(__headers, **expectation_kwargs)
-            validator.expect_column_values_to_not_match_regex(__headers, regex=r"^\s*$", **expectation_kwargs)
-            validator.expect_column_values_to_not_be_in_set(__headers,
-                                                            value_set=[None],
-                                                            **expectation_kwargs)
-        else:
-            for header in __headers:
-                validator.expect_column_values_to_not_be_null(header, **expectation_kwargs)
-                validator.expect_column_values_to_not_match_regex(header, regex=r"^\s*$", **expectation_kwargs)
-                validator.expect_column_values_to_not_be_in_set(header,
-                                                                value_set=[None],
-                                                                **expectation_kwargs)
+        __headers, mostly = self.__headers_and_mostly()
+        expectation_kwargs = {"mostly": mostly}
 
-        validator.save_expectation_suite()
+        assert gx is not None, "The gx null check engine needs great_expectations"
+        self.clean_null_like_values()  # <-- Pre-clean the DataFrame here
 
-        validation_results = validator.validate(result_format="COMPLETE")
+        def build_suite(suite):
+            for header in __headers:
+                suite.add_expectation(gx.expectations.ExpectColumnValuesToNotBeNull(
+                    column=header, **expectation_kwargs))
+                suite.add_expectation(gx.expectations.ExpectColumnValuesToNotMatchRegex(
+                    column=header, regex=r"^\s*$", **expectation_kwargs))
+                suite.add_expectation(gx.expectations.ExpectColumnValuesToNotBeInSet(
+                    column=header, value_set=[None], **expectation_kwargs))
+
+        with GX_Context_Pool.shared().lease() as gx_context:
+            validator = gx_context.validator(
+                self.__dataframe, "Null Check", (tuple(__headers), mostly), build_suite
+            )
+            validation_results = validator.validate(result_format="COMPLETE")
 
         return validation_results
\ No newline at end of file
@@ -0,0 +1,124 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from functions.data_processing.quality.Column_Scan import Column_Scan
+
+
+class Null_Check_Engine:
+    """
+    Native null check producing the validation result GX gives for the Null_Check
+    suite: per column expect_column_values_to_not_be_null, ..._to_not_match_regex
+    ("^\\s*$") and ..._to_not_be_in_set ([None]), with `mostly`.
+
+    The three expectations are settled in one vectorized pass per column instead of
+    three GX scans: a value is null when missing or one of `null_like_values`, and
+    whitespace only when it is a non-empty string of whitespace characters (exactly
+    what the regex matches). Like GX, the regex and value set expectations only
+    count non-null values. Token and whitespace tests run once per distinct value
+    of a shared Column_Scan. Columns are checked on `workers` threads.
+    """
+
+    suite_name = "Null Check"
+    batch_id = "pandas-pd_dataframe_asset"
+
+    def __init__(self, df: pd.DataFrame, headers: list, mostly: float = 1.0, null_like_values=(), workers: int = 1,
+                 scan: Column_Scan = None):
+        self.df = df
+        self.scan = scan or Column_Scan(df)
+        self.headers = headers
+        self.mostly = mostly
+        self.null_like_values = list(null_like_values)
+        self.workers = max(int(workers), 1)
+
+    @staticmethod
+    def _is_space(values: pd.Series) -> np.ndarray:
+        try:
+            # Non-strings give NA here and never match the regex
+            return values.str.isspace().eq(True).to_numpy()
+        except AttributeError:  # no strings at all
+            return np.zeros(len(values), dtype=bool)
+
+    def _masks(self, column: str):
+        series = self.df[column]
+        if not Column_Scan.is_text(series):
+            return series.isna().to_numpy().copy(), np.zeros(len(series), dtype=bool)
+        tokens = self.null_like_values
+        # Missing values are the ones factorize leaves without a code
+        null = self.scan.factorize(column)[0] < 0
+        null |= self.scan.distinct_mask(column, ("in", tuple(tokens)), lambda d: d.isin(tokens).to_numpy())
+        whitespace = self.scan.distinct_mask(column, "isspace", self._is_space) & ~null
+        return null, whitespace
+
+    def _expectation(self, expectation_type: str, column: str, kwargs: dict, unexpected: np.ndarray,
+                     element_count: int, domain_count: int, values: pd.Series = None) -> dict:
+        unexpected_count = int(unexpected.sum())
+        success = domain_count == 0 or 1 - unexpected_count / domain_count >= self.mostly
+        result = {
+            "element_count": element_count,
+            "unexpected_count": unexpected_count,
+            "unexpected_percent": unexpected_count / domain_count * 100 if domain_count else 0.0,
+            "unexpected_index_list": self.df.index[unexpected].tolist()
+        }
+        if expectation_type != "expect_column_values_to_not_be_null":
+            result["missing_count"] = element_count - domain_count
+            result["unexpected_list"] = values[unexpected].tolist() if values is not None else []
+        return {
+            "success": bool(success),
+            "expectation_config": {
+                "type": expectation_type,
+                "kwargs": {"batch_id": self.batch_id, "column": column, "mostly": self.mostly, **kwargs},
+                "meta": {}
+            },
+            "result": result,
+            "meta": {},
+            "exception_info": {
+                "raised_exception": False,
+                "exception_traceback": None,
+                "exception_message": None
+            }
+        }
+
+    def check_column(self, column: str) -> list:
+        series = self.df[column]
+        null, whitespace = self._masks(column)
+        element_count = len(series)
+        non_null = element_count - int(null.sum())
+        return [
+            self._expectation("expect_column_values_to_not_be_null", column, {},
+                              null, element_count, element_count),
+            self._expectation("expect_column_values_to_not_match_regex", column, {"regex": r"^\s*$"},
+                              whitespace, element_count, non_null, series),
+            self._expectation("expect_column_values_to_not_be_in_set", column, {"value_set": [None]},
+                              np.zeros(element_count, dtype=bool), element_count, non_null)
+        ]
+
+    def check_headers(self):
+        missing = [c for c in self.headers if c not in self.df.columns]
+        assert not missing, f"Missing columns in dataframe: {missing}"
+
+    def run(self) -> dict:
+        self.check_headers()
+        if self.workers > 1 and len(self.headers) > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                per_column = list(pool.map(self.check_column, self.headers))
+        else:
+            per_column = [self.check_column(c) for c in self.headers]
+        return self.report(per_column)
+
+    def report(self, per_column: list) -> dict:
+        """The validation result from the check_column results of every header, in order."""
+        results = [expectation for column in per_column for expectation in column]
+        successful = sum(r["success"] for r in results)
+        return {
+            "success": successful == len(results),
+            "suite_name": self.suite_name,
+            "results": results,
+            "statistics": {
+                "evaluated_expectations": len(results),
+                "successful_expectations": successful,
+                "unsuccessful_expectations": len(results) - successful,
+                "success_percent": successful / len(results) * 100 if results else 100.0
+            }
+        }
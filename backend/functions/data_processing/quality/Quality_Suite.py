@@ -0,0 +1,121 @@
+from typing import List
+
+from functions.data_processing.quality.Column_Scan import Column_Scan
+from functions.data_processing.quality.Data_Type_Check import Data_Type_Check
+from functions.data_processing.quality.Duplicate_Check import Duplicate_Check
+from functions.data_processing.quality.Null_Check import Null_Check
+from functions.data_processing.reporter.GXReporter import GXReporter
+
+
+class Quality_Suite:
+    """
+    Several quality checks over one table in a single column-wise scan.
+
+    test_params.checks lists the checks, each an operation name or a dict with
+    "operation" and its own "test_params"; the other suite test_params are the
+    defaults of every check (e.g. one column_to_test for all). The checks are
+    planned per column: a column is visited once, every check using it runs on it
+    with the same Column_Scan (factorize codes, distinct values, null-like and
+    blank masks) and the column's scan data is dropped once no check needs it.
+    Every check reports what it reports on its own.
+    """
+
+    OPERATIONS = ("check_null", "check_duplicate", "check_data_type")
+
+    def __init__(self, connected_data, test_params: dict, connection_type: str = None, user_id: int = 0):
+        self.__dataframe = connected_data
+        self.__test_options = test_params
+        self.__connection_type = connection_type
+        self.__user_id = user_id
+        self.__scan = Column_Scan(connected_data)
+
+    def __checks(self) -> List[tuple]:
+        checks = self.__test_options.get("checks")
+        assert checks, "No 'checks' specified in test parameters."
+        defaults = {k: v for k, v in self.__test_options.items() if k != "checks"}
+
+        planned = []
+        for check in checks:
+            if isinstance(check, str):
+                check = {"operation": check}
+            operation = check.get("operation")
+            assert operation in self.OPERATIONS, f"Unsupported check in suite: {operation}"
+            planned.append((operation, {**defaults, **(check.get("test_params") or {})}))
+        return planned
+
+    def __plan(self, operation: str, test_params: dict) -> dict:
+        """The columns of one check, how to check each of them, and how to report the results."""
+        assert test_params.get("engine", "native") == "native", f"{operation} runs on the native engine in a suite"
+
+        if operation == "check_null":
+            engine = Null_Check(self.__dataframe, test_params, self.__user_id).native_engine(self.__scan)
+            engine.check_headers()
+            return {
+                "columns": list(engine.headers),
+                "check": lambda position: engine.check_column(engine.headers[position]),
+                "report": lambda results: GXReporter.process_report_to_reporter(
+                    engine.report(results), bool(test_params.get("index_ranges", False))
+                ),
+                "retain": []
+            }
+
+        if operation == "check_duplicate":
+            assert not test_params.get("chunked"), "Chunked duplicate checks cannot run in a suite"
+            duplicate_check = Duplicate_Check(self.__dataframe, test_params, self.__user_id, self.__scan)
+            columns = duplicate_check.columns_to_test()
+
+            def report(results):
+                # Row duplicates need the codes of all columns, so they come last
+                if len(columns) > 1:
+                    results = results + [duplicate_check.engine.row_duplicates(columns)]
+                duplicate_check.log_output(results)
+                return {"results": results}
+
+            return {
+                "columns": columns,
+                "check": lambda position: duplicate_check.engine.column_duplicates(columns[position]),
+                "report": report,
+                "retain": columns if len(columns) > 1 else []
+            }
+
+        type_check = Data_Type_Check(
+            self.__dataframe, test_params, self.__connection_type, self.__user_id, self.__scan
+        )
+        column_types = type_check.column_types()
+        return {
+            "columns": [column for column, _, _ in column_types],
+            "check": lambda position: type_check.check_column(*column_types[position]),
+            "report": lambda results: {"results": results},
+            "retain": []
+        }
+
+    def perform_test(self) -> dict:
+        checks = self.__checks()
+        plans = [self.__plan(operation, test_params) for operation, test_params in checks]
+
+        # Every column once, in order of first use, with the checks using it
+        users = {}
+        for plan_id, plan in enumerate(plans):
+            plan["results"] = [None] * len(plan["columns"])
+            for position, column in enumerate(plan["columns"]):
+                users.setdefault(column, []).append((plan_id, position))
+        retained = {column for plan in plans for column in plan["retain"]}
+
+        for column, column_users in users.items():
+            for plan_id, position in column_users:
+                plans[plan_id]["results"][position] = plans[plan_id]["check"](position)
+            if column not in retained:
+                self.__scan.release(column)
+
+        output = []
+        for (operation, test_params), plan in zip(checks, plans):
+            output.append({
+                "operation": operation,
+                "test_params": test_params,
+                "result_metadata": plan["report"](plan["results"])
+            })
+        for column in retained:
+            self.__scan.release(column)
+
+        print("Quality_Suite checks:", [(check["operation"], plan["columns"]) for check, plan in zip(output, plans)])
+        return {"suite_name": "Quality Suite", "checks": output}
@@ -0,0 +1,146 @@
+import re
+
+from functions.data_processing.quality.Rule_Check_Engine import Rule_Check_Engine
+from functions.data_processing.quality.Rule_Check_Pushdown import Rule_Check_Pushdown
+
+
+class Rule_Check:
+    """
+    Declarative rules from test_params.rules, each a dict with a "type":
+
+    - "range": column, min and/or max (strict_min / strict_max), as "number" or "datetime"
+    - "in_set": column, values
+    - "regex": column, pattern the whole value must match
+    - "length": column, min and/or max length of the value's text
+    - "compare": left, operator (<, <=, >, >=, ==, !=), right, as "number", "datetime" or "text"
+
+    Missing values are outside a rule (either column for compare), as in GX; a
+    value that does not convert for a range or compare rule fails it. `mostly`
+    (per rule, test_params.threshold / 100 by default) is the share of checked
+    values that must pass. Rules are validated once and evaluated together: on a
+    DataFrame by Rule_Check_Engine, on a pushdown source by one SQL query
+    (Rule_Check_Pushdown, counts only). The result is a GX style validation result.
+    """
+
+    suite_name = "Rule Check"
+    RULE_TYPES = {
+        "range": "expect_column_values_to_be_between",
+        "in_set": "expect_column_values_to_be_in_set",
+        "regex": "expect_column_values_to_match_regex",
+        "length": "expect_column_value_lengths_to_be_between",
+        "compare": "expect_column_pair_values_to_compare"
+    }
+    OPERATORS = ("<", "<=", ">", ">=", "==", "!=")
+
+    def __init__(self, connected_data, test_params: dict, user_id: int = 0):
+        self.__dataset = connected_data
+        self.__test_options = test_params
+        self.__user_id = user_id
+
+    def __bounds(self, rule: dict, kind: str) -> tuple:
+        low, high = rule.get("min"), rule.get("max")
+        assert low is not None or high is not None, f"{kind} rules need 'min' or 'max'"
+        return low, high
+
+    def __rule(self, rule: dict, mostly: float) -> dict:
+        """The rule checked and reduced to kind, columns, report label and GX style kwargs."""
+        kind = rule.get("type")
+        assert kind in self.RULE_TYPES, f"Unknown rule type: {kind}"
+        mostly = rule.get("mostly", mostly)
+
+        if kind == "compare":
+            left, right, operator = rule.get("left"), rule.get("right"), rule.get("operator")
+            assert left and right, "compare rules need 'left' and 'right' columns"
+            assert operator in self.OPERATORS, f"Unknown compare operator: {operator}"
+            assert rule.get("as") in (None, "number", "datetime", "text"), f"Unknown compare type: {rule.get('as')}"
+            return {
+                "kind": kind,
+                "columns": [left, right],
+                "column": f"{left} {operator} {right}",
+                "mostly": mostly,
+                "kwargs": {"column_A": left, "column_B": right, "operator": operator, "as": rule.get("as")}
+            }
+
+        column = rule.get("column")
+        assert column, f"{kind} rules need a 'column'"
+        if kind == "range":
+            low, high = self.__bounds(rule, kind)
+            assert rule.get("as", "number") in ("number", "datetime"), f"Unknown range type: {rule.get('as')}"
+            kwargs = {
+                "min_value": low,
+                "max_value": high,
+                "strict_min": bool(rule.get("strict_min", False)),
+                "strict_max": bool(rule.get("strict_max", False)),
+                "as": rule.get("as", "number")
+            }
+        elif kind == "in_set":
+            values = rule.get("values")
+            assert isinstance(values, list), "in_set rules need a 'values' list"
+            kwargs = {"value_set": values}
+        elif kind == "regex":
+            pattern = rule.get("pattern")
+            assert isinstance(pattern, str), "regex rules need a 'pattern'"
+            re.compile(pattern)
+            kwargs = {"regex": pattern}
+        else:
+            low, high = self.__bounds(rule, kind)
+            kwargs = {"min_value": low, "max_value": high}
+        return {"kind": kind, "columns": [column], "column": column, "mostly": mostly, "kwargs": kwargs}
+
+    def rules(self) -> list:
+        rules = self.__test_options.get("rules")
+        assert rules, "No 'rules' specified in test parameters."
+        threshold = self.__test_options.get("threshold", 100)
+        mostly = threshold / 100 if isinstance(threshold, (int, float)) else 1.0
+        return [self.__rule(rule, mostly) for rule in rules]
+
+    def __expectation(self, rule: dict, outcome: dict, batch_id: str) -> dict:
+        element_count, domain_count = outcome["element_count"], outcome["domain_count"]
+        unexpected_count = outcome["unexpected_count"]
+        success = domain_count == 0 or 1 - unexpected_count / domain_count >= rule["mostly"]
+        return {
+            "success": bool(success),
+            "expectation_config": {
+                "type": self.RULE_TYPES[rule["kind"]],
+                "kwargs": {"batch_id": batch_id, "column": rule["column"], "mostly": rule["mostly"], **rule["kwargs"]},
+                "meta": {}
+            },
+            "result": {
+                "element_count": element_count,
+                "missing_count": element_count - domain_count,
+                "unexpected_count": unexpected_count,
+                "unexpected_percent": unexpected_count / domain_count * 100 if domain_count else 0.0,
+                "partial_unexpected_list": outcome["partial_unexpected_list"],
+                "unexpected_index_list": outcome["unexpected_index_list"]
+            },
+            "meta": {},
+            "exception_info": {
+                "raised_exception": False,
+                "exception_traceback": None,
+                "exception_message": None
+            }
+        }
+
+    def perform_test(self) -> dict:
+        rules = self.rules()
+        if isinstance(self.__dataset, dict):
+            engine = Rule_Check_Pushdown(self.__dataset, rules)
+        else:
+            engine = Rule_Check_Engine(self.__dataset, rules)
+        outcomes = engine.run()
+
+        results = [self.__expectation(rule, outcome, engine.batch_id) for rule, outcome in zip(rules, outcomes)]
+        successful = sum(r["success"] for r in results)
+        print("Rule_Check output:", [(rule["column"], rule["kind"], outcome["unexpected_count"])
+                                     for rule, outcome in zip(rules, outcomes)])
+        return {
+            "success": successful == len(results),
+            "suite_name": self.suite_name,
+            "results": results,
+            "statistics": {
+                "evaluated_expectations": len(results),
+                "successful_expectations": successful,
+                "unsuccessful_expectations": len(results) - successful,
+                "success_percent": successful / len(results) * 100 if results else 100.0
+            }
+        }
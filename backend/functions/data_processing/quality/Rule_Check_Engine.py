@@ -0,0 +1,146 @@
+import operator
+import re
+
+import numpy as np
+import pandas as pd
+
+from functions.data_processing.quality.Column_Scan import Column_Scan
+
+
+class Rule_Check_Engine:
+    """
+    Rule_Check rules compiled to vectorized expressions over a DataFrame: NumPy
+    comparisons for ranges and column pairs, hashed isin for value sets and
+    precompiled full matches and text lengths evaluated once per distinct value.
+    Conversions and masks come from a Column_Scan, so rules on the same column
+    share them; a column's scan data is dropped after its last rule.
+    """
+
+    batch_id = "pandas-pd_dataframe_asset"
+    PARTIAL_UNEXPECTED = 20
+    COMPARE = {"<": operator.lt, "<=": operator.le, ">": operator.gt,
+               ">=": operator.ge, "==": operator.eq, "!=": operator.ne}
+
+    def __init__(self, df: pd.DataFrame, rules: list, scan: Column_Scan = None):
+        self.df = df
+        self.rules = rules
+        self.scan = scan or Column_Scan(df)
+
+    def _values(self, column: str, as_type: str):
+        if as_type == "number":
+            return self.scan.numbers(column)
+        if as_type == "datetime":
+            return self.scan.datetimes(column)
+        return self.df[column].astype(str).to_numpy(dtype=object)
+
+    def _infer_type(self, columns: list) -> str:
+        dtypes = [self.df[c].dtype for c in columns]
+        if all(pd.api.types.is_numeric_dtype(d) and not pd.api.types.is_bool_dtype(d) for d in dtypes):
+            return "number"
+        if all(pd.api.types.is_datetime64_any_dtype(d) for d in dtypes):
+            return "datetime"
+        return "text"
+
+    @staticmethod
+    def _between(values, low, high, strict_min: bool = False, strict_max: bool = False) -> np.ndarray:
+        inside = np.ones(len(values), dtype=bool)
+        if low is not None:
+            inside &= (values > low) if strict_min else (values >= low)
+        if high is not None:
+            inside &= (values < high) if strict_max else (values <= high)
+        return inside
+
+    def compile(self, rule: dict):
+        """A function returning the (checked, unexpected) row masks of the rule."""
+        kind, kwargs, column = rule["kind"], rule["kwargs"], rule["columns"][0]
+
+        if kind == "range":
+            low, high = kwargs["min_value"], kwargs["max_value"]
+            if kwargs["as"] == "datetime":
+                low, high = (None if v is None else np.datetime64(pd.Timestamp(v).tz_localize(None), "ns")
+                             for v in (low, high))
+
+            def passes():
+                return self._between(self._values(column, kwargs["as"]), low, high,
+                                     kwargs["strict_min"], kwargs["strict_max"])
+        elif kind == "in_set":
+            values = kwargs["value_set"]
+
+            def passes():
+                return self.scan.distinct_mask(column, ("in_set", repr(values)), lambda d: d.isin(values).to_numpy())
+        elif kind == "regex":
+            pattern = re.compile(kwargs["regex"])
+
+            def passes():
+                return self.scan.distinct_mask(
+                    column, ("regex", pattern.pattern),
+                    lambda d: d.astype(str).str.fullmatch(pattern).to_numpy(dtype=bool)
+                )
+        elif kind == "length":
+            low, high = kwargs["min_value"], kwargs["max_value"]
+
+            def passes():
+                return self.scan.distinct_mask(
+                    column, ("length", low, high),
+                    lambda d: self._between(d.astype(str).str.len().to_numpy(), low, high)
+                )
+        else:
+            left, right = rule["columns"]
+            as_type = kwargs["as"] or self._infer_type(rule["columns"])
+            compare = self.COMPARE[kwargs["operator"]]
+
+            def passes():
+                left_values, right_values = self._values(left, as_type), self._values(right, as_type)
+                result = np.asarray(compare(left_values, right_values), dtype=bool)
+                # NaN / NaT from a failed conversion would pass "!=", it fails every operator instead
+                if as_type == "number":
+                    result &= ~np.isnan(left_values) & ~np.isnan(right_values)
+                elif as_type == "datetime":
+                    result &= ~np.isnat(left_values) & ~np.isnat(right_values)
+                return result
+
+        def evaluate():
+            checked = np.ones(len(self.df), dtype=bool)
+            for rule_column in rule["columns"]:
+                checked &= ~self.scan.missing(rule_column)
+            return checked, checked & ~passes()
+
+        return evaluate
+
+    def _outcome(self, rule: dict, checked: np.ndarray, unexpected: np.ndarray) -> dict:
+        positions = np.flatnonzero(unexpected)
+        partial = positions[:self.PARTIAL_UNEXPECTED]
+        if len(rule["columns"]) == 1:
+            partial_values = self.df[rule["columns"][0]].iloc[partial].tolist()
+        else:
+            partial_values = self.df[rule["columns"]].iloc[partial].values.tolist()
+        return {
+            "element_count": len(self.df),
+            "domain_count": int(checked.sum()),
+            "unexpected_count": len(positions),
+            "partial_unexpected_list": partial_values,
+            "unexpected_index_list": self.df.index[positions].tolist()
+        }
+
+    def run(self) -> list:
+        missing = list(dict.fromkeys(c for rule in self.rules for c in rule["columns"] if c not in self.df.columns))
+        assert not missing, f"Missing columns in dataframe: {missing}"
+        compiled = [self.compile(rule) for rule in self.rules]
+
+        # Rules of a column run back to back, its scan data is dropped after the last one
+        first_seen = {}
+        for rule in self.rules:
+            first_seen.setdefault(rule["columns"][0], len(first_seen))
+        order = sorted(range(len(self.rules)), key=lambda i: first_seen[self.rules[i]["columns"][0]])
+        last_use = {}
+        for step, i in enumerate(order):
+            for column in self.rules[i]["columns"]:
+                last_use[column] = step
+
+        outcomes = [None] * len(self.rules)
+        for step, i in enumerate(order):
+            outcomes[i] = self._outcome(self.rules[i], *compiled[i]())
+            for column in self.rules[i]["columns"]:
+                if last_use[column] == step:
+                    self.scan.release(column)
+        return outcomes
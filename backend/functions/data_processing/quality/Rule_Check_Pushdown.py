@@ -0,0 +1,99 @@
+import pandas as pd
+
+from functions.data_processing.quality.Rule_Check_Engine import Rule_Check_Engine
+from functions.integrations.SQL_Dialect import SQL_Dialect
+
+
+class Rule_Check_Pushdown:
+    """
+    Rule_Check rules compiled to SQL predicates and counted in a single query on
+    the database (`source` as returned by GetDataFrameFromConnection.get_pushdown_source).
+    Only counts come back: no row indexes or unexpected values. A value the
+    predicate cannot judge (NULL from a failed cast or match) counts as unexpected.
+    Compare rules with as "text" compare the values as text, otherwise as stored.
+    Regex rules on an engine without regular expressions (MSSQL) fetch only their
+    columns and run on Rule_Check_Engine instead.
+    """
+
+    SQL_OPERATORS = {"<": "<", "<=": "<=", ">": ">", ">=": ">=", "==": "=", "!=": "<>"}
+
+    def __init__(self, source: dict, rules: list):
+        self.source = dict(source, dialect=SQL_Dialect.for_name(source["dialect"]))
+        self.dialect = self.source["dialect"]
+        self.rules = rules
+        self.batch_id = f"sql-{self.dialect.name}"
+
+    def _execute(self, sql: str):
+        cursor = self.source["connection"].cursor()
+        try:
+            cursor.execute(sql)
+            columns = [d[0] for d in cursor.description] if cursor.description else []
+            return columns, cursor.fetchall()
+        finally:
+            cursor.close()
+
+    def _between(self, expr: str, low, high, strict_min: bool = False, strict_max: bool = False) -> str:
+        conditions = []
+        if low is not None:
+            conditions.append(f"{expr} {'>' if strict_min else '>='} {self.dialect.literal(low)}")
+        if high is not None:
+            conditions.append(f"{expr} {'<' if strict_max else '<='} {self.dialect.literal(high)}")
+        return " AND ".join(conditions)
+
+    def compile(self, rule: dict) -> tuple:
+        """(checked, passes) SQL predicates of the rule."""
+        dialect, kind, kwargs = self.dialect, rule["kind"], rule["kwargs"]
+        quoted = [dialect.quote(c) for c in rule["columns"]]
+        checked = " AND ".join(f"{c} IS NOT NULL" for c in quoted)
+        column = quoted[0]
+
+        if kind == "range":
+            passes = self._between(column, kwargs["min_value"], kwargs["max_value"],
+                                   kwargs["strict_min"], kwargs["strict_max"])
+        elif kind == "in_set":
+            values = kwargs["value_set"]
+            passes = f"{column} IN ({', '.join(dialect.literal(v) for v in values)})" if values else "1 = 0"
+        elif kind == "regex":
+            passes = dialect.full_match(dialect.to_text(column), kwargs["regex"])
+        elif kind == "length":
+            passes = self._between(dialect.length(dialect.to_text(column)), kwargs["min_value"], kwargs["max_value"])
+        else:
+            left, right = quoted
+            if kwargs["as"] == "text":
+                left, right = dialect.to_text(left), dialect.to_text(right)
+            passes = f"{left} {self.SQL_OPERATORS[kwargs['operator']]} {right}"
+        return checked, passes
+
+    def pushes_down(self, rule: dict) -> bool:
+        return rule["kind"] != "regex" or self.dialect.supports_regex
+
+    def _run_locally(self, rules: list) -> list:
+        """Outcomes of rules the engine cannot run, on a DataFrame of just their columns."""
+        columns = list(dict.fromkeys(c for rule in rules for c in rule["columns"]))
+        select = ", ".join(self.dialect.quote(c) for c in columns)
+        _, rows = self._execute(f"SELECT {select} FROM ({self.source['query']}) src")
+        return Rule_Check_Engine(pd.DataFrame.from_records(rows, columns=columns), rules).run()
+
+    def run(self) -> list:
+        self.dialect.prepare(self.source["connection"])
+        pushed = [position for position, rule in enumerate(self.rules) if self.pushes_down(rule)]
+        local = [position for position in range(len(self.rules)) if position not in pushed]
+
+        selects = ["COUNT(*) AS row_count"]
+        for position in pushed:
+            checked, passes = self.compile(self.rules[position])
+            selects.append(f"SUM(CASE WHEN {checked} THEN 1 ELSE 0 END) AS d{position}")
+            selects.append(f"SUM(CASE WHEN {checked} AND ({passes}) THEN 0 WHEN {checked} THEN 1 ELSE 0 END) AS u{position}")
+        columns, rows = self._execute(f"SELECT {', '.join(selects)} FROM ({self.source['query']}) src")
+
+        record = dict(zip(columns, rows[0]))
+        outcomes = {position: {
+            "element_count": int(record["row_count"]),
+            "domain_count": int(record[f"d{position}"] or 0),
+            "unexpected_count": int(record[f"u{position}"] or 0),
+            "partial_unexpected_list": [],
+            "unexpected_index_list": []
+        } for position in pushed}
+        if local:
+            outcomes.update(zip(local, self._run_locally([self.rules[position] for position in local])))
+        return [outcomes[position] for position in range(len(self.rules))]
@@ -0,0 +1,219 @@
+import csv
+import json
+import os
+import re
+import uuid
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional, artifacts fall back to CSV
+    pa = None
+    pq = None
+
+
+class Failed_Rows_Spill:
+    """
+    Writes the failed rows of a compare to an on-disk artifact instead of the report.
+
+    Every `failed_rows_details` list (mismatched_rows_source, not_in_target_rows, ...)
+    is appended to its own Parquet file (CSV when pyarrow is not installed) under
+    RESULT_DIR/<result_id>/, batch by batch as partial reports arrive. RESULT_DIR is
+    server side config, shared with the failed rows endpoints. The report
+    keeps the counts and the first `sample_rows` rows of each list; the complete
+    set is read back page by page with read_page().
+    """
+
+    MANIFEST = "manifest.json"
+    RESULT_DIR = os.path.join("resources", "results")
+    _RESULT_ID = re.compile(r"^[0-9a-f]{32}$")
+
+    def __init__(self, result_dir: str, sample_rows: int = 100, file_format: str = None):
+        self.result_id = uuid.uuid4().hex
+        self.directory = os.path.join(result_dir, self.result_id)
+        self.sample_rows = sample_rows
+        self.file_format = file_format or ("parquet" if pq is not None else "csv")
+        assert self.file_format in ("parquet", "csv"), f"Unsupported failed rows format: {self.file_format}"
+        assert self.file_format == "csv" or pq is not None, "parquet failed rows output needs pyarrow"
+
+        self.counts = {}
+        self.samples = {}
+        self.columns = {}
+        self.json_columns = {}
+        self._writers = {}
+
+    @classmethod
+    def from_params(cls, test_params: dict):
+        """A spill for the given test params, or None when spilling is not requested."""
+        if not test_params.get("spill_failed_rows", False):
+            return None
+        return cls(
+            cls.RESULT_DIR,
+            int(test_params.get("sample_rows", 100)),
+            test_params.get("failed_rows_format")
+        )
+
+    def path(self, kind: str) -> str:
+        return os.path.join(self.directory, f"{kind}.{self.file_format}")
+
+    def _encode(self, kind: str, records: list) -> list:
+        """
+        Columns are fixed by the first batch. Lists, dicts and non-string scalars are
+        stored as JSON text so every column has one stable string type.
+        """
+        if kind not in self.columns:
+            self.columns[kind] = list(records[0].keys())
+            self.json_columns[kind] = [
+                c for c in self.columns[kind]
+                if records[0].get(c) is not None and not isinstance(records[0].get(c), str)
+            ]
+        json_columns = self.json_columns[kind]
+        rows = []
+        for record in records:
+            row = {}
+            for column in self.columns[kind]:
+                value = record.get(column)
+                if value is not None and column in json_columns:
+                    value = json.dumps(value, default=str)
+                elif value is not None and not isinstance(value, str):
+                    value = str(value)
+                row[column] = value
+            rows.append(row)
+        return rows
+
+    def _write(self, kind: str, rows: list):
+        columns = self.columns[kind]
+        os.makedirs(self.directory, exist_ok=True)
+        if self.file_format == "parquet":
+            if kind not in self._writers:
+                schema = pa.schema([(c, pa.string()) for c in columns])
+                self._writers[kind] = pq.ParquetWriter(self.path(kind), schema)
+            table = pa.Table.from_pydict({c: [row[c] for row in rows] for c in columns},
+                                         schema=self._writers[kind].schema)
+            self._writers[kind].write_table(table)
+        else:
+            new_file = kind not in self._writers
+            self._writers[kind] = True
+            with open(self.path(kind), "a", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=columns)
+                if new_file:
+                    writer.writeheader()
+                writer.writerows(rows)
+
+    def add(self, failed_rows_details: dict):
+        """Append one batch of failed_rows_details, e.g. the details of a partial report."""
+        for kind, records in failed_rows_details.items():
+            self.counts[kind] = self.counts.get(kind, 0) + len(records)
+            sample = self.samples.setdefault(kind, [])
+            if len(sample) < self.sample_rows:
+                sample.extend(records[:self.sample_rows - len(sample)])
+            if records:
+                self._write(kind, self._encode(kind, records))
+
+    def close(self) -> dict:
+        """Finish the artifact files and return the descriptor stored in the report."""
+        if self.file_format == "parquet":
+            for writer in self._writers.values():
+                writer.close()
+        self._writers = {kind: True for kind in self._writers}
+        os.makedirs(self.directory, exist_ok=True)
+
+        artifact = {
+            "result_id": self.result_id,
+            "format": self.file_format,
+            "sample_rows": self.sample_rows,
+            "counts": self.counts,
+            "columns": self.columns,
+            "json_columns": self.json_columns
+        }
+        with open(os.path.join(self.directory, self.MANIFEST), "w", encoding="utf-8") as f:
+            json.dump(artifact, f)
+        return artifact
+
+    def spill_report(self, report: dict) -> dict:
+        """
+        Move the failed rows of a finished compare report to the artifact. The row
+        lists in `failed_rows_details` and `failed_rows_indexes` are cut down to the
+        samples; the full counts stay in `result_metadata`.
+        """
+        if "error" in report:
+            return report
+        details = report.get("failed_rows_details", {})
+        self.add(details)
+        return self.finish_report(report)
+
+    def finish_report(self, report: dict) -> dict:
+        """Close the artifact and replace the row lists of `report` with the samples."""
+        artifact = self.close()
+        report["failed_rows_details"] = {kind: self.samples.get(kind, []) for kind in self.counts} \
+            or report.get("failed_rows_details", {})
+        metadata = report.get("result_metadata", {})
+        indexes = metadata.get("failed_rows_indexes")
+        if indexes:
+            artifact["index_counts"] = {kind: len(values) for kind, values in indexes.items()}
+            metadata["failed_rows_indexes"] = {kind: values[:self.sample_rows] for kind, values in indexes.items()}
+        metadata["failed_rows_artifact"] = artifact
+        return report
+
+    @classmethod
+    def manifest(cls, result_dir: str, result_id: str) -> dict:
+        assert cls._RESULT_ID.match(result_id or ""), f"Invalid result id: {result_id}"
+        path = os.path.join(result_dir, result_id, cls.MANIFEST)
+        assert os.path.exists(path), f"No failed rows stored for result {result_id}"
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    @classmethod
+    def artifact_path(cls, result_dir: str, result_id: str, kind: str) -> str:
+        manifest = cls.manifest(result_dir, result_id)
+        assert kind in manifest["counts"], f"Unknown failed rows kind: {kind}"
+        path = os.path.join(result_dir, result_id, f"{kind}.{manifest['format']}")
+        assert os.path.exists(path), f"No {kind} rows stored for result {result_id}"
+        return path
+
+    @classmethod
+    def read_page(cls, result_dir: str, result_id: str, kind: str, page: int = 1, page_size: int = 100) -> dict:
+        """
+        One page (1-based) of failed rows, read without loading the whole artifact:
+        Parquet is scanned batch by batch, CSV line by line.
+        """
+        manifest = cls.manifest(result_dir, result_id)
+        assert kind in manifest["counts"], f"Unknown failed rows kind: {kind}"
+        assert page >= 1 and page_size >= 1, "page and page_size must be positive"
+        total = manifest["counts"][kind]
+        start, stop = (page - 1) * page_size, min(page * page_size, total)
+
+        rows = []
+        path = os.path.join(result_dir, result_id, f"{kind}.{manifest['format']}")
+        if start < stop and manifest["format"] == "parquet":
+            assert pq is not None, "Reading parquet failed rows needs pyarrow"
+            position = 0
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=page_size):
+                if position + batch.num_rows > start:
+                    rows.extend(batch.slice(max(start - position, 0), stop - max(start, position)).to_pylist())
+                position += batch.num_rows
+                if position >= stop:
+                    break
+        elif start < stop:
+            with open(path, newline="", encoding="utf-8") as f:
+                for position, row in enumerate(csv.DictReader(f)):
+                    if position >= stop:
+                        break
+                    if position >= start:
+                        rows.append(row)
+
+        json_columns = manifest["json_columns"].get(kind, [])
+        for row in rows:
+            for column in json_columns:
+                # CSV has no nulls, an empty JSON cell was a missing value
+                row[column] = json.loads(row[column]) if row.get(column) else None
+
+        return {
+            "result_id": result_id,
+            "kind": kind,
+            "page": page,
+            "page_size": page_size,
+            "total_rows": total,
+            "total_pages": (total + page_size - 1) // page_size,
+            "rows": rows
+        }
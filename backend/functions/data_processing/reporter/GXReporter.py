@@ -1,16 +1,37 @@
 import json
 from typing import Dict, Any
 
+import numpy as np
+
+from functions.data_processing.reporter.Index_Ranges import Index_Ranges
+
 class GXReporter:
 
     @staticmethod
-    def process_report_to_reporter(report_data: Dict[str, Any]) -> Dict[str, Any]:
+    def _merge_indexes(parts: list, index_ranges: bool) -> dict:
+        """
+        Union of the unexpected indexes of a column's failed expectations. Integer
+        indexes are merged as run ranges; with `index_ranges` the ranges are what
+        the report carries, otherwise they are expanded back to a sorted list.
+        """
+        arrays = [np.asarray(part) for part in parts]
+        if all(Index_Ranges.is_integer(array) for array in arrays):
+            ranges = Index_Ranges.union([Index_Ranges.from_indexes(array) for array in arrays])
+            if index_ranges:
+                return {"unexpected_count": ranges.count(), "unexpected_index_ranges": ranges.to_list()}
+            return {"unexpected_count": ranges.count(), "unexpected_index_list": ranges.expand()}
+        indexes = sorted(set(index for part in parts for index in part))
+        return {"unexpected_count": len(indexes), "unexpected_index_list": indexes}
+
+    @staticmethod
+    def process_report_to_reporter(report_data: Dict[str, Any], index_ranges: bool = False) -> Dict[str, Any]:
         result = {
             "operation": report_data.get("suite_name", ""),
             "status": (report_data.get("statistics", {}).get("success_percent", 0.0) == 100),
             "columns": {}
         }
 
+        unexpected = {}
         expectations = report_data.get("results", [])
         for expectation in expectations:
             config = expectation.get("expectation_config", {})
@@ -23,9 +44,9 @@ class GXReporter:
                 result["columns"][column] = {
                     "column": column,
                     "success": True,
-                    "element_count": 0,
-                    "unexpected_index_list": []
+                    "element_count": 0
                 }
+                unexpected[column] = []
 
             element_count = expectation.get("result", {}).get("element_count", 0)
             result["columns"][column]["element_count"] = max(
@@ -37,12 +58,10 @@ class GXReporter:
 
             if not expectation.get("success", False):
                 unexpected_indices = expectation.get("result", {}).get("unexpected_index_list", [])
-                result["columns"][column]["unexpected_index_list"].extend(unexpected_indices)
+                unexpected[column].append(unexpected_indices)
 
-        for column_data in result["columns"].values():
-            column_data["unexpected_index_list"] = sorted(
-                list(set(column_data["unexpected_index_list"]))
-            )
+        for column, column_data in result["columns"].items():
+            column_data.update(GXReporter._merge_indexes(unexpected[column], index_ranges))
 
         result["columns"] = list(result["columns"].values())
 
@@ -0,0 +1,74 @@
+import numpy as np
+
+
+class Index_Ranges:
+    """
+    A set of integer row indexes stored as sorted, disjoint, non-adjacent inclusive
+    runs [start, end]. Building, merging and counting work on the runs with NumPy,
+    so cost and size follow the number of runs, not the number of indexes.
+    """
+
+    def __init__(self, starts=None, ends=None):
+        self.starts = np.asarray(starts if starts is not None else [], dtype=np.int64)
+        self.ends = np.asarray(ends if ends is not None else [], dtype=np.int64)
+
+    @staticmethod
+    def is_integer(indexes) -> bool:
+        """Whether the indexes can be range-encoded (integer labels only)."""
+        indexes = np.asarray(indexes)
+        return indexes.size == 0 or np.issubdtype(indexes.dtype, np.integer)
+
+    @classmethod
+    def from_indexes(cls, indexes) -> "Index_Ranges":
+        indexes = np.asarray(indexes, dtype=np.int64)
+        if not len(indexes):
+            return cls()
+        # Expectation results are usually sorted already
+        if not (indexes[1:] > indexes[:-1]).all():
+            indexes = np.unique(indexes)
+        breaks = np.flatnonzero(np.diff(indexes) != 1) + 1
+        return cls(indexes[np.concatenate([[0], breaks])], indexes[np.concatenate([breaks - 1, [len(indexes) - 1]])])
+
+    @classmethod
+    def from_ranges(cls, ranges) -> "Index_Ranges":
+        """From [[start, end], ...] pairs in any order, overlapping or not."""
+        pairs = np.asarray(ranges, dtype=np.int64).reshape(-1, 2)
+        assert (pairs[:, 0] <= pairs[:, 1]).all(), "Every index range needs start <= end"
+        return cls.union([cls(pairs[:, 0], pairs[:, 1])])
+
+    @classmethod
+    def union(cls, parts) -> "Index_Ranges":
+        """Merge any number of range sets in one sort."""
+        starts = np.concatenate([part.starts for part in parts]) if parts else np.zeros(0, dtype=np.int64)
+        ends = np.concatenate([part.ends for part in parts]) if parts else np.zeros(0, dtype=np.int64)
+        if not len(starts):
+            return cls()
+        order = np.argsort(starts, kind="stable")
+        starts, ends = starts[order], ends[order]
+        # A run opens where it starts past everything before it (plus one, to join adjacent runs)
+        reach = np.maximum.accumulate(ends)
+        opens = np.concatenate([[True], starts[1:] > reach[:-1] + 1])
+        return cls(starts[opens], np.maximum.reduceat(ends, np.flatnonzero(opens)))
+
+    def count(self) -> int:
+        return int((self.ends - self.starts + 1).sum())
+
+    def to_list(self) -> list:
+        return np.column_stack([self.starts, self.ends]).tolist()
+
+    def expand(self, offset: int = 0, limit: int = None) -> list:
+        """The indexes from position `offset` on, at most `limit` of them, without expanding the rest."""
+        sizes = self.ends - self.starts + 1
+        before = np.concatenate([[0], np.cumsum(sizes)])
+        total = int(before[-1])
+        stop = total if limit is None else min(total, offset + int(limit))
+        if offset >= stop:
+            return []
+        first = int(np.searchsorted(before, offset, side="right") - 1)
+        last = int(np.searchsorted(before, stop, side="left"))
+        # Only the part of each touched run inside [offset, stop) is expanded;
+        # position p of run r is starts[r] + p - before[r]
+        taken = np.minimum(before[first + 1:last + 1], stop) - np.maximum(before[first:last], offset)
+        runs = np.repeat(np.arange(first, last), taken)
+        positions = np.arange(offset, stop, dtype=np.int64)
+        return (self.starts[runs] + positions - before[runs]).tolist()
@@ -63,7 +63,11 @@ class Reporter:
                 )
 
         if isinstance(report_data, dict) and "statistics" in report_data:
-            processed_report = GXReporter.process_report_to_reporter(report_data)
+            # test_params.index_ranges: unexpected indexes as [start, end] runs instead of a list
+            test_params = (params.get("Test", {}) or {}).get("test_params") or {}
+            processed_report = GXReporter.process_report_to_reporter(
+                report_data, bool(test_params.get("index_ranges", False))
+            )
         else:
             processed_report = report_data
 
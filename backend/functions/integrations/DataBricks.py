@@ -44,6 +44,26 @@ class DataBricks:
 
         cursor = self.connection.cursor()
 
+        query = self.build_query()
+
+        cursor.execute(query)
+
+        data = cursor.fetchall()
+
+        columns = [desc[0] for desc in cursor.description]
+
+        df = pd.DataFrame(data, columns=columns)
+
+        cursor.close()
+
+        # Do NOT close self.connection here because we reuse it
+
+        return df
+
+    def build_query(self) -> str:
+
+        parameters = self.parameters
+
         db_name = parameters[4]
 
         table_name = parameters[5]
@@ -65,19 +85,36 @@ class DataBricks:
 
             print("Executing QUERY in RAW =>", query)
 
-        cursor.execute(query)
+        return query
 
-        data = cursor.fetchall()
+    def iter_chunks(self, chunksize: int):
 
-        columns = [desc[0] for desc in cursor.description]
+        """
 
-        df = pd.DataFrame(data, columns=columns)
+        Yield the (batch filtered) table as DataFrames of at most `chunksize` rows using fetchmany.
 
-        cursor.close()
+        """
 
-        # Do NOT close self.connection here because we reuse it
+        cursor = self.get_raw_connection().cursor()
 
-        return df
+        try:
+
+            cursor.execute(self.build_query())
+
+            columns = [desc[0] for desc in cursor.description]
+
+            while True:
+
+                rows = cursor.fetchmany(chunksize)
+
+                if not rows:
+                    break
+
+                yield pd.DataFrame(rows, columns=columns)
+
+        finally:
+
+            cursor.close()
 
     def get_raw_connection(self):
 
@@ -277,18 +277,43 @@ class Enhanced_CSV_Reader:
                 keep_default_na=True
             )
 
-            for column, dtype in column_dtypes.items():
-                if column in df.columns:
-                    if dtype == 'datetime64[ns]':
-                        df[column] = pd.to_datetime(df[column], errors='coerce')
-                    elif dtype == 'timedelta64[ns]':
-                        df[column] = pd.to_timedelta(df[column], errors='coerce')
-                    elif dtype == 'category':
-                        df[column] = df[column].astype('category')
-
-            return df
+            return self._apply_post_conversions(df, column_dtypes)
 
         except Exception as e:
             print(f"Error reading CSV: {e}")
             return None
 
+    def _apply_post_conversions(self, df, column_dtypes):
+        for column, dtype in column_dtypes.items():
+            if column in df.columns:
+                if dtype == 'datetime64[ns]':
+                    df[column] = pd.to_datetime(df[column], errors='coerce')
+                elif dtype == 'timedelta64[ns]':
+                    df[column] = pd.to_timedelta(df[column], errors='coerce')
+                elif dtype == 'category':
+                    df[column] = df[column].astype('category')
+        return df
+
+    def iter_chunks(self, chunksize):
+        """
+        Same typed parsing as read_csv, yielded in chunks of `chunksize` rows.
+        Types are inferred once from the sampled rows and applied to every chunk.
+        """
+        column_dtypes = self.analyze_data_types()
+        converters = self._create_converters(column_dtypes)
+        dtypes = {
+            column: dtype
+            for column, dtype in column_dtypes.items()
+            if dtype not in ['datetime64[ns]', 'timedelta64[ns]']
+        }
+
+        for chunk in pd.read_csv(
+                self.filepath,
+                converters=converters,
+                dtype=dtypes,
+                na_values=['', 'NA', 'N/A', 'NULL', 'null', 'NaN'],
+                keep_default_na=True,
+                chunksize=chunksize
+        ):
+            yield self._apply_post_conversions(chunk, column_dtypes)
+
@@ -3,6 +3,8 @@ from functions.integrations.AzureBlobStorage import AzureBlobLoader
 from functions.integrations.DataBricks import DataBricks
 from functions.integrations.Snowflake import Snowflake
 from functions.integrations.mssqlDB import mssqlDB
+from functions.integrations.SQL_Dialect import SQL_Dialect
+from functions.data_processing.Dataset_Preparation import Dataset_Preparation
 from functions.integrations.uploads import Uploads
 
 class GetDataFrameFromConnection:
@@ -11,25 +13,68 @@ class GetDataFrameFromConnection:
     __connection_obj = None  # For raw DB connection/cursor for databricks
     __table_name = None  # Fully qualified table name for databricks
     __dataType_name = None
+    __loaded = False  # True once identify_and_connect() has materialized the dataset
 
-    def __init__(self, connection_for, connection_type, params):
+    # Connection types that can run SQL against the dataset in place (get_pushdown_source)
+    PUSHDOWN_CONNECTIONS = {"databricks", "MSSQL", "snowflake"}
+
+    def __init__(self, connection_for, connection_type, params, load: bool = True):
         self.connFor = connection_for
         self.connection = connection_type
         self.params = params
         print("In GET DATA FRAME FROM CONNECTIONS File ", self.params)
-        self.identify_and_connect()
+        # With load=False nothing is fetched up front: the DataFrame is materialized on the
+        # first get_connection() call, and iter_chunks() streams without materializing it.
+        if load:
+            self.identify_and_connect()
+
+    def __get_connection_data(self):
+        return self.params.get("Connection", {}).get(self.connFor, {}).get("conn_params", {})
+
+    def __is_compare(self):
+        return self.params.get("Test", {}).get("test_type", "quality") == "compare"
+
+    def __databricks(self):
+        connection_data = self.__get_connection_data()
+        return DataBricks([
+            connection_data.get("serverHostName", None),
+            connection_data.get("httpPath", None),
+            connection_data.get("accessToken", None),
+            connection_data.get("batchId", None),
+            connection_data.get("dbSchemaName", None),
+            connection_data.get("tableDB", None)
+        ])
+
+    def __mssql(self):
+        connection_data = self.__get_connection_data()
+        return mssqlDB([
+            connection_data.get("serverName", None),
+            connection_data.get("dbName", None),
+            connection_data.get("table", None)
+        ])
+
+    def __snowflake(self):
+        connection_data = self.__get_connection_data()
+        return Snowflake([
+            connection_data.get("sf_username", None),
+            connection_data.get("sf_password", None),
+            connection_data.get("sf_account", None),
+            connection_data.get("sf_warehouse", None),
+            connection_data.get("sf_database", None),
+            connection_data.get("sf_schema", None),
+            connection_data.get("sf_tableName", None)
+        ])
 
     def identify_and_connect(self):
-        connection_data = self.params.get("Connection", {}).get(self.connFor, {}).get("conn_params", {})
+        connection_data = self.__get_connection_data()
+        self.__loaded = True
 
         if self.connection == "file_upload":
             self.__dataFrame = (
                 Uploads(
                     connection_data.get("selected_fileName", {}),
                     connection_data.get("separator", None)
-                ).get_uploaded_file_as_DF(
-                    self.params.get("Test", {}).get("test_type", "quality") == "compare"
-                )
+                ).get_uploaded_file_as_DF(self.__is_compare())
             )
 
         elif self.connection == "azure_blob_storage":
@@ -50,14 +95,7 @@ class GetDataFrameFromConnection:
                 print("[WARNING] Azure Blob returned no data.")
 
         elif self.connection == "databricks":
-            dbs = DataBricks([
-                connection_data.get("serverHostName", None),
-                connection_data.get("httpPath", None),
-                connection_data.get("accessToken", None),
-                connection_data.get("batchId", None),
-                connection_data.get("dbSchemaName", None),
-                connection_data.get("tableDB", None)
-            ])
+            dbs = self.__databricks()
             # get dataframe as usual
             self.__dataFrame = dbs.create_connection()
 
@@ -81,28 +119,153 @@ class GetDataFrameFromConnection:
 
 
         elif self.connection == "MSSQL":
-            self.__dataFrame = mssqlDB([
-                connection_data.get("serverName", None),
-                connection_data.get("dbName", None),
-                connection_data.get("table", None)
-            ]).create_connection()
+            self.__dataFrame = self.__mssql().create_connection()
 
         elif self.connection == "snowflake":
-            sf = Snowflake([
-                connection_data.get("sf_username", None),
-                connection_data.get("sf_password", None),
-                connection_data.get("sf_account", None),
-                connection_data.get("sf_warehouse", None),
-                connection_data.get("sf_database", None),
-                connection_data.get("sf_schema", None),
-                connection_data.get("sf_tableName", None)
-            ])
-            self.__dataFrame = sf.create_connection()
+            self.__dataFrame = self.__snowflake().create_connection()
 
     def get_connection(self):
+        if not self.__loaded:
+            self.identify_and_connect()
         return self.__dataFrame
 
+    def iter_chunks(self, chunksize: int = 100_000):
+        """
+        Yield the dataset as DataFrames of at most `chunksize` rows.
+        Files and DB tables are streamed straight from the source unless the DataFrame
+        has already been loaded; other connection types are loaded and sliced.
+        """
+        if not self.__loaded:
+            if self.connection == "file_upload":
+                connection_data = self.__get_connection_data()
+                yield from Uploads(
+                    connection_data.get("selected_fileName", {}),
+                    connection_data.get("separator", None),
+                    load=False
+                ).iter_chunks(chunksize, self.__is_compare())
+                return
+            elif self.connection == "databricks":
+                yield from self.__databricks().iter_chunks(chunksize)
+                return
+            elif self.connection == "MSSQL":
+                yield from self.__mssql().iter_chunks(chunksize)
+                return
+            elif self.connection == "snowflake":
+                yield from self.__snowflake().iter_chunks(chunksize)
+                return
+
+        df = self.get_connection()
+        if df is None:
+            return
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize]
+
+    def supports_pushdown(self) -> bool:
+        return self.connection in self.PUSHDOWN_CONNECTIONS
+
+    def get_pushdown_source(self):
+        """
+        Connection details for running SQL against the dataset in place:
+        the dialect name, a live DB-API connection, the query selecting the dataset
+        and the location (host and default database) the query resolves against.
+        """
+        connectors = {
+            "databricks": (self.__databricks, ["serverHostName", "httpPath"]),
+            "MSSQL": (self.__mssql, ["serverName", "dbName"]),
+            "snowflake": (self.__snowflake, ["sf_account", "sf_database", "sf_schema"])
+        }
+        if not self.supports_pushdown():
+            raise ValueError(f"SQL pushdown is not supported for connection type: {self.connection}")
+        connector_for, location_keys = connectors[self.connection]
+        connector = connector_for()
+        connection_data = self.__get_connection_data()
+        return {
+            "dialect": self.connection,
+            "connection": connector.get_raw_connection(),
+            "query": connector.build_query(),
+            "location": tuple(connection_data.get(key, None) for key in location_keys)
+        }
+
+    def get_row_count(self, count_blank_rows: bool = True, workers: int = 1) -> dict:
+        """
+        Count profile {"rows", "blank_rows", "columns"} without materializing the dataset:
+        COUNT(*) and the column metadata run on the server for DB connections, csv/txt
+        uploads are counted by scanning their bytes (split over `workers` processes),
+        anything else is streamed in chunks. An already loaded (or query-updated)
+        DataFrame is counted as it is.
+        """
+        if self.__loaded:
+            df = self.get_connection()
+            return {
+                "rows": len(df),
+                "blank_rows": Dataset_Preparation.of(df).blank_rows_count if count_blank_rows else 0,
+                "columns": list(df.columns)
+            }
+
+        if self.supports_pushdown():
+            source = self.get_pushdown_source()
+            dialect = SQL_Dialect.for_name(source["dialect"])
+            cursor = source["connection"].cursor()
+            try:
+                cursor.execute(f"SELECT * FROM ({source['query']}) src WHERE 1 = 0")
+                columns = [desc[0] for desc in cursor.description]
+                blank = f"SUM(CASE WHEN {dialect.blank_row_predicate(columns)} THEN 1 ELSE 0 END)" \
+                    if count_blank_rows else "0"
+                cursor.execute(f"SELECT COUNT(*), {blank} FROM ({source['query']}) src")
+                rows, blank_rows = cursor.fetchone()
+            finally:
+                cursor.close()
+            return {"rows": int(rows or 0), "blank_rows": int(blank_rows or 0), "columns": columns}
+
+        if self.connection == "file_upload":
+            connection_data = self.__get_connection_data()
+            counts = Uploads(
+                connection_data.get("selected_fileName", {}),
+                connection_data.get("separator", None),
+                load=False
+            ).count_rows(workers)
+            if counts is not None:
+                if not count_blank_rows:
+                    counts["blank_rows"] = 0
+                return counts
+
+        counts = {"rows": 0, "blank_rows": 0, "columns": []}
+        for chunk in self.iter_chunks():
+            counts["rows"] += len(chunk)
+            counts["columns"] = list(chunk.columns)
+            if count_blank_rows:
+                counts["blank_rows"] += int(Dataset_Preparation.blank_rows_mask(chunk).sum())
+        return counts
+
+    def get_dataset_id(self) -> str:
+        """
+        Stable name of the dataset behind this connection: connection type, location
+        and table, without credentials or batch filter.
+        """
+        dataset_keys = {
+            "file_upload": ["selected_fileName"],
+            "azure_blob_storage": ["accountUrl", "containerName", "blobName"],
+            "databricks": ["serverHostName", "dbSchemaName", "tableDB"],
+            "MSSQL": ["serverName", "dbName", "table"],
+            "snowflake": ["sf_account", "sf_database", "sf_schema", "sf_tableName"]
+        }
+        connection_data = self.__get_connection_data()
+        return "/".join(
+            [str(self.connection)] + [str(connection_data.get(key, "")) for key in dataset_keys.get(self.connection, [])]
+        )
+
+    def get_batch_id(self):
+        """
+        The BATCH_ID / AUDIT_BATCH_ID filter of a databricks connection, None when unfiltered.
+        """
+        batch_id = self.__get_connection_data().get("batchId", None)
+        return None if batch_id in (None, "", "NA") else batch_id
+
     def get_header(self):
+        if not self.__loaded:
+            # Read only the first rows instead of materializing the whole dataset
+            for chunk in self.iter_chunks(chunksize=50):
+                return chunk.columns.tolist()
         if self.__dataFrame is None:
             raise ValueError(
                 f"No DataFrame loaded. Connection for '{self.connFor}' using type '{self.connection}' failed."
@@ -110,7 +273,7 @@ class GetDataFrameFromConnection:
         return self.__dataFrame.columns.tolist()
 
     def update_connection(self, query):
-        local_dataframe = self.__dataFrame
+        local_dataframe = self.get_connection()
         self.__dataFrame = ps.sqldf(
             query.replace(query.split("FROM ")[1].split()[0], "local_dataframe"),
             locals()
@@ -134,6 +297,8 @@ class GetDataFrameFromConnection:
         Return raw DB connection or cursor (Databricks only).
         """
         if self.connection == "databricks":
+            if not self.__loaded:
+                self.identify_and_connect()
             return self.__connection_obj
         else:
             raise NotImplementedError("get_connection_obj() only implemented for Databricks connection.")
@@ -143,6 +308,8 @@ class GetDataFrameFromConnection:
         Return fully qualified table name for Databricks.
         """
         if self.connection == "databricks":
+             if not self.__loaded:
+                 self.identify_and_connect()
              return self.__table_name
         else:
              raise NotImplementedError("get_table_name() only implemented for Databricks connection.")
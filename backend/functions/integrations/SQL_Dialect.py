@@ -0,0 +1,265 @@
+import hashlib
+import re
+
+
+class SQL_Dialect:
+    """
+    Per-engine SQL fragments for pushing work down to the database.
+
+    Normalized values follow Data_Comparison.preprocess_column: NULL -> '', trim,
+    drop a trailing '.0', optionally remove spaces and lower-case. Row and key
+    hashes are the first 56 bits of the MD5 of the normalized values joined by
+    CHAR(31), so the same row hashes to the same number on every engine as long
+    as the engines render the values to the same text.
+    """
+
+    name = "generic"
+    HASH_SPLIT = 268435456  # 2**28: hashes are summed as two 28-bit halves so SUM never overflows BIGINT
+    approx_distinct_error = 0.02  # relative error allowed for approx_count_distinct
+    supports_regex = False  # whether full_match can be pushed down
+
+    @staticmethod
+    def for_name(name: str) -> "SQL_Dialect":
+        dialects = {
+            "databricks": Databricks_Dialect,
+            "snowflake": Snowflake_Dialect,
+            "MSSQL": MSSQL_Dialect,
+            "mssql": MSSQL_Dialect,
+            "sqlite": SQLite_Dialect
+        }
+        if name not in dialects:
+            raise ValueError(f"SQL pushdown is not supported for connection type: {name}")
+        return dialects[name]()
+
+    def prepare(self, connection):
+        """Register anything the engine needs on the connection before queries run."""
+        return connection
+
+    def quote(self, column: str) -> str:
+        return '"' + str(column).replace('"', '""') + '"'
+
+    def literal(self, value) -> str:
+        if value is None:
+            return "NULL"
+        if isinstance(value, bool):
+            return "1" if value else "0"
+        if isinstance(value, (int, float)):
+            return repr(value)
+        return "'" + str(value).replace("'", "''") + "'"
+
+    def to_text(self, expr: str) -> str:
+        return f"CAST({expr} AS VARCHAR)"
+
+    def trim(self, expr: str) -> str:
+        return f"TRIM({expr})"
+
+    def strip_trailing_zero(self, expr: str) -> str:
+        return f"CASE WHEN RIGHT({expr}, 2) = '.0' THEN LEFT({expr}, LENGTH({expr}) - 2) ELSE {expr} END"
+
+    def concat(self, exprs) -> str:
+        return " || ".join(exprs)
+
+    def separator(self) -> str:
+        return "CHR(31)"
+
+    def nbsp(self) -> str:
+        return "CHR(160)"
+
+    def hash56(self, expr: str) -> str:
+        raise NotImplementedError
+
+    def int_div(self, left: str, right: str) -> str:
+        return f"FLOOR({left} / {right})"
+
+    def mod(self, left: str, right: str) -> str:
+        return f"MOD({left}, {right})"
+
+    def limit(self, query: str, rows: int) -> str:
+        return f"{query} LIMIT {int(rows)}"
+
+    def approx_count_distinct(self, expr: str) -> str:
+        return f"APPROX_COUNT_DISTINCT({expr})"
+
+    def length(self, expr: str) -> str:
+        return f"LENGTH({expr})"
+
+    def full_match(self, expr: str, pattern: str) -> str:
+        """True when the whole text of `expr` matches the regular expression `pattern`."""
+        raise NotImplementedError(f"Regular expressions cannot be pushed down to {self.name}")
+
+    def normalize(self, column: str, ignore_case=False, ignore_spaces=False) -> str:
+        expr = self.trim(f"COALESCE({self.to_text(self.quote(column))}, '')")
+        expr = self.strip_trailing_zero(expr)
+        if ignore_spaces:
+            expr = f"REPLACE({expr}, ' ', '')"
+        if ignore_case:
+            expr = f"LOWER({expr})"
+        return expr
+
+    def row_text(self, columns, ignore_case=False, ignore_spaces=False) -> str:
+        normalized = [self.normalize(c, ignore_case, ignore_spaces) for c in columns]
+        parts = []
+        for position, expr in enumerate(normalized):
+            if position:
+                parts.append(self.separator())
+            parts.append(expr)
+        return self.concat(parts)
+
+    def row_hash(self, columns, ignore_case=False, ignore_spaces=False) -> str:
+        return self.hash56(self.row_text(columns, ignore_case, ignore_spaces))
+
+    def blank_row_predicate(self, columns) -> str:
+        """True when every column is NULL or whitespace only (non-breaking spaces included)."""
+        if not columns:
+            return "1 = 0"
+        return "(" + " AND ".join(
+            self.trim(f"REPLACE(COALESCE({self.to_text(self.quote(c))}, ''), {self.nbsp()}, '')") + " = ''"
+            for c in columns
+        ) + ")"
+
+
+class Databricks_Dialect(SQL_Dialect):
+    name = "databricks"
+    supports_regex = True
+
+    def quote(self, column: str) -> str:
+        return "`" + str(column).replace("`", "``") + "`"
+
+    def to_text(self, expr: str) -> str:
+        return f"CAST({expr} AS STRING)"
+
+    def strip_trailing_zero(self, expr: str) -> str:
+        return f"regexp_replace({expr}, '\\\\.0$', '')"
+
+    def concat(self, exprs) -> str:
+        return f"concat({', '.join(exprs)})"
+
+    def separator(self) -> str:
+        return "char(31)"
+
+    def nbsp(self) -> str:
+        return "char(160)"
+
+    def hash56(self, expr: str) -> str:
+        return f"CAST(conv(substr(md5({expr}), 1, 14), 16, 10) AS BIGINT)"
+
+    def int_div(self, left: str, right: str) -> str:
+        return f"({left} DIV {right})"
+
+    def approx_count_distinct(self, expr: str) -> str:
+        return f"approx_count_distinct({expr})"
+
+    def full_match(self, expr: str, pattern: str) -> str:
+        return f"{expr} RLIKE {self.literal('^(?:' + pattern + ')$')}"
+
+
+class Snowflake_Dialect(SQL_Dialect):
+    name = "snowflake"
+    supports_regex = True
+
+    def to_text(self, expr: str) -> str:
+        return f"TO_VARCHAR({expr})"
+
+    def strip_trailing_zero(self, expr: str) -> str:
+        return f"REGEXP_REPLACE({expr}, '\\\\.0$', '')"
+
+    def hash56(self, expr: str) -> str:
+        return f"TO_NUMBER(UPPER(SUBSTR(MD5({expr}), 1, 14)), 'XXXXXXXXXXXXXX')"
+
+    def full_match(self, expr: str, pattern: str) -> str:
+        # REGEXP_LIKE is anchored at both ends on Snowflake
+        return f"REGEXP_LIKE({expr}, {self.literal(pattern)})"
+
+
+class MSSQL_Dialect(SQL_Dialect):
+    name = "MSSQL"
+
+    def quote(self, column: str) -> str:
+        return "[" + str(column).replace("]", "]]") + "]"
+
+    def to_text(self, expr: str) -> str:
+        return f"CAST({expr} AS NVARCHAR(MAX))"
+
+    def trim(self, expr: str) -> str:
+        return f"LTRIM(RTRIM({expr}))"
+
+    def strip_trailing_zero(self, expr: str) -> str:
+        return f"CASE WHEN RIGHT({expr}, 2) = '.0' THEN LEFT({expr}, LEN({expr}) - 2) ELSE {expr} END"
+
+    def concat(self, exprs) -> str:
+        return " + ".join(exprs)
+
+    def separator(self) -> str:
+        return "CHAR(31)"
+
+    def nbsp(self) -> str:
+        return "NCHAR(160)"
+
+    def hash56(self, expr: str) -> str:
+        # HASHBYTES over VARCHAR so ASCII text hashes like the UTF-8 MD5 of the other engines
+        return f"CAST(SUBSTRING(HASHBYTES('MD5', CAST({expr} AS VARCHAR(MAX))), 1, 7) AS BIGINT)"
+
+    def int_div(self, left: str, right: str) -> str:
+        return f"({left} / {right})"
+
+    def mod(self, left: str, right: str) -> str:
+        return f"({left} % {right})"
+
+    def limit(self, query: str, rows: int) -> str:
+        return query.replace("SELECT ", f"SELECT TOP {int(rows)} ", 1)
+
+    def length(self, expr: str) -> str:
+        # LEN ignores trailing spaces; rule values are NVARCHAR text, two bytes per character
+        return f"(DATALENGTH({expr}) / 2)"
+
+
+class SQLite_Dialect(SQL_Dialect):
+    """Local stand-in used to exercise the pushdown SQL without a warehouse."""
+
+    name = "sqlite"
+    supports_regex = True
+    approx_distinct_error = 0.0
+
+    @staticmethod
+    def _md5_56(text):
+        if text is None:
+            return None
+        return int(hashlib.md5(str(text).encode("utf-8")).hexdigest()[:14], 16)
+
+    @staticmethod
+    def _full_match(text, pattern):
+        if text is None:
+            return None
+        return int(re.fullmatch(pattern, str(text)) is not None)
+
+    def prepare(self, connection):
+        connection.create_function("md5_56", 1, self._md5_56, deterministic=True)
+        connection.create_function("full_match", 2, self._full_match, deterministic=True)
+        return connection
+
+    def to_text(self, expr: str) -> str:
+        return f"CAST({expr} AS TEXT)"
+
+    def strip_trailing_zero(self, expr: str) -> str:
+        return f"CASE WHEN substr({expr}, -2) = '.0' THEN substr({expr}, 1, length({expr}) - 2) ELSE {expr} END"
+
+    def separator(self) -> str:
+        return "char(31)"
+
+    def nbsp(self) -> str:
+        return "char(160)"
+
+    def hash56(self, expr: str) -> str:
+        return f"md5_56({expr})"
+
+    def int_div(self, left: str, right: str) -> str:
+        return f"({left} / {right})"
+
+    def mod(self, left: str, right: str) -> str:
+        return f"({left} % {right})"
+
+    def approx_count_distinct(self, expr: str) -> str:
+        return f"COUNT(DISTINCT {expr})"
+
+    def full_match(self, expr: str, pattern: str) -> str:
+        return f"full_match({expr}, {self.literal(pattern)}) = 1"
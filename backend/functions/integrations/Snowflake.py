@@ -6,9 +6,9 @@ class Snowflake:
     def __init__(self, params):
         self.parameters = params
 
-    def create_connection(self):
+    def get_raw_connection(self):
         parameters = self.parameters
-        connection = snowflake.connector.connect(
+        return snowflake.connector.connect(
             user=parameters[0],
             password=parameters[1],
             account=parameters[2],
@@ -16,9 +16,15 @@ class Snowflake:
             database=parameters[4],
             schema=parameters[5])
 
+    def build_query(self):
+        return f"SELECT * FROM {self.parameters[6]}"
+
+    def create_connection(self):
+        connection = self.get_raw_connection()
+
         cursor = connection.cursor()
 
-        cursor.execute(f"SELECT * FROM {parameters[6]}")
+        cursor.execute(self.build_query())
         data = cursor.fetchall()
 
         columns = [desc[0] for desc in cursor.description]
@@ -29,4 +35,22 @@ class Snowflake:
 
         return df
 
+    def iter_chunks(self, chunksize):
+        """
+        Yield the table as DataFrames of at most `chunksize` rows using fetchmany.
+        """
+        connection = self.get_raw_connection()
+        cursor = connection.cursor()
+        try:
+            cursor.execute(self.build_query())
+            columns = [desc[0] for desc in cursor.description]
+            while True:
+                rows = cursor.fetchmany(chunksize)
+                if not rows:
+                    break
+                yield pd.DataFrame(rows, columns=columns)
+        finally:
+            cursor.close()
+            connection.close()
+
 
@@ -9,24 +9,31 @@ class mssqlDB:
         self.parameters = params
         print("Params Are as next ",params)
 
-    def create_connection(self):
-        global df
+    def get_connection_string(self):
         server_name = self.parameters[0]
         db_name = self.parameters[1]
-        table_name = self.parameters[2]
-        connection_string = (
+        return (
                 r'DRIVER={ODBC Driver 17 for SQL Server};'
                 r'SERVER=' + server_name + ';'  # Replace with your server name or IP address
                                            r'DATABASE=' + db_name + ';'  # Replace with your database name
                                                                     r'Trusted_Connection=yes;'
             # This uses Windows Authentication
         )
+
+    def build_query(self):
+        return f"SELECT * FROM {self.parameters[2]}"
+
+    def get_raw_connection(self):
+        return pyodbc.connect(self.get_connection_string())
+
+    def create_connection(self):
+        global df
+        connection_string = self.get_connection_string()
         print(connection_string)
         try:
             conn = pyodbc.connect(connection_string)
             cursor = conn.cursor()
-            query = f"SELECT * FROM {table_name}"
-            cursor.execute(query)
+            cursor.execute(self.build_query())
             data = cursor.fetchall()
             columns = [column[0] for column in cursor.description]
             # This step is important if your data contains Decimal objects
@@ -42,3 +49,25 @@ class mssqlDB:
             print("Error while connecting to SQL Server:", e)
         finally:
             return df
+
+    def iter_chunks(self, chunksize):
+        """
+        Yield the table as DataFrames of at most `chunksize` rows using fetchmany.
+        """
+        conn = self.get_raw_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(self.build_query())
+            columns = [column[0] for column in cursor.description]
+            while True:
+                rows = cursor.fetchmany(chunksize)
+                if not rows:
+                    break
+                data = [
+                    tuple(float(item) if isinstance(item, Decimal) else item for item in row)
+                    for row in rows
+                ]
+                yield pd.DataFrame(data, columns=columns)
+        finally:
+            cursor.close()
+            conn.close()
@@ -1,6 +1,39 @@
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+import os
+import re
 import pandas as pd
 
+
+def _count_lines(file_path, start: int, end: int, empty_line, blank_line, block_bytes: int):
+    """
+    (rows, blank rows) of the lines between byte offsets start and end, both at a
+    line start; None when a quote shows up. Module level so a process pool can run it.
+    """
+    lines = blank_lines = 0
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        position, carry = start, b""
+        while True:
+            block = f.read(min(block_bytes, end - position)) if position < end else b""
+            position += len(block)
+            if not block:
+                block, carry = carry, b""
+                if not block:
+                    break
+                block += b"\n"
+            else:
+                block = carry + block
+                cut = block.rfind(b"\n") + 1
+                block, carry = block[:cut], block[cut:]
+            if b'"' in block:
+                return None
+            empty = len(empty_line.findall(block))
+            lines += block.count(b"\n") - empty
+            blank_lines += len(blank_line.findall(block)) - empty
+    return lines, blank_lines
+
+
 class Uploads:
     _BASE_UPLOAD_PATH = Path(__file__).parent.parent.parent / "resources"
 
@@ -11,11 +44,17 @@ class Uploads:
         'json': pd.read_json
     }
 
-    def __init__(self, uploaded_file: str | dict, separator: str = ','):
+    # Cells pandas.read_csv turns into NaN by default
+    _NA_TOKENS = ['#N/A N/A', '#N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+                  '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null']
+    _COUNT_BLOCK_BYTES = 16 * 1024 * 1024
+
+    def __init__(self, uploaded_file: str | dict, separator: str = ',', load: bool = True):
         self.uploaded_file = uploaded_file
         self.separator = separator
         # Initial load: do NOT drop blank rows here
-        self.df_file = self._process_file(drop_blank_rows=False)
+        # With load=False the file is left untouched and only read through iter_chunks
+        self.df_file = self._process_file(drop_blank_rows=False) if load else None
 
     def _detect_header_row(self, file_path: Path, file_ext: str, sep: str = ',') -> int:
         max_scan_rows = 50  # Scan first 50 rows for header
@@ -37,13 +76,16 @@ class Uploads:
                 return i
         return 0
 
-    def _process_file(self, drop_blank_rows: bool = False) -> Path:
+    def _get_file_path(self) -> Path:
         file_name = (
             self.uploaded_file["selected_fileName"]
             if isinstance(self.uploaded_file, dict)
             else self.uploaded_file
         )
-        file_path = self._BASE_UPLOAD_PATH / file_name
+        return self._BASE_UPLOAD_PATH / file_name
+
+    def _process_file(self, drop_blank_rows: bool = False) -> Path:
+        file_path = self._get_file_path()
         file_ext = file_path.suffix[1:].lower()
         file_stem = file_path.stem
         output_csv = self._BASE_UPLOAD_PATH / f"{file_stem}.csv"
@@ -82,4 +124,94 @@ class Uploads:
                 from functions.integrations.Enhanced_CSV_Reader import Enhanced_CSV_Reader
                 return Enhanced_CSV_Reader(self.df_file).read_csv()
         except Exception as e:
-            raise ValueError(f"Error reading CSV file: {str(e)}")
\ No newline at end of file
+            raise ValueError(f"Error reading CSV file: {str(e)}")
+
+    def iter_chunks(self, chunksize: int, is_compare: bool = False):
+        """
+        Yield the uploaded file as DataFrames of at most `chunksize` rows without
+        loading it whole. csv/txt are streamed; xlsx/json cannot be read
+        incrementally and are loaded once, then sliced.
+        """
+        file_path = self._get_file_path()
+        file_ext = file_path.suffix[1:].lower()
+
+        if not file_path.exists():
+            raise FileNotFoundError(f"File not found: {file_path}")
+        if file_ext not in self._FILE_HANDLERS:
+            raise ValueError(f"Unsupported file type: {file_ext}")
+
+        if file_ext in ['csv', 'txt']:
+            sep = self.separator
+            header_row = self._detect_header_row(file_path, file_ext, sep=sep)
+            if is_compare and header_row == 0 and sep in [',', None]:
+                # Same typed parsing as get_uploaded_file_as_DF uses for compares
+                from functions.integrations.Enhanced_CSV_Reader import Enhanced_CSV_Reader
+                yield from Enhanced_CSV_Reader(str(file_path)).iter_chunks(chunksize)
+            else:
+                yield from pd.read_csv(file_path, header=header_row, sep=sep, chunksize=chunksize)
+            return
+
+        header_row = self._detect_header_row(file_path, file_ext)
+        df = self._FILE_HANDLERS[file_ext](file_path, header=header_row) if file_ext == 'xlsx' \
+            else self._FILE_HANDLERS[file_ext](file_path)
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize]
+
+    def count_rows(self, workers: int = 1):
+        """
+        Count rows and blank rows of a csv/txt upload by scanning its bytes, without
+        parsing it into a DataFrame. Counts match pandas.read_csv: empty lines are no
+        rows, lines holding only separators, whitespace and NA tokens are blank rows.
+        With workers > 1 a file larger than one block is cut into line aligned byte
+        ranges scanned by a process pool. Returns {"rows", "blank_rows", "columns"},
+        or None when the file needs a real parse (xlsx/json, or quoted fields that
+        may span lines).
+        """
+        file_path = self._get_file_path()
+        file_ext = file_path.suffix[1:].lower()
+        if not file_path.exists():
+            raise FileNotFoundError(f"File not found: {file_path}")
+        if file_ext not in ['csv', 'txt']:
+            return None
+
+        sep = self.separator or ','
+        if len(sep) != 1:
+            return None
+        header_row = self._detect_header_row(file_path, file_ext, sep=sep)
+        columns = list(pd.read_csv(file_path, header=header_row, sep=sep, nrows=0).columns)
+
+        tokens = b"|".join(re.escape(token.encode()) for token in self._NA_TOKENS)
+        cell = rb"(?:" + tokens + rb"|(?:[ \t]|\xc2\xa0)*)"
+        empty_line = re.compile(rb"(?m)^[ \t\r]*\n")
+        blank_line = re.compile(rb"(?m)^" + cell + rb"(?:" + re.escape(sep.encode()) + cell + rb")*\r?\n")
+
+        size = os.path.getsize(file_path)
+        with open(file_path, "rb") as f:
+            # The header and the lines above it are not rows
+            skipped = 0
+            while skipped <= header_row:
+                line = f.readline()
+                if not line:
+                    break
+                if line.strip():
+                    skipped += 1
+            bounds = [f.tell()]
+            if workers > 1 and size - bounds[0] > self._COUNT_BLOCK_BYTES:
+                step = (size - bounds[0]) // workers
+                for i in range(1, workers):
+                    f.seek(bounds[0] + i * step)
+                    f.readline()
+                    if bounds[-1] < f.tell() < size:
+                        bounds.append(f.tell())
+        bounds.append(size)
+
+        ranges = list(zip(bounds[:-1], bounds[1:]))
+        args = [(file_path, start, end, empty_line, blank_line, self._COUNT_BLOCK_BYTES) for start, end in ranges]
+        if len(ranges) == 1:
+            counts = [_count_lines(*args[0])]
+        else:
+            with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+                counts = list(pool.map(_count_lines, *zip(*args)))
+        if any(c is None for c in counts):
+            return None
+        return {"rows": sum(c[0] for c in counts), "blank_rows": sum(c[1] for c in counts), "columns": columns}
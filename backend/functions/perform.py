@@ -78,11 +78,26 @@
 #         else:
 #             self.__target_connection.update_connection(query)
 
+import os
+
 from functions.data_processing.compare.Count_Comparison import Count_Comparison
 from functions.data_processing.compare.Data_Comparison import Data_Comparison
+from functions.data_processing.compare.Partitioned_Compare import Partitioned_Compare
+from functions.data_processing.compare.Parallel_Compare import Parallel_Compare
+from functions.data_processing.compare.Aggregate_Comparison import Aggregate_Comparison
+from functions.data_processing.compare.Grouped_Count_Comparison import Grouped_Count_Comparison
+from functions.data_processing.compare.Checksum_Compare import Checksum_Compare
+from functions.data_processing.compare.SQL_Compare import SQL_Compare
+from functions.data_processing.compare.Incremental_Compare import Incremental_Compare
+from functions.data_processing.compare.Sorted_Merge_Compare import Sorted_Merge_Compare
+from functions.data_processing.compare.Sketch_Compare import Sketch_Compare
 from functions.data_processing.quality.Data_Type_Check import Data_Type_Check
 from functions.data_processing.quality.Duplicate_Check import Duplicate_Check
+from functions.data_processing.quality.Chunked_Duplicate_Check import Chunked_Duplicate_Check
+from functions.data_processing.quality.Quality_Suite import Quality_Suite
+from functions.data_processing.quality.Rule_Check import Rule_Check
 from functions.data_processing.reporter.json_Reporter import Reporter
+from functions.data_processing.reporter.Failed_Rows_Spill import Failed_Rows_Spill
 from functions.integrations.GetDataFrameFromConnection import GetDataFrameFromConnection
 from functions.data_processing.quality.Null_Check import Null_Check
 
@@ -93,20 +108,68 @@ class perform:
     __result = None
     __user_id = 0
 
+    # compare_data modes that stream their inputs instead of loading whole DataFrames
+    STREAMING_COMPARE_MODES = {"partitioned", "parallel", "checksum", "sql", "sorted_merge", "sketch"}
+    # operations that run as SQL on DB connections and only load file based sides
+    PUSHDOWN_OPERATIONS = {"compare_aggregates"}
+    # operations that run as SQL on DB connections only when test_params.pushdown is set
+    OPTIONAL_PUSHDOWN_OPERATIONS = {"check_rules"}
+    # operations that never load the datasets (counts come from the server or a file scan)
+    LAZY_OPERATIONS = {"compare_count"}
+
     def __init__(self, params):
         self.params = params
         print("In PERFORM File ", self.params)
         self.__user_id = self.params.get("Test").get("logged_in_user_id", 0)
+        load = not self.__is_streaming(self.params)
+        source_type = self.params.get("Connection", {}).get("source").get("conn_type")
         self.__source_connection = GetDataFrameFromConnection(
             "source",
-            self.params.get("Connection", {}).get("source").get("conn_type"),
-            self.params)
+            source_type,
+            self.params,
+            load=load and not self.__defers_loading(self.params, source_type))
 
         if "target" in self.params.get("Connection", {}):
+            target_type = self.params.get("Connection", {}).get("target", {}).get("conn_type")
             self.__target_connection = GetDataFrameFromConnection(
                 "target",
-                self.params.get("Connection", {}).get("target", {}).get("conn_type"),
-                self.params)
+                target_type,
+                self.params,
+                load=load and not self.__defers_loading(self.params, target_type))
+
+    def __is_streaming(self, params):
+        test = params.get("Test", {}) or {}
+        test_params = test.get("test_params") or {}
+        return (
+            test.get("operation") == "compare_data"
+            and test_params.get("compare_mode") in self.STREAMING_COMPARE_MODES
+        ) or (test.get("operation") == "check_duplicate" and bool(test_params.get("chunked")))
+
+    def __pushes_down(self, params):
+        test = params.get("Test", {}) or {}
+        operation = test.get("operation")
+        return operation in self.PUSHDOWN_OPERATIONS or (
+            operation in self.OPTIONAL_PUSHDOWN_OPERATIONS and bool((test.get("test_params") or {}).get("pushdown"))
+        )
+
+    def __defers_loading(self, params, connection_type):
+        operation = (params.get("Test", {}) or {}).get("operation")
+        if operation in self.LAZY_OPERATIONS:
+            return True
+        return self.__pushes_down(params) \
+            and connection_type in GetDataFrameFromConnection.PUSHDOWN_CONNECTIONS
+
+    def __dataset(self, connection):
+        """The pushdown source of a DB connection for pushdown operations, the DataFrame otherwise."""
+        if connection.supports_pushdown():
+            return connection.get_pushdown_source()
+        return connection.get_connection()
+
+    def __counted_dataset(self, connection, chunk_rows: int):
+        """The pushdown source of a DB connection, the dataset as a chunk stream otherwise."""
+        if connection.supports_pushdown():
+            return connection.get_pushdown_source()
+        return connection.iter_chunks(chunk_rows)
 
     def execute(self, params):
         self.params = params
@@ -115,15 +178,26 @@ class perform:
         __opr_type = self.params.get("Test", None).get("operation", {})
 
         df_target = None
-        df_source = self.__source_connection.get_connection()
+        df_source = None
 
-        if self.__target_connection is not None:
-            df_target = self.__target_connection.get_connection()
+        if not self.__is_streaming(self.params) and not self.__pushes_down(self.params) \
+                and __opr_type not in self.LAZY_OPERATIONS:
+            df_source = self.__source_connection.get_connection()
+
+            if self.__target_connection is not None:
+                df_target = self.__target_connection.get_connection()
 
         if __opr_type == "check_null":
             self.__result = Null_Check(df_source, __test_params, self.__user_id).perform_test()
             return Reporter.create_quality_report(self.__result, self.params)
 
+        elif __opr_type == "check_duplicate" and __test_params.get("chunked"):
+            chunk_rows = int(__test_params.get("chunk_rows", 100_000))
+            self.__result = Chunked_Duplicate_Check(
+                self.__source_connection.iter_chunks(chunk_rows), __test_params, self.__user_id
+            ).perform_test()
+            return Reporter.create_quality_report(self.__result, self.params)
+
         elif __opr_type == "check_duplicate":
             self.__result = Duplicate_Check(df_source, __test_params, self.__user_id).perform_test()
             return Reporter.create_quality_report(self.__result, self.params)
@@ -133,15 +207,95 @@ class perform:
             self.__result = Data_Type_Check(df_source, __test_params, conn_type, self.__user_id).perform_test()
             return Reporter.create_quality_report(self.__result, self.params)
 
+        elif __opr_type == "check_suite":
+            conn_type = self.params.get("Connection", {}).get("source").get("conn_type")
+            self.__result = Quality_Suite(df_source, __test_params, conn_type, self.__user_id).perform_test()
+            return Reporter.create_quality_report(self.__result, self.params)
+
+        elif __opr_type == "check_rules":
+            # With pushdown, DB sources are checked in place and file sources load here
+            source = self.__dataset(self.__source_connection) if __test_params.get("pushdown") else df_source
+            self.__result = Rule_Check(source, __test_params, self.__user_id).perform_test()
+            return Reporter.create_quality_report(self.__result, self.params)
+
+        elif __opr_type == "compare_count" and __test_params.get("group_by"):
+            chunk_rows = int(__test_params.get("chunk_rows", 100_000))
+            self.__result = Grouped_Count_Comparison(
+                self.__counted_dataset(self.__source_connection, chunk_rows),
+                self.__counted_dataset(self.__target_connection, chunk_rows),
+                __test_params,
+                self.__user_id
+            ).perform_test()
+            return Reporter.create_compare_report(self.__result, self.params)
+
         elif __opr_type == "compare_count":
-            self.__result = Count_Comparison(df_source, df_target).perform_test()
+            count_blank_rows = __test_params.get("count_blank_rows", True)
+            # compare_mode parallel spreads the file scans over workers, as in Parallel_Compare
+            workers = int(__test_params.get("workers") or os.cpu_count() or 1) \
+                if __test_params.get("compare_mode") == "parallel" else 1
+            self.__result = Count_Comparison(
+                self.__source_connection.get_row_count(count_blank_rows, workers),
+                self.__target_connection.get_row_count(count_blank_rows, workers)
+            ).perform_test()
+
+            return Reporter.create_compare_report(self.__result, self.params)
 
+        elif __opr_type == "compare_aggregates":
+            self.__result = Aggregate_Comparison(
+                self.__dataset(self.__source_connection),
+                self.__dataset(self.__target_connection),
+                __test_params,
+                self.__user_id
+            ).perform_test()
             return Reporter.create_compare_report(self.__result, self.params)
 
         elif __opr_type == "compare_data":
             print("Type of __test_params:", type(__test_params))
             print("__test_params content:", __test_params)
-            self.__result = Data_Comparison(df_source, df_target, __test_params, self.__user_id).perform_test()
+            compare_mode = __test_params.get("compare_mode")
+            if compare_mode in ("checksum", "sql"):
+                compare_class = SQL_Compare if compare_mode == "sql" else Checksum_Compare
+                self.__result = compare_class(
+                    self.__source_connection.get_pushdown_source(),
+                    self.__target_connection.get_pushdown_source(),
+                    __test_params,
+                    self.__user_id
+                ).perform_test()
+            elif compare_mode in ("partitioned", "parallel"):
+                chunk_rows = int(__test_params.get("chunk_rows", 100_000))
+                compare_class = Parallel_Compare if compare_mode == "parallel" else Partitioned_Compare
+                self.__result = compare_class(
+                    self.__source_connection.iter_chunks(chunk_rows),
+                    self.__target_connection.iter_chunks(chunk_rows),
+                    __test_params,
+                    self.__user_id
+                ).perform_test()
+            elif compare_mode in ("sorted_merge", "sketch"):
+                chunk_rows = int(__test_params.get("chunk_rows", 100_000))
+                # Callables, as both modes may read a side more than once
+                compare_class = Sketch_Compare if compare_mode == "sketch" else Sorted_Merge_Compare
+                self.__result = compare_class(
+                    lambda: self.__source_connection.iter_chunks(chunk_rows),
+                    lambda: self.__target_connection.iter_chunks(chunk_rows),
+                    __test_params,
+                    self.__user_id
+                ).perform_test()
+            elif compare_mode == "incremental":
+                self.__result = Incremental_Compare(
+                    df_source,
+                    df_target,
+                    __test_params,
+                    self.__user_id,
+                    source_dataset=self.__source_connection.get_dataset_id(),
+                    target_dataset=self.__target_connection.get_dataset_id(),
+                    batch_id=self.__source_connection.get_batch_id()
+                ).perform_test()
+            else:
+                self.__result = Data_Comparison(df_source, df_target, __test_params, self.__user_id).perform_test()
+            # Streaming modes spill while merging; in-memory results are spilled here
+            failed_rows_spill = Failed_Rows_Spill.from_params(__test_params)
+            if failed_rows_spill is not None and "failed_rows_artifact" not in self.__result.get("result_metadata", {}):
+                self.__result = failed_rows_spill.spill_report(self.__result)
             print(self.__result)
             return Reporter.create_compare_report(self.__result, self.params)
 